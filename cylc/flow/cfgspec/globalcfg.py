@@ -768,6 +768,68 @@ with Conf('global.cylc', desc='''
 
                Moved into the ``[scheduler]`` section from the top level.
         ''')
+        Conf('xtrigger worker pool size', VDR.V_INTEGER, 0, desc='''
+            Number of long-lived worker processes used to run xtrigger
+            functions.
+
+            By default (``0``) each xtrigger function call is run in a new
+            process (via the process pool). This is robust, but
+            each call pays the cost of starting a Python interpreter and
+            importing the xtrigger module.
+
+            If set to a positive number, xtrigger function calls are
+            instead run in a pool of persistent worker processes which keep
+            xtrigger modules imported between calls. Calls are still
+            isolated from the scheduler process and are killed after the
+            ``process pool timeout``. Workers are restarted on reload so that
+            changes to xtrigger modules are picked up.
+
+            Xtrigger functions may be ``async`` (coroutine) functions, in
+            which case they are run in an event loop in the worker (or
+            ``cylc function-run``) process.
+
+            .. versionadded:: 8.5.0
+        ''')
+        Conf('background database writes', VDR.V_BOOLEAN, False, desc='''
+            Write the workflow databases in background threads.
+
+            By default the scheduler writes changes to its private and public
+            databases in the main loop. On slow (e.g. shared network)
+            filesystems this can hold up the scheduler.
+
+            If ``True``, each database is written by a dedicated thread which
+            keeps its connection open and writes all changes which
+            accumulate while a write is in progress in a single transaction.
+            The private database is put into SQLite's write-ahead log mode
+            while the workflow is running.
+
+            Reads from the private database wait for outstanding writes, and
+            all outstanding writes are completed before the scheduler shuts
+            down. Job submissions wait for the private database to be written
+            so, as with the default, the database always records the jobs
+            which have been submitted. If the scheduler is killed, other
+            changes are recovered on restart in the same way as changes made
+            after the last database write of the main loop are by default
+            (e.g. job statuses by polling). A warning is logged if the
+            writers fall behind.
+
+            .. versionadded:: 8.5.0
+        ''')
+        Conf('job file writer threads', VDR.V_INTEGER, 0, desc='''
+            Number of threads used to write job files.
+
+            Before submitting jobs the scheduler writes a job file for each
+            one (and checks its syntax). By default this is done in the main
+            loop, one job at a time.
+
+            If set to a positive number, job files are written in batches (of
+            up to the platform's :cylc:conf:`global.cylc[platforms]
+            [<platform name>]max batch submit size`) in this many threads,
+            and each batch is submitted as soon as its job files have been
+            written.
+
+            .. versionadded:: 8.5.0
+        ''')
         Conf('process pool timeout', VDR.V_INTERVAL, DurationFloat(600),
              desc='''
             After this interval Cylc will kill long running commands in the
@@ -970,6 +1032,27 @@ with Conf('global.cylc', desc='''
 
                    {REPLACES}``[suite servers][run host select]rank``.
             ''')
+            Conf('metrics cache timeout', VDR.V_INTERVAL, DurationFloat(0),
+                 desc='''
+                Reuse run host metrics up to this old for host selection.
+
+                Evaluating :cylc:conf:`[..]ranking` expressions requires the
+                metrics of each run host, which are retrieved over SSH.
+
+                If set, host metrics are shared between host selections by
+                the same user (e.g. concurrent ``cylc play`` commands) in
+                ``~/.cylc/host-metrics.json``. Only one selection at a time
+                retrieves metrics, any others waiting use the same results,
+                and metrics are reused by later selections until they are
+                this old. This saves SSH connections when many workflows are
+                started at once (e.g. after maintenance), at the cost of
+                ranking hosts on slightly old metrics.
+
+                If the metrics file cannot be used (e.g. file locks are not
+                supported), each selection retrieves its own metrics.
+
+                .. versionadded:: 8.5.0
+            ''')
 
         with Conf('host self-identification', desc=f'''
             How Cylc determines and shares the identity of the workflow host.
@@ -1407,6 +1490,26 @@ with Conf('global.cylc', desc='''
                    {REPLACES}``global.rc[hosts][<host>]task communication
                    method``.
             ''')
+            Conf('message relay', VDR.V_STRING, desc='''
+                The socket of a message relay on the job hosts.
+
+                If set, jobs hand their task messages to the message relay
+                listening on this socket (see ``cylc message-relay``), which
+                sends the messages of many jobs to the scheduler in a single
+                request. This reduces the load on the scheduler when a
+                platform runs a lot of short jobs. If the relay is not
+                running, jobs send their messages to the scheduler directly.
+
+                The socket must be on a filesystem local to the job hosts.
+                The path may contain environment variables, which are
+                expanded by the job, e.g.
+                ``/tmp/cylc-message-relay-$USER.sock``.
+
+                Only used with the ``zmq`` and ``ssh``
+                :cylc:conf:`[..]communication method`.
+
+                .. versionadded:: 8.5.0
+            ''')
             Conf(
                 'submission polling intervals', VDR.V_INTERVAL_LIST,
                 [DurationFloat(900)], desc=default_for(
@@ -1801,6 +1904,25 @@ with Conf('global.cylc', desc='''
 
                 .. versionadded:: 8.0.0
             ''')
+            Conf('max concurrent job commands', VDR.V_INTEGER, default=2,
+                 desc='''
+                Limits the number of job poll commands, and separately the
+                number of job kill commands, which may run at once for this
+                platform.
+
+                Job polls and kills are run in batches. The batch size adapts
+                to the time the commands take, so that polling many jobs
+                does not overload the platform or its job runner. Further
+                batches wait until a running command finishes (kills are
+                not held up by polls), so that poll and kill commands do not
+                fill the
+                :cylc:conf:`global.cylc[scheduler]process pool size` at the
+                expense of job submissions and other commands.
+
+                Set to ``0`` for no limit.
+
+                .. versionadded:: 8.5.0
+            ''')
             Conf('ssh forward environment variables', VDR.V_STRING_LIST, '',
                  desc='''
                 A list containing the names of the environment variables to
@@ -52,11 +52,9 @@ For more info see: https://github.com/cylc/cylc-flow/issues/3329
 
 """
 
+import asyncio
 from contextlib import suppress
-from time import (
-    sleep,
-    time,
-)
+from time import time
 from typing import (
     TYPE_CHECKING,
     AsyncGenerator,
@@ -359,7 +357,7 @@ async def reload_workflow(schd: 'Scheduler', reload_global: bool = False):
         await schd.update_data_structure()
         schd.update_data_store()
         # give commands time to complete
-        sleep(1)  # give any remove-init's time to complete
+        await asyncio.sleep(1)  # give any remove-init's time to complete
 
     try:
         # Back up the current config in case workflow reload errors
@@ -404,6 +402,8 @@ async def reload_workflow(schd: 'Scheduler', reload_global: bool = False):
             schd.workflow_db_mgr.pri_dao.select_workflow_params()
         )
         schd.apply_new_config(config, is_reload=True)
+        # Ensure changes to xtrigger modules are picked up
+        schd.proc_pool.recycle_function_workers()
         schd.broadcast_mgr.linearized_ancestors = (
             schd.config.get_linearized_ancestors()
         )
@@ -17,11 +17,12 @@
 """Date-time cycling by point, interval, and sequence classes."""
 
 import contextlib
+from datetime import date
 from functools import lru_cache
 import re
 from typing import List, Optional, TYPE_CHECKING, Tuple
 
-from metomi.isodatetime.data import Calendar, CALENDAR, Duration
+from metomi.isodatetime.data import Calendar, CALENDAR, Duration, TimePoint
 from metomi.isodatetime.dumpers import TimePointDumper
 from metomi.isodatetime.timezone import (
     get_local_time_zone, get_local_time_zone_format, TimeZoneFormatMode)
@@ -42,7 +43,6 @@ from cylc.flow.wallclock import get_current_time_string
 from cylc.flow.parsec.validate import IllegalValueError
 
 if TYPE_CHECKING:
-    from metomi.isodatetime.data import TimePoint
     from metomi.isodatetime.parsers import (
         DurationParser, TimePointParser, TimeRecurrenceParser)
 
@@ -56,6 +56,23 @@ NEW_DATE_TIME_REC = re.compile("T")
 WARNING_PARSE_EXPANDED_YEAR_DIGITS = (
     "(incompatible with [cylc]cycle point num expanded year digits = %s ?)")
 
+# Dump format fields which can be formatted without isodatetime, as
+# str.format fields of (year, month, day, hour, minute, second).
+POINT_FORMAT_FIELDS = {
+    'CCYY': '{0:04d}',
+    'MM': '{1:02d}',
+    'DD': '{2:02d}',
+    'hh': '{3:02d}',
+    'mm': '{4:02d}',
+    'ss': '{5:02d}',
+    'T': 'T',
+    '-': '-',
+    ':': ':',
+}
+POINT_FORMAT_REC = re.compile(r'CCYY|MM|DD|hh|mm|ss|.')
+TIME_ZONE_FORMAT_REC = re.compile(r'(Z|([+-])(\d\d):?(\d\d)?)$')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
 
 class WorkflowSpecifics:
 
@@ -70,24 +87,79 @@ class WorkflowSpecifics:
         'TimePointParser', 'DurationParser', 'TimeRecurrenceParser'
     ]
     NUM_EXPANDED_YEAR_DIGITS: int = 0
+    # (template, time zone offset, resolution) for formatting points from
+    # seconds since the epoch, or None if the dump format is not supported.
+    point_formatter: Optional[Tuple[str, int, int]] = None
+    # Incremented whenever the above are (re)initialised.
+    generation: int = 0
 
 
 class ISO8601Point(PointBase):
 
-    """A single point in an ISO8601 date time sequence."""
+    """A single point in an ISO8601 date time sequence.
+
+    Besides its string value, a point is represented as seconds since the
+    epoch (in the workflow calendar), which is used for comparisons and for
+    adding exact (week/day/hour/minute/second) intervals. Intervals with
+    months or years go through isodatetime.
+
+    """
 
     TYPE = CYCLER_TYPE_ISO8601
     TYPE_SORT_KEY = CYCLER_TYPE_SORT_KEY_ISO8601
 
-    __slots__ = ('value')
+    __slots__ = ('value', '_seconds', '_canonical', '_generation')
+
+    def __init__(self, value: str):
+        super().__init__(value)
+        self._seconds: Optional[int] = None
+        self._canonical: bool = False
+        self._generation = -1
+
+    @classmethod
+    def _from_seconds(cls, value: str, seconds: int) -> 'ISO8601Point':
+        """Return a point already formatted from seconds since the epoch."""
+        point = cls(value)
+        point._seconds = seconds
+        point._canonical = True
+        point._generation = WorkflowSpecifics.generation
+        return point
 
     @classmethod
     def from_nonstandard_string(cls, point_string):
         """Standardise a date-time string."""
         return ISO8601Point(str(point_parse(point_string))).standardise()
 
+    def _get_seconds(self) -> Optional[int]:
+        """Return seconds since the epoch, or None if not representable."""
+        if self._generation != WorkflowSpecifics.generation:
+            self._seconds, self._canonical = _point_seconds(
+                self.value, WorkflowSpecifics.generation, CALENDAR.mode
+            )
+            self._generation = WorkflowSpecifics.generation
+        return self._seconds
+
+    def _add_seconds(
+        self, seconds: Optional[int]
+    ) -> Optional['ISO8601Point']:
+        """Return self plus seconds, or None if isodatetime is needed."""
+        if seconds is None:
+            return None
+        self_seconds = self._get_seconds()
+        # (not if the value is not in the format we would dump it in)
+        if self_seconds is None or not self._canonical:
+            return None
+        new_seconds = self_seconds + seconds
+        value = _format_point_seconds(new_seconds)
+        if value is None:
+            return None
+        return self._from_seconds(value, new_seconds)
+
     def add(self, other):
         """Add an Interval to self."""
+        point = self._add_seconds(_interval_seconds(other.value))
+        if point is not None:
+            return point
         return ISO8601Point(self._iso_point_add(
             self.value, other.value, CALENDAR.mode
         ))
@@ -103,6 +175,7 @@ class ISO8601Point(PointBase):
                     'Truncated ISO8601 dates are not permitted',
                 )
             self.value = str(point_parse(self.value))
+            self._generation = -1
         except IsodatetimeError as exc:
             if self.value.startswith("+") or self.value.startswith("-"):
                 message = WARNING_PARSE_EXPANDED_YEAR_DIGITS % (
@@ -115,9 +188,19 @@ class ISO8601Point(PointBase):
     def sub(self, other):
         """Subtract a Point or Interval from self."""
         if isinstance(other, ISO8601Point):
+            seconds = self._get_seconds()
+            other_seconds = other._get_seconds()
+            if seconds is not None and other_seconds is not None:
+                return ISO8601Interval(
+                    _get_interval_string(seconds - other_seconds)
+                )
             return ISO8601Interval(self._iso_point_sub_point(
                 self.value, other.value, CALENDAR.mode
             ))
+        seconds = _interval_seconds(other.value)
+        point = self._add_seconds(None if seconds is None else -seconds)
+        if point is not None:
+            return point
         return ISO8601Point(self._iso_point_sub_interval(
             self.value, other.value, CALENDAR.mode
         ))
@@ -131,7 +214,11 @@ class ISO8601Point(PointBase):
         return str(point + interval)
 
     def _cmp(self, other: 'ISO8601Point') -> int:
-        return self._iso_point_cmp(self.value, other.value, CALENDAR.mode)
+        seconds = self._get_seconds()
+        other_seconds = other._get_seconds()
+        if seconds is None or other_seconds is None:
+            return self._iso_point_cmp(self.value, other.value, CALENDAR.mode)
+        return (seconds > other_seconds) - (seconds < other_seconds)
 
     @staticmethod
     @lru_cache(10000)
@@ -895,6 +982,11 @@ def init(num_expanded_year_digits=0, custom_dump_format=None, time_zone=None,
     WorkflowSpecifics.abbrev_util = CylcTimeParser(
         None, None, WorkflowSpecifics.iso8601_parsers
     )
+    WorkflowSpecifics.point_formatter = get_point_formatter(
+        WorkflowSpecifics.DUMP_FORMAT,
+        WorkflowSpecifics.ASSUMED_TIME_ZONE
+    )
+    WorkflowSpecifics.generation += 1
     return WorkflowSpecifics
 
 
@@ -977,3 +1069,197 @@ def _point_parse(point_string: str, _dump_fmt, _tz) -> 'TimePoint':
                 point_string, WorkflowSpecifics.DUMP_FORMAT)
     # Attempt to parse it in ISO 8601 format.
     return WorkflowSpecifics.point_parser.parse(point_string)
+
+
+def get_point_formatter(
+    dump_format: str, time_zone: Tuple[int, int]
+) -> Optional[Tuple[str, int, int]]:
+    """Return a template for formatting points from seconds since the epoch.
+
+    Only simple calendar date formats are supported.
+
+    Args:
+        dump_format: The cycle point format.
+        time_zone: The assumed time zone (hours, minutes), used if the
+            format does not specify one.
+
+    Returns:
+        (template, time zone offset seconds, resolution seconds), or None
+        if the format is not supported.
+
+    Examples:
+        >>> get_point_formatter('CCYYMMDDThhmmZ', (0, 0))
+        ('{0:04d}{1:02d}{2:02d}T{3:02d}{4:02d}Z', 0, 60)
+        >>> get_point_formatter('CCYY-MM-DDThh-05:30', (0, 0))
+        ('{0:04d}-{1:02d}-{2:02d}T{3:02d}-05:30', -19800, 3600)
+        >>> get_point_formatter('CCYYMMDD', (1, 0))
+        ('{0:04d}{1:02d}{2:02d}', 3600, 86400)
+        >>> get_point_formatter('CCYY-DDD', (0, 0))  # ordinal date
+        >>> get_point_formatter('CCYYMMDDTmm', (0, 0))
+        >>> get_point_formatter('%Y%m%d', (0, 0))
+
+    """
+    body = dump_format
+    time_zone_str = ''
+    match = TIME_ZONE_FORMAT_REC.search(dump_format)
+    if match:
+        time_zone_str = match.group(1)
+        body = dump_format[:match.start()]
+        if time_zone_str == 'Z':
+            offset = 0
+        else:
+            sign = -1 if match.group(2) == '-' else 1
+            offset = sign * (
+                int(match.group(3)) * 3600 + int(match.group(4) or 0) * 60
+            )
+    else:
+        offset = time_zone[0] * 3600 + time_zone[1] * 60
+    fields = POINT_FORMAT_REC.findall(body)
+    if (
+        any(field not in POINT_FORMAT_FIELDS for field in fields)
+        or any(fields.count(field) != 1 for field in ('CCYY', 'MM', 'DD'))
+    ):
+        return None
+    # The resolution is set by the smallest of hours, minutes and seconds
+    # present, which must not skip any larger one.
+    resolution = 86400
+    time_fields = [field for field in fields if field in ('hh', 'mm', 'ss')]
+    for field, expected, field_resolution in zip(
+        time_fields, ('hh', 'mm', 'ss'), (3600, 60, 1)
+    ):
+        if field != expected:
+            return None
+        resolution = field_resolution
+    template = ''.join(POINT_FORMAT_FIELDS[field] for field in fields)
+    return template + time_zone_str, offset, resolution
+
+
+@lru_cache(10000)
+def _point_seconds(
+    point_string: str, _generation: int, _calendar_mode: str
+) -> Tuple[Optional[int], bool]:
+    """Return the seconds since the epoch of a point string.
+
+    Args:
+        point_string: The point to parse.
+        _generation: Workflow specifics generation (only used to avoid
+            invalid cache hits).
+        _calendar_mode: Calendar mode (only used to avoid invalid cache
+            hits).
+
+    Returns:
+        (seconds, canonical): seconds is None if the point is truncated or
+        not a whole number of seconds; canonical is True if formatting the
+        seconds reproduces point_string.
+
+    """
+    point = point_parse(point_string)
+    if point.truncated or point.time_zone.unknown:
+        return None, False
+    year, month, day_of_month = point.get_calendar_date()
+    hour, minute, second = point.get_hour_minute_second()
+    second_of_day = hour * 3600 + minute * 60 + second
+    if second_of_day != int(second_of_day):
+        return None, False
+    if CALENDAR.mode != Calendar.MODE_GREGORIAN:
+        # fixed length years
+        days = (
+            (year - 1970) * CALENDAR.DAYS_IN_YEAR
+            + sum(CALENDAR.DAYS_IN_MONTHS[:month - 1])
+            + day_of_month - 1
+        )
+    elif 1 <= year <= 9999:
+        days = date(year, month, day_of_month).toordinal() - EPOCH_ORDINAL
+    else:
+        days, seconds = (
+            point
+            - TimePoint(**CALENDAR.UNIX_EPOCH_DATE_TIME_REFERENCE_PROPERTIES)
+        ).get_days_and_seconds()
+        total = int(days) * CALENDAR.SECONDS_IN_DAY + int(seconds)
+        return total, False
+    total = (
+        days * CALENDAR.SECONDS_IN_DAY
+        + int(second_of_day)
+        - point.time_zone.hours * 3600
+        - point.time_zone.minutes * 60
+    )
+    return total, _format_point_seconds(total) == point_string
+
+
+def _format_point_seconds(seconds: int) -> Optional[str]:
+    """Format seconds since the epoch as a point string.
+
+    Returns None if the dump format is not supported, if the point is not
+    representable at the resolution of the dump format, or if the year is
+    out of range.
+    """
+    if WorkflowSpecifics.point_formatter is None:
+        return None
+    template, offset, resolution = WorkflowSpecifics.point_formatter
+    seconds += offset
+    if seconds % resolution:
+        return None
+    days, second_of_day = divmod(seconds, CALENDAR.SECONDS_IN_DAY)
+    if CALENDAR.mode == Calendar.MODE_GREGORIAN:
+        try:
+            day = date.fromordinal(EPOCH_ORDINAL + days)
+        except (ValueError, OverflowError):
+            return None
+        year, month, day_of_month = day.year, day.month, day.day
+    else:
+        # fixed length years
+        year, day_of_year = divmod(days, CALENDAR.DAYS_IN_YEAR)
+        year += 1970
+        month = 1
+        for days_in_month in CALENDAR.DAYS_IN_MONTHS:
+            if day_of_year < days_in_month:
+                break
+            day_of_year -= days_in_month
+            month += 1
+        day_of_month = day_of_year + 1
+    if not 0 <= year <= 9999:
+        return None
+    hour, second_of_hour = divmod(second_of_day, 3600)
+    minute, second = divmod(second_of_hour, 60)
+    return template.format(year, month, day_of_month, hour, minute, second)
+
+
+@lru_cache(10000)
+def _interval_seconds(interval_string: str) -> Optional[int]:
+    """Return the length of an exact interval in seconds.
+
+    Returns None for intervals with years or months, or which are not a
+    whole number of seconds.
+    """
+    interval = interval_parse(interval_string)
+    if not interval.is_exact():
+        return None
+    seconds = interval.get_seconds()
+    if seconds != int(seconds):
+        return None
+    return int(seconds)
+
+
+def _get_interval_string(seconds: int) -> str:
+    """Return the interval between two points given the seconds between them.
+
+    This is the same as subtracting the isodatetime TimePoints.
+
+    Examples:
+        >>> _get_interval_string(0)
+        'P0Y'
+        >>> _get_interval_string(108000)
+        'P1DT6H'
+        >>> _get_interval_string(-90)
+        '-PT1M30S'
+
+    """
+    days, second_of_day = divmod(abs(seconds), CALENDAR.SECONDS_IN_DAY)
+    hours, second_of_hour = divmod(second_of_day, 3600)
+    minutes, seconds_ = divmod(second_of_hour, 60)
+    interval = Duration(
+        days=days, hours=hours, minutes=minutes, seconds=seconds_
+    )
+    if seconds < 0:
+        interval = -1 * interval
+    return str(interval)
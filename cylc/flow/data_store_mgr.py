@@ -56,12 +56,15 @@ Packaging methods are included for dissemination of protobuf messages.
 
 from contextlib import suppress
 from collections import Counter, deque
+from itertools import chain
 from copy import deepcopy
 import json
 from time import time
 from typing import (
     Any,
+    Callable,
     Dict,
+    Iterable,
     Optional,
     List,
     Set,
@@ -227,6 +230,36 @@ def setbuff(obj, key, value):
         setattr(obj, key, value)
 
 
+def embed_message(field_number: int, msg_bytes: bytes) -> bytes:
+    """Encode a serialised message as a field of an enclosing message.
+
+    Serialised protobuf messages can be concatenated, so this allows a
+    message to be assembled from already serialised sub-messages without
+    serialising them again.
+
+    Examples:
+        >>> from cylc.flow.data_messages_pb2 import (
+        ...     AllDeltas, PbWorkflow, WDeltas)
+        >>> delta = WDeltas(added=PbWorkflow(id='x' * 200))
+        >>> all_deltas = AllDeltas()
+        >>> all_deltas.workflow.CopyFrom(delta)
+        >>> embed_message(
+        ...     AllDeltas.DESCRIPTOR.fields_by_name['workflow'].number,
+        ...     delta.SerializeToString()
+        ... ) == all_deltas.SerializeToString()
+        True
+
+    """
+    # field key: (field_number << 3) | wire type 2 (length-delimited)
+    out = bytearray()
+    for value in ((field_number << 3) | 2, len(msg_bytes)):
+        while value > 0x7f:
+            out.append((value & 0x7f) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out) + msg_bytes
+
+
 def generate_checksum(in_strings):
     """Generate cross platform & python checksum from strings."""
     # can't use hash(), it's not the same across 32-64bit or python invocations
@@ -428,6 +461,117 @@ def create_delta_store(delta=None, workflow_id=None):
     return delta_store
 
 
+class FamilyTaskTotals:
+    """Running totals of the states of the child tasks of a family proxy.
+
+    Task contributions are tuples of (state, flags, graph_depth), where flags
+    are the values of the FLAGS fields of the task proxy.
+
+    These are updated incrementally as tasks change, so the family proxy
+    can be updated without visiting all of its child tasks.
+
+    """
+
+    __slots__ = ('n_tasks', 'states', 'flags', 'graph_depths')
+
+    FLAGS = (
+        'is_held',
+        'is_queued',
+        'is_runahead',
+        'is_retry',
+        'is_wallclock',
+        'is_xtriggered',
+    )
+
+    def __init__(self):
+        self.n_tasks = 0
+        self.states: Counter = Counter()
+        self.flags = [0] * len(self.FLAGS)
+        self.graph_depths: Counter = Counter()
+
+    def update(self, contribution: tuple, n: int) -> None:
+        """Add (n=1) or subtract (n=-1) a task contribution."""
+        state, flags, graph_depth = contribution
+        self.n_tasks += n
+        if state:
+            self._count(self.states, state, n)
+        for i, flag in enumerate(flags):
+            if flag:
+                self.flags[i] += n
+        self._count(self.graph_depths, graph_depth, n)
+
+    @staticmethod
+    def _count(counter: Counter, key, n: int) -> None:
+        counter[key] += n
+        if not counter[key]:
+            del counter[key]
+
+
+class NodeIndex:
+    """Index of the task proxies, family proxies or jobs of a workflow.
+
+    Maps the values of the ATTRS fields (state, cycle point, namespace name
+    and first parent) to the IDs of the nodes which have them, so lookups
+    such as "the failed tasks of cycle X" need not visit every node.
+
+    This is updated from the deltas as they are applied to the data-store
+    (see DataStoreMgr.apply_delta_batch).
+
+    """
+
+    __slots__ = ('index', 'node_values')
+
+    ATTRS = ('state', 'cycle_point', 'name', 'first_parent')
+
+    def __init__(self):
+        # {field: {value: {node IDs}}}
+        self.index: Dict[str, Dict[str, Set[str]]] = {
+            attr: {} for attr in self.ATTRS
+        }
+        # {node ID: field values}
+        self.node_values: Dict[str, tuple] = {}
+
+    def add(self, node) -> None:
+        """Add or re-index a node."""
+        values = tuple(
+            # (jobs have no first parent)
+            getattr(node, attr, '')
+            for attr in self.ATTRS
+        )
+        old_values = self.node_values.get(node.id)
+        if values == old_values:
+            return
+        if old_values is not None:
+            self.remove(node.id)
+        self.node_values[node.id] = values
+        for attr, value in zip(self.ATTRS, values):
+            self.index[attr].setdefault(value, set()).add(node.id)
+
+    def remove(self, node_id: str) -> None:
+        """Remove a node from the index."""
+        values = self.node_values.pop(node_id, None)
+        if values is None:
+            return
+        for attr, value in zip(self.ATTRS, values):
+            node_ids = self.index[attr][value]
+            node_ids.discard(node_id)
+            if not node_ids:
+                del self.index[attr][value]
+
+    def update(self, nodes: dict, delta) -> None:
+        """Update the index from a delta applied to the nodes."""
+        for node_id in delta.pruned:
+            self.remove(node_id)
+        for element in chain(delta.added, delta.updated):
+            with suppress(KeyError):
+                self.add(nodes[element.id])
+
+    def get(self, attr: str, values: Iterable[str]) -> Set[str]:
+        """Return the IDs of nodes with any of the values of a field."""
+        index = self.index[attr]
+        return set().union(*(index.get(value, ()) for value in values))
+
+
 class DataStoreMgr:
     """Manage the workflow data store.
 
@@ -455,12 +599,18 @@ class DataStoreMgr:
             Maximum distance of the data-store graph from the active pool.
         .parents (dict):
             Local store of config.get_parent_lists()
+        .data_version (int):
+            Incremented whenever deltas are applied to the data-store.
         .publish_deltas (list):
-            Collection of the latest applied deltas for publishing.
+            Collection of the latest applied deltas for publishing, as
+            (topic, serialised delta, None) tuples.
         .schd (cylc.flow.scheduler.Scheduler):
             Workflow scheduler object.
         .workflow_id (str):
             ID of the workflow service containing owner and name.
+        .node_indexes (dict):
+            NodeIndex of the task proxies, family proxies and jobs, by
+            workflow ID and data type.
 
     Arguments:
         schd (cylc.flow.scheduler.Scheduler):
@@ -482,6 +632,14 @@ class DataStoreMgr:
         self.parents = {}
         self.state_update_families = set()
         self.updated_state_families = set()
+        # Incremental family state totals, {family proxy ID: totals}.
+        self.family_task_totals: Dict[str, FamilyTaskTotals] = {}
+        # Task contributions to the family totals,
+        # {task proxy ID: (family proxy ID, contribution)}.
+        self.family_task_contributions: Dict[str, Tuple[str, tuple]] = {}
+        # Whether the n-window was empty when the family totals were last
+        # updated (an empty window does not filter tasks).
+        self.family_totals_window_empty = True
         # Update workflow state totals once more post delta application.
         self.state_update_follow_on = False
         self.n_edge_distance = n_edge_distance
@@ -495,6 +653,13 @@ class DataStoreMgr:
         self.data = {
             self.workflow_id: deepcopy(DATA_TEMPLATE)
         }
+        self.node_indexes: Dict[str, Dict[str, NodeIndex]] = {
+            self.workflow_id: {
+                FAMILY_PROXIES: NodeIndex(),
+                JOBS: NodeIndex(),
+                TASK_PROXIES: NodeIndex(),
+            }
+        }
         self.added = deepcopy(DATA_TEMPLATE)
         self.updated = deepcopy(DATA_TEMPLATE)
         self.deltas = {
@@ -509,10 +674,19 @@ class DataStoreMgr:
         # internal delta
         self.delta_queues = {self.workflow_id: {}}
         self.publish_deltas = []
+        self.data_version = 0
+        # Serialised data-store messages, {key: (data_version, bytes)}
+        self.serialised_cache: Dict[str, Tuple[int, bytes]] = {}
         # internal n-window
         self.all_task_pool = set()
         self.all_n_window_nodes = set()
         self.n_window_nodes = {}
+        # Number of active tasks with each node in their n-window,
+        # {task proxy ID: count}.
+        self.n_window_node_counts: Dict[str, int] = {}
+        # Nodes which moved in/out of the n-window since the family totals
+        # were last updated.
+        self.n_window_changed: Set[str] = set()
         self.n_window_edges = set()
         self.n_window_node_walks = {}
         self.n_window_completed_walks = set()
@@ -789,7 +963,8 @@ class DataStoreMgr:
             active_walk['orphans'].add(active_id)
 
         # Generate task proxy node
-        self.n_window_nodes[active_id] = set()
+        # (the previous window is kept until the walk is complete)
+        self.n_window_nodes.setdefault(active_id, set())
 
         self.generate_ghost_task(
             source_tokens,
@@ -1034,7 +1209,7 @@ class DataStoreMgr:
                 active_walk['depths'][n_depth].update(c_ids, p_ids)
 
         self.n_window_completed_walks.add(active_id)
-        self.n_window_nodes[active_id].update(active_walk['walk_ids'])
+        self._set_n_window_nodes(active_id, set(active_walk['walk_ids']))
 
         # This part is vital to constructing a set of boundary nodes
         # associated with the n=0 window of current active node.
@@ -1113,6 +1288,33 @@ class DataStoreMgr:
             getattr(self.updated[WORKFLOW], EDGES).edges.append(e_id)
             self.n_window_edges.add(e_id)
 
+    def _set_n_window_nodes(self, active_id: str, node_ids: Set[str]):
+        """Set the n-window of an active node, updating reference counts."""
+        old_ids = self.n_window_nodes.get(active_id, set())
+        self.n_window_nodes[active_id] = node_ids
+        if active_id in self.all_task_pool:
+            self._count_n_window_nodes(node_ids.difference(old_ids), 1)
+            self._count_n_window_nodes(old_ids.difference(node_ids), -1)
+
+    def _count_n_window_nodes(self, node_ids: Iterable[str], increment: int):
+        """Increment/decrement the n-window reference counts of nodes.
+
+        Nodes enter the n-window when their count goes above zero and leave
+        it when it drops to zero.
+        """
+        counts = self.n_window_node_counts
+        for tp_id in node_ids:
+            count = counts.get(tp_id, 0) + increment
+            if count > 0:
+                counts[tp_id] = count
+                if tp_id not in self.all_n_window_nodes:
+                    self.all_n_window_nodes.add(tp_id)
+                    self.n_window_changed.add(tp_id)
+            else:
+                counts.pop(tp_id, None)
+                self.all_n_window_nodes.discard(tp_id)
+                self.n_window_changed.add(tp_id)
+
     def remove_pool_node(self, name, point):
         """Remove ID reference and flag isolate node/branch for pruning."""
         tp_id = self.id_.duplicate(
@@ -1121,6 +1323,7 @@ class DataStoreMgr:
         ).id
         if tp_id in self.all_task_pool:
             self.all_task_pool.remove(tp_id)
+            self._count_n_window_nodes(self.n_window_nodes.get(tp_id, ()), -1)
             self.updates_pending = True
         # flagged isolates/end-of-branch nodes for pruning on removal
         if (
@@ -1147,7 +1350,9 @@ class DataStoreMgr:
             cycle=str(point),
             task=name,
         ).id
-        self.all_task_pool.add(tp_id)
+        if tp_id not in self.all_task_pool:
+            self.all_task_pool.add(tp_id)
+            self._count_n_window_nodes(self.n_window_nodes.get(tp_id, ()), 1)
         self.update_window_depths = True
 
     def generate_ghost_task(
@@ -1229,7 +1434,9 @@ class DataStoreMgr:
             name=name,
             flow_nums=serialise_set(flow_nums),
         )
+        # (counted once the walk generating it is complete)
         self.all_n_window_nodes.add(tp_id)
+        self.n_window_changed.add(tp_id)
         self.n_window_depths.setdefault(n_depth, set()).add(tp_id)
 
         tproxy.namespace[:] = task_def.namespace
@@ -1770,12 +1977,7 @@ class DataStoreMgr:
     def window_resize_rewalk(self) -> None:
         """Re-create data-store n-window on resize."""
         # Gather pre-resize window nodes
-        if not self.all_n_window_nodes:
-            self.all_n_window_nodes = set().union(*(
-                v
-                for k, v in self.n_window_nodes.items()
-                if k in self.all_task_pool
-            ))
+        prev_n_window_nodes = set(self.all_n_window_nodes)
 
         # Clear window walks, and walk from scratch.
         self.prune_flagged_nodes.clear()
@@ -1791,11 +1993,7 @@ class DataStoreMgr:
             )
         # Flag difference between old and new window for pruning.
         self.prune_flagged_nodes.update(
-            self.all_n_window_nodes.difference(*(
-                v
-                for k, v in self.n_window_nodes.items()
-                if k in self.all_task_pool
-            ))
+            prev_n_window_nodes.difference(self.n_window_node_counts)
         )
         self.update_window_depths = True
 
@@ -1852,22 +2050,21 @@ class DataStoreMgr:
         if not self.prune_flagged_nodes:
             return
 
-        # Keep all nodes in the path of active tasks.
-        self.all_n_window_nodes = set().union(*(
-            v
-            for k, v in self.n_window_nodes.items()
-            if k in self.all_task_pool
-        ))
         # Gather all nodes in the paths of tasks flagged for pruning.
         out_paths_nodes = self.prune_flagged_nodes.union(*(
-            v
-            for k, v in self.n_window_nodes.items()
-            if k in self.prune_flagged_nodes
+            self.n_window_nodes[tp_id]
+            for tp_id in self.prune_flagged_nodes
+            if tp_id in self.n_window_nodes
         ))
         # Trim out any nodes in the runahead pool
         out_paths_nodes.difference(self.all_task_pool)
-        # Prune only nodes not in the paths of active nodes
-        node_ids = out_paths_nodes.difference(self.all_n_window_nodes)
+        # Prune only nodes not in the paths of active nodes (i.e. nodes with
+        # no n-window references).
+        node_ids = out_paths_nodes.difference(self.n_window_node_counts)
+        if node_ids:
+            # (nodes generated but never counted)
+            self.all_n_window_nodes.difference_update(node_ids)
+            self.n_window_changed.update(node_ids)
         # Absolute triggers may be present in task pool, so recheck.
         # Clear the rest.
         self.prune_flagged_nodes.intersection_update(self.all_task_pool)
@@ -2009,12 +2206,72 @@ class DataStoreMgr:
 
         """
         self.updated_state_families.clear()
+        self._update_family_task_totals()
         while self.state_update_families:
             self._family_ascent_point_update(
                 next(iter(self.state_update_families)))
         if self.updated_state_families:
             self.state_update_follow_on = True
 
+    def _update_family_task_totals(self):
+        """Update the family task totals for tasks changed in this batch.
+
+        Only task proxies which have been added, updated or pruned, or
+        which have moved in/out of the n-window, are visited.
+        """
+        window_empty = not self.all_n_window_nodes
+        tp_ids = set(self.added[TASK_PROXIES])
+        tp_ids.update(self.updated[TASK_PROXIES])
+        tp_ids.update(self.deltas[TASK_PROXIES].pruned)
+        if window_empty != self.family_totals_window_empty:
+            # an empty window does not filter tasks, visit them all
+            tp_ids.update(self.data[self.workflow_id][TASK_PROXIES])
+            tp_ids.update(self.family_task_contributions)
+            self.family_totals_window_empty = window_empty
+        else:
+            tp_ids.update(self.n_window_changed)
+        self.n_window_changed.clear()
+        for tp_id in tp_ids:
+            self._update_task_family_contribution(tp_id)
+
+    def _update_task_family_contribution(self, tp_id: str) -> None:
+        """Update the contribution of a task to its family task totals."""
+        all_nodes = self.all_n_window_nodes
+        tp_delta = self.updated[TASK_PROXIES].get(tp_id)
+        tp_node = self.added[TASK_PROXIES].get(
+            tp_id, self.data[self.workflow_id][TASK_PROXIES].get(tp_id))
+        contribution = None
+        fp_id: Optional[str] = None
+        if tp_node is not None and (not all_nodes or tp_id in all_nodes):
+            fp_id = tp_node.first_parent
+            tp_depth = tp_delta
+            if tp_depth is None or not tp_depth.HasField('graph_depth'):
+                tp_depth = tp_node
+            contribution = (
+                self.from_delta_or_node(tp_delta, tp_node, 'state'),
+                tuple(
+                    bool(self.from_delta_or_node(tp_delta, tp_node, flag))
+                    for flag in FamilyTaskTotals.FLAGS
+                ),
+                tp_depth.graph_depth,
+            )
+        prev = self.family_task_contributions.get(tp_id)
+        if prev == (fp_id, contribution):
+            return
+        if prev is not None:
+            prev_fp_id, prev_contribution = prev
+            totals = self.family_task_totals[prev_fp_id]
+            totals.update(prev_contribution, -1)
+            if not totals.n_tasks:
+                del self.family_task_totals[prev_fp_id]
+        if contribution is None or fp_id is None:
+            self.family_task_contributions.pop(tp_id, None)
+        else:
+            self.family_task_contributions[tp_id] = (fp_id, contribution)
+            self.family_task_totals.setdefault(
+                fp_id, FamilyTaskTotals()
+            ).update(contribution, 1)
+
     @staticmethod
     def from_delta_or_node(tp_delta, tp_node, label):
         """Get an item from task proxy delta if available, falling back to
@@ -2032,8 +2289,10 @@ class DataStoreMgr:
         first called with this function, which then adds it's first parent
         ancestor to the set of families flagged for update.
 
+        Child task states are taken from the (incrementally updated) family
+        task totals, rather than by visiting each child task.
+
         """
-        all_nodes = self.all_n_window_nodes
         fp_added = self.added[FAMILY_PROXIES]
         fp_data = self.data[self.workflow_id][FAMILY_PROXIES]
         if fp_id in fp_data:
@@ -2054,9 +2313,6 @@ class DataStoreMgr:
             self._family_ascent_point_update(child_fam_id)
         if fp_id in self.state_update_families:
             fp_updated = self.updated[FAMILY_PROXIES]
-            tp_data = self.data[self.workflow_id][TASK_PROXIES]
-            tp_updated = self.updated[TASK_PROXIES]
-            tp_added = self.added[TASK_PROXIES]
             # Count child family states, set is_held, is_queued, is_runahead
             state_counter = Counter({})
             is_held_total = 0
@@ -2075,44 +2331,23 @@ class DataStoreMgr:
                     state_counter += Counter(dict(child_node.state_totals))
                     if child_node.graph_depth < graph_depth:
                         graph_depth = child_node.graph_depth
-            # Gather all child task states
-            task_states = []
-            for tp_id in fam_node.child_tasks:
-                if all_nodes and tp_id not in all_nodes:
-                    continue
+            # Add the child task totals
+            totals = self.family_task_totals.get(fp_id)
+            if totals is not None:
+                (
+                    n_held, n_queued, n_runahead,
+                    n_retry, n_wallclock, n_xtriggered,
+                ) = totals.flags
+                is_held_total += n_held
+                is_queued_total += n_queued
+                is_runahead_total += n_runahead
+                is_retry = n_retry > 0
+                is_wallclock = n_wallclock > 0
+                is_xtriggered = n_xtriggered > 0
+                if totals.graph_depths:
+                    graph_depth = min(graph_depth, min(totals.graph_depths))
+                state_counter += totals.states
 
-                tp_delta = tp_updated.get(tp_id)
-                tp_node = tp_added.get(tp_id, tp_data.get(tp_id))
-
-                tp_state = self.from_delta_or_node(tp_delta, tp_node, 'state')
-                if tp_state:
-                    task_states.append(tp_state)
-
-                if self.from_delta_or_node(tp_delta, tp_node, 'is_held'):
-                    is_held_total += 1
-
-                if self.from_delta_or_node(tp_delta, tp_node, 'is_queued'):
-                    is_queued_total += 1
-
-                if self.from_delta_or_node(tp_delta, tp_node, 'is_runahead'):
-                    is_runahead_total += 1
-
-                if self.from_delta_or_node(tp_delta, tp_node, 'is_retry'):
-                    is_retry = True
-
-                if self.from_delta_or_node(tp_delta, tp_node, 'is_wallclock'):
-                    is_wallclock = True
-
-                if self.from_delta_or_node(tp_delta, tp_node, 'is_xtriggered'):
-                    is_xtriggered = True
-
-                tp_depth = tp_delta
-                if tp_depth is None or not tp_depth.HasField('graph_depth'):
-                    tp_depth = tp_node
-                if tp_depth.graph_depth < graph_depth:
-                    graph_depth = tp_depth.graph_depth
-
-            state_counter += Counter(task_states)
             # created delta data element
             fp_delta = PbFamilyProxy(
                 id=fp_id,
@@ -2777,9 +3012,17 @@ class DataStoreMgr:
     def apply_delta_batch(self):
         """Apply delta batch to local data-store."""
         data = self.data[self.workflow_id]
+        indexes = self.node_indexes[self.workflow_id]
+        applied = False
         for key, delta in self.deltas.items():
             if delta.ListFields():
                 apply_delta(key, delta, data)
+                if key in indexes:
+                    indexes[key].update(data[key], delta)
+                applied = True
+        if applied:
+            # (increment after applying, see get_serialised)
+            self.data_version += 1
 
     def apply_delta_checksum(self):
         """Construct checksum on deltas for export."""
@@ -2839,20 +3082,49 @@ class DataStoreMgr:
 
         return workflow_msg
 
+    def get_serialised(self, key: str, get_msg: Callable) -> bytes:
+        """Return a serialised data-store message, caching the result.
+
+        The message is only rebuilt and re-serialised if the data-store has
+        changed (i.e. deltas have been applied) since it was last requested.
+
+        Args:
+            key: Cache key for the message.
+            get_msg: Function returning the message.
+
+        """
+        # Note: this may be called from the server thread while deltas are
+        # being applied. The version is read before the message is built and
+        # incremented after deltas are applied, so a message built
+        # mid-application will be rebuilt at the next request.
+        data_version = self.data_version
+        cached = self.serialised_cache.get(key)
+        if cached is None or cached[0] != data_version:
+            cached = (data_version, get_msg().SerializeToString())
+            self.serialised_cache[key] = cached
+        return cached[1]
+
     def get_publish_deltas(self):
-        """Return deltas for publishing."""
-        all_deltas = DELTAS_MAP[ALL_DELTAS]()
+        """Return deltas for publishing.
+
+        Each delta is serialised once, the "all" deltas message is assembled
+        from the same serialised deltas.
+        """
+        all_deltas_fields = DELTAS_MAP[ALL_DELTAS].DESCRIPTOR.fields_by_name
+        all_deltas = []
         result = []
         for key, delta in self.deltas.items():
             if delta.ListFields():
-                result.append(
-                    (key.encode('utf-8'), delta, 'SerializeToString'))
-                getattr(all_deltas, key).CopyFrom(delta)
+                delta_bytes = delta.SerializeToString()
+                result.append((key.encode('utf-8'), delta_bytes, None))
+                all_deltas.append(
+                    embed_message(all_deltas_fields[key].number, delta_bytes)
+                )
         result.append(
-            (ALL_DELTAS.encode('utf-8'), all_deltas, 'SerializeToString')
+            (ALL_DELTAS.encode('utf-8'), b''.join(all_deltas), None)
         )
         self.publish_pending = True
-        return deepcopy(result)
+        return result
 
     def get_data_elements(self, element_type):
         """Get elements of a given type in the form of a delta.
@@ -15,12 +15,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import errno
+import fcntl
+from hashlib import sha256
 import json
 import os
+import re
 import sqlite3
+from stat import S_ISDIR
 import sys
 from contextlib import suppress
-from typing import Dict, Iterable, Optional, List, Union
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Callable, Dict, Iterable, Optional, List, Tuple, Union
 
 from cylc.flow.exceptions import InputError
 from cylc.flow.cycling.util import add_offset
@@ -50,6 +56,9 @@ output_fallback_msg = (
     "between 8.0.0-8.3.0. Falling back to filtering by task message instead."
 )
 
+# workflow DB query results shared between processes (see CylcWorkflowDBCache)
+DB_CACHE_DIR = os.path.expanduser('~/.cylc/workflow-db-cache')
+
 
 class CylcWorkflowDBChecker:
     """Object for querying task status or outputs from a workflow database.
@@ -69,10 +78,7 @@ class CylcWorkflowDBChecker:
     def __init__(self, rund, workflow, db_path=None):
         # (Explicit dp_path arg is to make testing easier).
         if db_path is None:
-            # Infer DB path from workflow name and run dir.
-            db_path = expand_path(
-                rund, workflow, "log", CylcWorkflowDAO.DB_FILE_BASE_NAME
-            )
+            db_path = self.get_db_path(rund, workflow)
         if not os.path.exists(db_path):
             raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), db_path)
 
@@ -92,6 +98,13 @@ class CylcWorkflowDBChecker:
                     self.conn.close()
                 raise exc from None  # original error
 
+    @staticmethod
+    def get_db_path(rund, workflow):
+        """Infer DB path from workflow name and run dir."""
+        return expand_path(
+            rund, workflow, "log", CylcWorkflowDAO.DB_FILE_BASE_NAME
+        )
+
     def __enter__(self):
         return self
 
@@ -272,42 +285,57 @@ class CylcWorkflowDBChecker:
 
         # Select from DB by name, cycle, status.
         # (Outputs and flow_nums are serialised).
+        # Note: GLOB (unlike LIKE) is case sensitive, so can use the indexes
+        # for patterns with a fixed prefix (e.g. "2000*").
         if task:
             if '*' in task:
-                # Replace Cylc ID wildcard with Sqlite query wildcard.
-                task = task.replace('*', '%')
-                stmt_wheres.append("name like ?")
+                stmt_wheres.append("name GLOB ?")
             else:
                 stmt_wheres.append("name==?")
             stmt_args.append(task)
 
         if cycle:
             if '*' in cycle:
-                # Replace Cylc ID wildcard with Sqlite query wildcard.
-                cycle = cycle.replace('*', '%')
-                stmt_wheres.append("cycle like ?")
+                stmt_wheres.append("cycle GLOB ?")
             else:
                 stmt_wheres.append("cycle==?")
             stmt_args.append(cycle)
 
-        if (
-            selector is not None
-            and target_table == CylcWorkflowDAO.TABLE_TASK_STATES
-        ):
-            # Can select by status in the DB but not outputs.
-            stmt_wheres.append("status==?")
-            stmt_args.append(selector)
+        output_wheres: List[str] = []
+        output_args: List[str] = []
+        if selector is not None:
+            if target_table == CylcWorkflowDAO.TABLE_TASK_STATES:
+                stmt_wheres.append("status==?")
+                stmt_args.append(selector)
+            else:
+                # Narrow down the outputs in the DB, the results are
+                # checked again below.
+                output_wheres, output_args = self._get_output_filter(
+                    selector, bool(is_trigger)
+                )
 
-        if stmt_wheres:
-            stmt += "WHERE\n    " + (" AND ").join(stmt_wheres)
+        def _execute(wheres, args):
+            query = stmt
+            if wheres:
+                query += "WHERE\n    " + (" AND ").join(wheres)
+            if target_table == CylcWorkflowDAO.TABLE_TASK_STATES:
+                # (outputs table doesn't record submit number)
+                query += "\nORDER BY submit_num"
+            return self.conn.execute(query, args).fetchall()
 
-        if target_table == CylcWorkflowDAO.TABLE_TASK_STATES:
-            # (outputs table doesn't record submit number)
-            stmt += r"ORDER BY submit_num"
+        try:
+            rows = _execute(
+                stmt_wheres + output_wheres, stmt_args + output_args
+            )
+        except sqlite3.OperationalError:
+            if not output_wheres:
+                raise
+            # SQLite JSON functions not available, filter in Python only
+            rows = _execute(stmt_wheres, stmt_args)
 
         # Query the DB and drop incompatible rows.
         db_res = []
-        for row in self.conn.execute(stmt, stmt_args):
+        for row in rows:
             # name, cycle, status_or_outputs, [flow_nums]
             res = list(row[:3])
             if row[2] is None:
@@ -347,6 +375,40 @@ class CylcWorkflowDBChecker:
 
         return results
 
+    @staticmethod
+    def _get_output_filter(
+        selector: str, is_trigger: bool
+    ) -> Tuple[List[str], List[str]]:
+        """Return SQL conditions matching task outputs to a selector.
+
+        These use the SQLite JSON functions on the serialised outputs.
+
+        Returns:
+            (where clauses, args)
+
+        Examples:
+            >>> this = CylcWorkflowDBChecker._get_output_filter
+            >>> this('x', is_trigger=False)[1]
+            ['x']
+            >>> this('finished', is_trigger=True)[1]
+            ['finished', 'succeeded', 'failed']
+
+        """
+        if not is_trigger:
+            where = "EXISTS (SELECT 1 FROM json_each(outputs) WHERE value==?)"
+            return [where], [selector]
+        triggers = [selector]
+        if selector in (TASK_OUTPUT_FINISHED, "finish"):
+            triggers.extend((TASK_OUTPUT_SUCCEEDED, TASK_OUTPUT_FAILED))
+        # Cylc 8 (pre-8.3.0) back-compat: outputs are a list of messages,
+        # leave these to the fallback in workflow_state_query
+        where = (
+            "(json_type(outputs)=='array'"
+            " OR EXISTS (SELECT 1 FROM json_each(outputs)"
+            f" WHERE key IN ({', '.join('?' * len(triggers))})))"
+        )
+        return [where], triggers
+
     @staticmethod
     def _selector_in_outputs(selector: str, outputs: Iterable[str]) -> bool:
         """Check if a selector, including "finished", is in the outputs.
@@ -371,6 +433,193 @@ class CylcWorkflowDBChecker:
         )
 
 
+class CylcWorkflowDBCache:
+    """Cache of workflow database query results.
+
+    The cache is kept in files so that it can be shared by processes, e.g. the
+    workflow_state xtriggers of all the workflows a user runs (on hosts which
+    share the cache directory). This means upstream databases get queried
+    once per distinct query rather than once per polling task. If the cache
+    cannot be used (e.g. file locks are not supported), the database is
+    queried directly.
+
+    Results are keyed by database and query, and are discarded when the
+    database changes. Processes making the same query at the same time wait
+    for the first one to get the result, rather than all querying the
+    database. Entries which have not been written for MAX_AGE are pruned
+    (at most once every PRUNE_INTERVAL).
+
+    Args:
+        cache_dir:
+            Directory to keep the cache in, by default DB_CACHE_DIR.
+
+    """
+
+    # SQLite database header "file change counter", this is incremented by
+    # each transaction in rollback journal mode (the public database).
+    CHANGE_COUNTER = slice(24, 28)
+
+    # remove cache files which have not been written for this long (seconds)
+    MAX_AGE = 86400
+    PRUNE_INTERVAL = 3600
+    # (the mtime of this file records when the cache was last pruned)
+    PRUNED_FILE = '.pruned'
+    # names of the files the cache is made of (only these are pruned):
+    # entries (hex digests), their lock files and entries being written
+    ENTRY_NAME = re.compile(r'[0-9a-f]{64}(\.lock)?')
+    TMP_PREFIX = 'tmp-'
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = DB_CACHE_DIR
+        self.cache_dir = cache_dir
+
+    @classmethod
+    def get_signature(cls, db_path: str) -> Optional[list]:
+        """Return a signature which changes when a database is written to.
+
+        Returns None if the database does not exist.
+
+        """
+        signature = []
+        for path in (db_path, f'{db_path}-wal'):
+            try:
+                with open(path, 'rb') as handle:
+                    stat = os.fstat(handle.fileno())
+                    header = handle.read(cls.CHANGE_COUNTER.stop)
+            except FileNotFoundError:
+                if path == db_path:
+                    return None
+                continue
+            signature.append([
+                stat.st_ino,
+                stat.st_size,
+                stat.st_mtime_ns,
+                header[cls.CHANGE_COUNTER].hex(),
+            ])
+        return signature
+
+    def _open_cache_dir(self) -> bool:
+        """Create the cache directory, return True if it is safe to use."""
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            # (not following a symlink someone else could have made)
+            stat = os.lstat(self.cache_dir)
+        except OSError:
+            return False
+        # (don't trust results anyone else could have written)
+        return (
+            S_ISDIR(stat.st_mode)
+            and stat.st_uid == os.getuid()
+            and not stat.st_mode & 0o022
+        )
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Remove cache files which have not been written for MAX_AGE.
+
+        Only files named like those the cache writes are removed. Lock files
+        are only removed along with their entries. (A process
+        holding a removed lock might then make the same query as another,
+        but it will not get a stale result.)
+        """
+        if now is None:
+            now = time()
+        cutoff = now - self.MAX_AGE
+        # {path: mtime}
+        paths: Dict[str, float] = {}
+        with suppress(OSError), os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if (
+                    self.ENTRY_NAME.fullmatch(entry.name)
+                    or entry.name.startswith(self.TMP_PREFIX)
+                ) and entry.is_file(follow_symlinks=False):
+                    with suppress(OSError):
+                        paths[entry.path] = entry.stat(
+                            follow_symlinks=False
+                        ).st_mtime
+        for path, mtime in paths.items():
+            if path.endswith('.lock'):
+                if path[:-len('.lock')] in paths or mtime >= cutoff:
+                    continue
+            elif mtime >= cutoff:
+                continue
+            with suppress(OSError):
+                os.unlink(path)
+                if f'{path}.lock' in paths:
+                    os.unlink(f'{path}.lock')
+
+    def _prune_if_due(self) -> None:
+        """Prune the cache if it has not been pruned for PRUNE_INTERVAL."""
+        pruned_file = os.path.join(self.cache_dir, self.PRUNED_FILE)
+        now = time()
+        try:
+            if os.stat(pruned_file).st_mtime > now - self.PRUNE_INTERVAL:
+                return
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        with suppress(OSError):
+            with open(pruned_file, 'a'):
+                os.utime(pruned_file, (now, now))
+            self.prune(now)
+
+    def get(self, db_path: str, key: Any, query: Callable[[], Any]) -> Any:
+        """Return the result of a database query, from the cache if possible.
+
+        Args:
+            db_path:
+                Path of the database.
+            key:
+                JSON serialisable representation of the query.
+            query:
+                Function which queries the database, its result must be
+                JSON serialisable.
+
+        """
+        if not self._open_cache_dir():
+            return query()
+        self._prune_if_due()
+        path = os.path.join(
+            self.cache_dir,
+            sha256(
+                json.dumps([os.path.realpath(db_path), key]).encode()
+            ).hexdigest(),
+        )
+        try:
+            lock = open(f'{path}.lock', 'a')  # noqa: SIM115
+        except OSError:
+            return query()
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            except OSError:
+                # e.g. locks not supported by a network file system
+                return query()
+            signature = self.get_signature(db_path)
+            with suppress(OSError, ValueError, KeyError):
+                with open(path) as handle:
+                    entry = json.load(handle)
+                if entry['signature'] == signature:
+                    return entry['result']
+                # the database has changed (or gone)
+                os.unlink(path)
+            result = query()
+            if signature is None:
+                return result
+            # (results are at least as new as the signature)
+            with suppress(OSError):
+                with NamedTemporaryFile(
+                    'w', dir=self.cache_dir, prefix=self.TMP_PREFIX,
+                    delete=False,
+                ) as tmp_file:
+                    json.dump(
+                        {'signature': signature, 'result': result}, tmp_file
+                    )
+                os.replace(tmp_file.name, path)
+            return result
+
+
 def check_polling_config(selector, is_trigger, is_message):
     """Check for invalid or unreliable polling configurations."""
     if selector and not (is_trigger or is_message):
@@ -63,11 +63,15 @@ Examples:
 
 import ast
 from collections import namedtuple
+from contextlib import suppress
+import fcntl
 from functools import lru_cache
 from io import BytesIO
 import json
+import os
 import random
-from time import sleep
+from tempfile import NamedTemporaryFile
+from time import time
 import token
 from tokenize import tokenize
 
@@ -101,6 +105,9 @@ RankingExpressionEvaluator = restricted_evaluator(
 
 GLBL_CFG_STR = 'global.cylc[scheduler][run hosts]ranking'
 
+# host metrics shared between host selections (see _get_cached_metrics)
+METRICS_CACHE_PATH = os.path.expanduser('~/.cylc/host-metrics.json')
+
 
 def select_workflow_host(cached=True):
     """Return a host as specified in `[workflow hosts]`.
@@ -146,7 +153,10 @@ def select_workflow_host(cached=True):
         ]),
         # list of condemned hosts
         blacklist=blacklist,
-        blacklist_name='condemned host'
+        blacklist_name='condemned host',
+        metrics_cache_timeout=global_config.get([
+            'scheduler', 'run hosts', 'metrics cache timeout'
+        ]),
     )
 
 
@@ -154,7 +164,8 @@ def select_host(
     hosts,
     ranking_string=None,
     blacklist=None,
-    blacklist_name=None
+    blacklist_name=None,
+    metrics_cache_timeout=None,
 ):
     """Select a host from the provided list.
 
@@ -189,6 +200,10 @@ def select_host(
         blacklist_name (str):
             The reason for blacklisting these hosts
             (used for exceptions).
+        metrics_cache_timeout (float):
+            If set (and not zero), share host metrics with other host
+            selections, reusing metrics up to this many seconds old (see
+            _get_cached_metrics).
 
     Raises:
         HostSelectException:
@@ -250,8 +265,17 @@ def select_host(
 
     # filter and sort by rankings
     metrics = list({x for x, _ in rankings})  # required metrics
-    results, data = _get_metrics(  # get data from each host
-        hosts, metrics, data)
+    start = time()
+    if not metrics_cache_timeout:
+        results, data = _get_metrics(  # get data from each host
+            hosts, metrics, data)
+    else:
+        results, data = _get_cached_metrics(
+            hosts, metrics, data, metrics_cache_timeout)
+    LOG.debug(
+        f'Host metrics for {len(hosts)} hosts retrieved in'
+        f' {time() - start:.2f}s'
+    )
     hosts = list(results)  # some hosts might not be contactable
 
     # stop here if we don't need to proceed
@@ -547,6 +571,7 @@ def _get_metrics(hosts, metrics, data=None):
         'stdin_str': json.dumps(metrics),
         'capture_process': True
     }
+    start = time()
     for host in hosts:
         if is_remote_host(host):
             try:
@@ -558,26 +583,112 @@ def _get_metrics(hosts, metrics, data=None):
             proc_map[host] = run_cmd(['cylc'] + cmd, **kwargs)
 
     # Collect results from commands
-    while proc_map:
-        for host, proc in list(proc_map.copy().items()):
-            if proc.poll() is None:
+    # (the commands run in parallel, so the total wait is for the slowest)
+    for host, proc in proc_map.items():
+        out, err = (stream.strip() for stream in proc.communicate())
+        if proc.returncode:
+            # Command failed
+            LOG.warning(
+                'Error evaluating ranking expression on'
+                f' {host}: \n{err}'
+            )
+        else:
+            host_stats[host] = dict(zip(
+                metrics,
+                # convert JSON dicts -> namedtuples
+                _deserialise(metrics, parse_dirty_json(out))
+            ))
+            LOG.debug(f'Got metrics from {host} in {time() - start:.2f}s')
+        data[host]['returncode'] = proc.returncode
+    return host_stats, data
+
+
+def _get_cached_metrics(hosts, metrics, data, timeout):
+    """Retrieve host metrics, reusing recent results of other selections.
+
+    Metrics are kept in a file (METRICS_CACHE_PATH) shared by all host
+    selections run by the user (e.g. concurrent "cylc play" commands). Only
+    one selection at a time may retrieve metrics, the others wait and then
+    use the metrics it retrieved.
+
+    Falls back to _get_metrics if the cache cannot be used.
+
+    Args:
+        hosts (list):
+            List of host fqdns.
+        metrics (list):
+            List in the form [(function, arg1, arg2, ...), ...]
+        data (dict):
+            Used for logging success/fail outcomes of the form {host: {}}
+        timeout (float):
+            Maximum age of cached metrics (seconds). Metrics retrieved while
+            waiting for another selection are used regardless.
+
+    Returns:
+        dict - {host: {(function, arg1, arg2, ...): result}}
+
+    """
+    start = time()
+    try:
+        os.makedirs(os.path.dirname(METRICS_CACHE_PATH), exist_ok=True)
+        lock = open(f'{METRICS_CACHE_PATH}.lock', 'a')  # noqa: SIM115
+    except OSError:
+        return _get_metrics(hosts, metrics, data)
+
+    with lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except OSError:
+            # e.g. locks not supported by a network file system
+            return _get_metrics(hosts, metrics, data)
+        cache = {}
+        with suppress(OSError, ValueError), open(METRICS_CACHE_PATH) as handle:
+            cache = json.load(handle)
+
+        host_stats = {}
+        keys = [json.dumps(metric) for metric in metrics]
+        for host in hosts:
+            try:
+                entry = cache[host]
+                if entry['time'] < min(start, time() - timeout):
+                    continue
+                values = [entry['metrics'][key] for key in keys]
+            except (KeyError, TypeError):
                 continue
-            del proc_map[host]
-            out, err = (stream.strip() for stream in proc.communicate())
-            if proc.wait():
-                # Command failed
-                LOG.warning(
-                    'Error evaluating ranking expression on'
-                    f' {host}: \n{err}'
-                )
-            else:
-                host_stats[host] = dict(zip(
-                    metrics,
-                    # convert JSON dicts -> namedtuples
-                    _deserialise(metrics, parse_dirty_json(out))
-                ))
-            data[host]['returncode'] = proc.returncode
-        sleep(0.01)
+            LOG.debug(f'Using cached metrics for {host}')
+            host_stats[host] = dict(zip(
+                metrics,
+                _deserialise(metrics, values)
+            ))
+            data[host]['returncode'] = 0
+
+        stale_hosts = [host for host in hosts if host not in host_stats]
+        if not stale_hosts:
+            return host_stats, data
+        new_stats, data = _get_metrics(stale_hosts, metrics, data)
+        host_stats.update(new_stats)
+
+        now = time()
+        for host, stats in new_stats.items():
+            cache[host] = {
+                'time': now,
+                'metrics': {
+                    json.dumps(metric): (
+                        # convert namedtuples -> JSON dicts
+                        value._asdict() if hasattr(value, '_asdict')
+                        else value
+                    )
+                    for metric, value in stats.items()
+                },
+            }
+        try:
+            with NamedTemporaryFile(
+                'w', dir=os.path.dirname(METRICS_CACHE_PATH), delete=False
+            ) as handle:
+                json.dump(cache, handle)
+            os.replace(handle.name, METRICS_CACHE_PATH)
+        except OSError as exc:
+            LOG.debug(f'Could not write host metrics cache: {exc}')
     return host_stats, data
 
 
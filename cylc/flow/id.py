@@ -563,6 +563,37 @@ def quick_relative_id(
         return f'{cycle}/{task}:{task_sel}'
 
 
+def quick_parse_job_id(job_id: str) -> Tuple[str, Optional[int]]:
+    """Return the relative task ID and submit number of a relative job ID.
+
+    This is a more efficient solution to `Tokens` for the job IDs of task
+    messages, which are nearly always of the form ``cycle/task/submit_num``.
+    Anything else is parsed by `Tokens`.
+
+    Example:
+        >>> quick_parse_job_id('1/a/01')
+        ('1/a', 1)
+
+        >>> quick_parse_job_id('1/a')
+        ('1/a', None)
+
+        >>> quick_parse_job_id('1/a:running/02')
+        ('1/a', 2)
+
+    """
+    parts = job_id.split('/')
+    if 2 <= len(parts) <= 3 and all(parts) and ':' not in job_id:
+        return (
+            f'{parts[0]}/{parts[1]}',
+            int(parts[2]) if len(parts) == 3 else None,
+        )
+    tokens = Tokens(job_id, relative=True)
+    return (
+        tokens.duplicate(job=None).relative_id,
+        int(tokens['job']) if tokens['job'] else None,
+    )
+
+
 def _dict_strip(dictionary):
     """Run str.strip against dictionary values.
 
@@ -0,0 +1,208 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Adaptive batching and concurrency limits for job poll/kill commands."""
+
+from collections import deque
+from time import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from cylc.flow.task_proxy import TaskProxy
+
+
+class JobCommandBatch:
+    """A job command (e.g. jobs-poll) for a batch of tasks on a platform."""
+
+    __slots__ = (
+        'cmd_key',
+        'platform',
+        'itasks',
+        'callback',
+        'callback_255',
+        'time_started',
+        'done',
+    )
+
+    def __init__(
+        self,
+        cmd_key: str,
+        platform: dict,
+        itasks: 'List[TaskProxy]',
+        callback: Callable,
+        callback_255: Callable,
+    ):
+        self.cmd_key = cmd_key
+        self.platform = platform
+        self.itasks = itasks
+        self.callback = callback
+        self.callback_255 = callback_255
+        self.time_started: Optional[float] = None
+        self.done = False
+
+
+class JobCommandBatcher:
+    """Split job commands into batches and limit how many run at once.
+
+    Commands are batched per command and platform. The batch size adapts to
+    how long the commands take: it halves if a command takes longer than
+    TARGET_DURATION, and doubles if a full batch takes less than half of
+    that. This covers both the connection to the platform and the job
+    runner query.
+
+    Each platform may only run so many of each command at once (its "max
+    concurrent job commands"), so the process pool is left free for other
+    commands. Batches wait in a queue for each command until they can start,
+    so kills are not held up behind a backlog of polls (and they are started
+    first). Tasks that are already waiting for the same command are not
+    queued again.
+    """
+
+    # command duration to aim for (seconds)
+    TARGET_DURATION = 30.0
+
+    INITIAL_BATCH_SIZE = 100
+    MIN_BATCH_SIZE = 10
+    MAX_BATCH_SIZE = 1000
+
+    # commands to start before others, e.g. kills before polls
+    PRIORITY_CMD_KEYS = ('jobs-kill',)
+
+    def __init__(self):
+        # {(cmd_key, platform_name): batch_size}
+        self.batch_sizes: Dict[Tuple[str, str], int] = {}
+        # {(cmd_key, platform_name): number of commands running}
+        self.running: Dict[Tuple[str, str], int] = {}
+        # {(cmd_key, platform_name): batches waiting to start}
+        self.waiting: Dict[Tuple[str, str], Deque[JobCommandBatch]] = {}
+        # {(cmd_key, task_id, submit_num)} for tasks in waiting batches
+        self._waiting_jobs: Set[Tuple[str, str, int]] = set()
+
+    def get_batch_size(self, cmd_key: str, platform_name: str) -> int:
+        """Return the current batch size for a command on a platform."""
+        return self.batch_sizes.get(
+            (cmd_key, platform_name), self.INITIAL_BATCH_SIZE
+        )
+
+    def put(
+        self,
+        cmd_key: str,
+        platform: dict,
+        itasks: 'List[TaskProxy]',
+        callback: Callable,
+        callback_255: Callable,
+    ) -> int:
+        """Queue a command for tasks on a platform, in batches.
+
+        Returns:
+            The number of batches queued.
+
+        """
+        itasks = [
+            itask
+            for itask in itasks
+            if self._job_key(cmd_key, itask) not in self._waiting_jobs
+        ]
+        self._waiting_jobs.update(
+            self._job_key(cmd_key, itask) for itask in itasks
+        )
+        size = self.get_batch_size(cmd_key, platform['name'])
+        batches = [
+            JobCommandBatch(
+                cmd_key, platform, itasks[i:i + size], callback, callback_255
+            )
+            for i in range(0, len(itasks), size)
+        ]
+        self.waiting.setdefault(
+            (cmd_key, platform['name']), deque()
+        ).extend(batches)
+        return len(batches)
+
+    def get(self, platform_name: str, limit: int) -> List[JobCommandBatch]:
+        """Return waiting batches which can start now.
+
+        The batches are counted as running until passed to done().
+
+        Args:
+            platform_name: The platform to get batches for.
+            limit: The maximum number of each command to run at once on this
+                platform (zero for no limit).
+
+        """
+        ret: List[JobCommandBatch] = []
+        for key in sorted(
+            (key for key in self.waiting if key[1] == platform_name),
+            key=lambda key: (key[0] not in self.PRIORITY_CMD_KEYS, key),
+        ):
+            waiting = self.waiting[key]
+            while waiting and (
+                not limit or self.running.get(key, 0) < limit
+            ):
+                batch = waiting.popleft()
+                self._waiting_jobs.difference_update(
+                    self._job_key(batch.cmd_key, itask)
+                    for itask in batch.itasks
+                )
+                batch.time_started = time()
+                self.running[key] = self.running.get(key, 0) + 1
+                ret.append(batch)
+            if not waiting:
+                del self.waiting[key]
+        return ret
+
+    def done(
+        self,
+        batch: JobCommandBatch,
+        duration: Optional[float] = None,
+    ) -> None:
+        """Record that a batch has finished running.
+
+        Args:
+            batch: The batch.
+            duration: How long the command took (seconds), or None if it
+                should not be used to adjust the batch size (e.g. if the
+                platform could not be contacted).
+
+        """
+        if batch.done:
+            return
+        batch.done = True
+        key = (batch.cmd_key, batch.platform['name'])
+        self.running[key] -= 1
+        if duration is None:
+            return
+        size = self.get_batch_size(*key)
+        if duration > self.TARGET_DURATION:
+            size = max(self.MIN_BATCH_SIZE, size // 2)
+        elif (
+            len(batch.itasks) >= size
+            and duration < self.TARGET_DURATION / 2
+        ):
+            size = min(self.MAX_BATCH_SIZE, size * 2)
+        self.batch_sizes[key] = size
+
+    @staticmethod
+    def _job_key(cmd_key: str, itask: 'TaskProxy') -> Tuple[str, str, int]:
+        return (cmd_key, itask.identity, itask.submit_num)
@@ -216,6 +216,10 @@ class JobFileWriter:
 
         handle.write("\n\n    # CYLC TASK ENVIRONMENT:")
         handle.write(f"\n    export CYLC_TASK_COMMS_METHOD={comm_meth}")
+        message_relay = job_conf['platform'].get('message relay')
+        if message_relay:
+            handle.write(
+                '\n    export CYLC_MESSAGE_RELAY="%s"' % message_relay)
         handle.write('\n    export CYLC_TASK_JOB="%s"' % job_conf['job_d'])
         handle.write(
             '\n    export CYLC_TASK_NAMESPACE_HIERARCHY="%s"' %
@@ -0,0 +1,219 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Relay task messages from jobs to schedulers in batches.
+
+Each "cylc message" is a new process which must connect to the scheduler
+(including the CurveZMQ handshake) to send the messages of one job. On hosts
+which run many short jobs, this can add up to a lot of work for the
+scheduler.
+
+A message relay is a long running process on the job host which
+"cylc message" hands its messages to over a local (Unix domain) socket. The
+relay sends the messages it has received for each workflow to the scheduler
+together, in a single request.
+
+Delivery is "at least once": messages are written to the job status file
+before they are handed to the relay, so messages the relay is unable to
+deliver are picked up when the scheduler polls the job.
+"""
+
+import asyncio
+from contextlib import suppress
+import json
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from cylc.flow import LOG
+from cylc.flow.exceptions import RequestError, WorkflowStopped
+from cylc.flow.network.client_factory import get_client
+from cylc.flow.task_message import MUTATION, RELAY_OK
+
+if TYPE_CHECKING:
+    from cylc.flow.network.client import WorkflowRuntimeClientBase
+
+
+class MessageRelay:
+    """Receive task messages on a socket and send them on in batches.
+
+    Messages are queued by workflow. The queues are sent to their schedulers
+    every "interval" seconds, or sooner if one fills up to the maximum batch
+    size. If a batch cannot be sent it is retried at the next interval, up to
+    "max attempts" times, after which it is dropped (the scheduler will get
+    the messages from the job status files).
+
+    Args:
+        socket_path: Path of the socket to listen on.
+        interval: Maximum time to hold messages for (seconds).
+        max_batch_size: Maximum number of jobs to send messages for at once.
+        max_attempts: Number of times to try sending a batch.
+        timeout: Scheduler communication timeout (seconds).
+
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        interval: float = 1.0,
+        max_batch_size: int = 1000,
+        max_attempts: int = 3,
+        timeout: Optional[float] = None,
+    ):
+        self.socket_path = socket_path
+        self.interval = interval
+        self.max_batch_size = max_batch_size
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        # {workflow: [[job_id, event_time, messages], ...]}
+        self.queues: Dict[str, List[list]] = {}
+        # {workflow: number of failed attempts to send its queue}
+        self.attempts: Dict[str, int] = {}
+        # {workflow: client}
+        self.clients: Dict[str, 'WorkflowRuntimeClientBase'] = {}
+        # set when a queue is full
+        self.batch_ready: Optional[asyncio.Event] = None
+
+    async def run(self) -> None:
+        """Listen for messages and relay them until cancelled."""
+        self.batch_ready = asyncio.Event()
+        # (only the owner may connect)
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self.handle, path=self.socket_path
+            )
+        finally:
+            os.umask(umask)
+        LOG.info(f'Message relay listening on {self.socket_path}')
+        try:
+            while True:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self.batch_ready.wait(), self.interval
+                    )
+                self.batch_ready.clear()
+                await self.flush()
+        finally:
+            server.close()
+            await server.wait_closed()
+            with suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+            # last chance to send any queued messages
+            self.max_attempts = 1
+            await self.flush()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Receive messages from a "cylc message" client."""
+        try:
+            request = json.loads(await reader.readline())
+            self.put(
+                request['workflow'],
+                request['job_id'],
+                request['event_time'],
+                request['messages'],
+            )
+        except (ValueError, KeyError, TypeError) as exc:
+            LOG.warning(f'Invalid message relay request: {exc}')
+            writer.write(b'error\n')
+        else:
+            writer.write(f'{RELAY_OK}\n'.encode())
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def put(
+        self,
+        workflow: str,
+        job_id: str,
+        event_time: str,
+        messages: List[list],
+    ) -> None:
+        """Queue a job's messages to send to the workflow."""
+        queue = self.queues.setdefault(workflow, [])
+        queue.append([job_id, event_time, messages])
+        if len(queue) >= self.max_batch_size and self.batch_ready:
+            self.batch_ready.set()
+
+    async def flush(self) -> None:
+        """Send the queued messages, one batch per workflow at a time."""
+        await asyncio.gather(
+            *(self.send(workflow) for workflow in list(self.queues))
+        )
+
+    async def send(self, workflow: str) -> None:
+        """Send the queued messages of a workflow to its scheduler."""
+        queue = self.queues.pop(workflow, [])
+        while queue:
+            batch = queue[:self.max_batch_size]
+            try:
+                await self._send(workflow, batch)
+            except WorkflowStopped:
+                self.clients.pop(workflow, None)
+                LOG.warning(
+                    f'{workflow}: workflow stopped, dropping messages'
+                    f' for {len(queue)} jobs'
+                )
+                break
+            except Exception as exc:
+                # (get a new client next time in case the scheduler moved)
+                self.clients.pop(workflow, None)
+                attempts = self.attempts.get(workflow, 0) + 1
+                if attempts < self.max_attempts:
+                    LOG.warning(
+                        f'{workflow}: failed to send messages'
+                        f' (attempt {attempts}): {type(exc).__name__}: {exc}'
+                    )
+                    self.attempts[workflow] = attempts
+                    self.queues[workflow] = (
+                        queue + self.queues.get(workflow, [])
+                    )
+                    return
+                LOG.error(
+                    f'{workflow}: failed to send messages, dropping messages'
+                    f' for {len(queue)} jobs: {type(exc).__name__}: {exc}'
+                )
+                break
+            self.attempts.pop(workflow, None)
+            queue = queue[self.max_batch_size:]
+        self.attempts.pop(workflow, None)
+
+    async def _send(self, workflow: str, batch: List[list]) -> None:
+        try:
+            client = self.clients[workflow]
+        except KeyError:
+            client = get_client(workflow, timeout=self.timeout)
+            self.clients[workflow] = client
+        try:
+            await client.async_request('put_messages', {'messages': batch})
+        except RequestError as exc:
+            if not str(exc).startswith('No method by the name'):
+                raise
+            # older scheduler, send the messages of each job separately
+            for job_id, event_time, messages in batch:
+                await client.async_request(
+                    'graphql',
+                    {
+                        'request_string': MUTATION,
+                        'variables': {
+                            'wFlows': [workflow],
+                            'taskJob': job_id,
+                            'eventTime': event_time,
+                            'messages': messages,
+                        },
+                    },
+                )
@@ -22,14 +22,16 @@ from contextlib import suppress
 from fnmatch import fnmatchcase
 import logging
 import queue
-from time import time
+from time import perf_counter, time
 from typing import (
     Any,
     AsyncGenerator,
+    Callable,
     Dict,
     List,
     NamedTuple,
     Optional,
+    Set,
     Tuple,
     TYPE_CHECKING,
     Union,
@@ -60,7 +62,8 @@ from cylc.flow.util import uniq, iter_uniq
 if TYPE_CHECKING:
     from uuid import UUID
     from graphql import ResolveInfo
-    from cylc.flow.data_store_mgr import DataStoreMgr
+    from cylc.flow.data_store_mgr import DataStoreMgr, NodeIndex
+    from cylc.flow.profiler import MainLoopTimings
     from cylc.flow.scheduler import Scheduler
 
     DeltaQueue = queue.Queue[Tuple[str, str, dict]]
@@ -68,7 +71,7 @@ if TYPE_CHECKING:
 
 class TaskMsg(NamedTuple):
     """Tuple for Scheduler.message_queue"""
-    job_id: Union[Tokens, str]
+    job_id: str
     event_time: str
     severity: Union[str, int]
     message: str
@@ -270,6 +273,58 @@ def node_filter(node, node_type, args, state):
     )
 
 
+def is_glob(pattern: str) -> bool:
+    """Return True if a pattern contains glob characters.
+
+    Examples:
+        >>> is_glob('foo')
+        False
+        >>> is_glob('f*') and is_glob('f?o') and is_glob('[fg]oo')
+        True
+
+    """
+    return any(char in pattern for char in '*?[')
+
+
+def get_indexed_node_ids(index: 'NodeIndex', args) -> Optional[Set[str]]:
+    """Return the IDs of the nodes which could match the filter arguments.
+
+    Narrows down the nodes using the data-store index, by the "states"
+    argument and by any exact (not globbed) cycle points and namespace
+    names in the "ids" argument. The nodes must still be filtered
+    (see node_filter).
+
+    Returns:
+        The node IDs, or None if the arguments cannot be narrowed down
+        (i.e. all nodes need filtering).
+
+    """
+    n_ids: Optional[Set[str]] = None
+    if args.get('states'):
+        n_ids = index.get('state', args['states'])
+    if args.get('ids'):
+        id_matches: Set[str] = set()
+        for item in iter_uniq(args['ids']):
+            if item.is_null:
+                # matches nothing (see node_ids_filter)
+                continue
+            item_matches: Optional[Set[str]] = None
+            for attr, token in (('cycle_point', 'cycle'), ('name', 'task')):
+                value = item[token]
+                if value and not is_glob(value):
+                    matches = index.get(attr, [value])
+                    if item_matches is not None:
+                        matches &= item_matches
+                    item_matches = matches
+            if item_matches is None:
+                # the item could match any node
+                break
+            id_matches |= item_matches
+        else:
+            n_ids = id_matches if n_ids is None else n_ids & id_matches
+    return n_ids
+
+
 def get_flow_data_from_ids(data_store, native_ids):
     """Return workflow data by id."""
     w_ids = []
@@ -284,6 +339,25 @@ def get_flow_data_from_ids(data_store, native_ids):
     ]
 
 
+def freeze_args(value: Any) -> Any:
+    """Return a hashable equivalent of resolver arguments.
+
+    Examples:
+        >>> freeze_args({'b': [1, {'c': None}], 'a': 'x'})
+        (('a', 'x'), ('b', (1, (('c', None),))))
+
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (key, freeze_args(val)) for key, val in value.items()
+        ))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_args(val) for val in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze_args(val) for val in value)
+    return value
+
+
 def get_data_elements(flow, nat_ids, element_type):
     """Return data elements by id."""
     flow_element = flow[element_type]
@@ -305,6 +379,12 @@ class BaseResolvers(metaclass=ABCMeta):  # noqa: SIM119
         # Used to serialised deltas from a single workflow, needed for
         # the management of a common data object.
         self.delta_processing_flows: Dict['UUID', set] = {}
+        # Filtered views of delta-stores, shared by subscriptions with the
+        # same arguments (see get_delta_projection),
+        # {(resolver, node_type, args, delta-store ids): (delta-stores, view)}
+        self.delta_projections: Dict[tuple, Tuple[List[dict], Any]] = {}
+        # Records the cost of subscription fan-out, if set.
+        self.timings: Optional['MainLoopTimings'] = None
 
     # Query resolvers
     async def get_workflow_by_id(self, args):
@@ -363,7 +443,7 @@ class BaseResolvers(metaclass=ABCMeta):  # noqa: SIM119
             [
                 node
                 for flow in await self.get_workflows_data(args)
-                for node in flow[node_type].values()
+                for node in self.get_candidate_nodes(flow, node_type, args)
                 if node_filter(
                     node,
                     node_type,
@@ -374,8 +454,99 @@ class BaseResolvers(metaclass=ABCMeta):  # noqa: SIM119
             args,
         )
 
+    def get_candidate_nodes(self, flow, node_type, args):
+        """Return the nodes of a workflow which could match the args.
+
+        Uses the data-store indexes, where available, to avoid visiting
+        every node. Nodes found this way are returned in ID order.
+        """
+        nodes = flow[node_type]
+        if 'sub_id' in args and args['delta_store']:
+            return nodes.values()
+        try:
+            index = self.data_store_mgr.node_indexes[flow[WORKFLOW].id][
+                node_type]
+        except (AttributeError, KeyError):
+            # data-store or node type not indexed (e.g. UI Server)
+            return nodes.values()
+        n_ids = get_indexed_node_ids(index, args)
+        if n_ids is None:
+            return nodes.values()
+        return [nodes[n_id] for n_id in sorted(n_ids) if n_id in nodes]
+
+    def get_delta_projection(
+        self,
+        resolver: str,
+        node_type: Optional[str],
+        args: Dict[str, Any],
+        project: Callable[[Optional[str], Dict[str, Any]], Any],
+    ) -> Any:
+        """Return a filtered view of a subscription's delta-store.
+
+        Subscriptions with the same arguments (e.g. many UI clients watching
+        the same workflow) are sent the same delta-stores, so share the
+        filtered and sorted view of each, rather than each building its own.
+        The views are dropped once no subscription holds the delta-stores
+        (see prune_delta_projections).
+
+        Args:
+            resolver: Name of the resolver, for the cache key.
+            node_type: The node type argument of the resolver.
+            args: The resolver arguments.
+            project: Builds the view, called with (node_type, args).
+
+        """
+        delta_stores = self.delta_store[args['sub_id']]
+        key = (
+            resolver,
+            node_type,
+            freeze_args({
+                arg: value for arg, value in args.items() if arg != 'sub_id'
+            }),
+            tuple(
+                (w_id, id(delta_store))
+                for w_id, delta_store in sorted(delta_stores.items())
+            ),
+        )
+        start = perf_counter()
+        try:
+            projection = self.delta_projections[key][1]
+            phase = 'subscription_projection_shared'
+        except KeyError:
+            projection = project(node_type, args)
+            # (hold the delta-stores so their IDs in the key can't be reused)
+            self.delta_projections[key] = (
+                list(delta_stores.values()), projection
+            )
+            phase = 'subscription_projection'
+        if self.timings is not None:
+            self.timings.record(phase, perf_counter() - start)
+        return projection
+
+    def prune_delta_projections(self) -> None:
+        """Drop views of delta-stores which no subscription holds."""
+        if not self.delta_projections:
+            return
+        held = {
+            id(delta_store)
+            for delta_stores in self.delta_store.values()
+            for delta_store in delta_stores.values()
+        }
+        for key, (delta_stores, _) in list(self.delta_projections.items()):
+            if any(
+                id(delta_store) not in held for delta_store in delta_stores
+            ):
+                del self.delta_projections[key]
+
     async def get_nodes_by_ids(self, node_type, args):
         """Return protobuf node objects for given id."""
+        if 'sub_id' in args and args['delta_store']:
+            return self.get_delta_projection(
+                'nodes', node_type, args, self._get_nodes_by_ids
+            )
+        return self._get_nodes_by_ids(node_type, args)
+
+    def _get_nodes_by_ids(self, node_type, args):
         nat_ids = uniq(args.get('native_ids', []))
         # Both cases just as common so 'if' not 'try'
         if 'sub_id' in args and args['delta_store']:
@@ -438,6 +609,13 @@ class BaseResolvers(metaclass=ABCMeta):  # noqa: SIM119
 
     async def get_edges_by_ids(self, args):
         """Return protobuf edge objects for given id."""
+        if 'sub_id' in args and args['delta_store']:
+            return self.get_delta_projection(
+                'edges', None, args, self._get_edges_by_ids
+            )
+        return self._get_edges_by_ids(None, args)
+
+    def _get_edges_by_ids(self, _node_type, args):
         nat_ids = uniq(args.get('native_ids', []))
         if 'sub_id' in args and args['delta_store']:
             flow_data = [
@@ -606,6 +784,7 @@ class BaseResolvers(metaclass=ABCMeta):  # noqa: SIM119
                     delta_processing_flows.add(w_id)
                     op_queue.put((sub_id, w_id))
                     self.delta_store[sub_id][w_id] = delta_store
+                    self.prune_delta_projections()
                     if sub_resolver is None:
                         yield delta_store
                     else:
@@ -627,6 +806,7 @@ class BaseResolvers(metaclass=ABCMeta):  # noqa: SIM119
                     del delta_queues[w_id][sub_id]
             if sub_id in self.delta_store:
                 del self.delta_store[sub_id]
+            self.prune_delta_projections()
             yield None
 
     async def flow_delta_processed(self, context, op_id):
@@ -655,6 +835,7 @@ class Resolvers(BaseResolvers):
     def __init__(self, data: 'DataStoreMgr', schd: 'Scheduler') -> None:
         super().__init__(data)
         self.schd = schd
+        self.timings = schd.main_loop_timings
 
     # Mutations
     async def mutator(
@@ -738,6 +919,7 @@ class Resolvers(BaseResolvers):
                 cmd,
             )
         )
+        self.schd.wake_main_loop()
         return (True, cmd_uuid)
 
     def broadcast(
@@ -796,6 +978,7 @@ class Resolvers(BaseResolvers):
 
         """
         self.schd.ext_trigger_queue.put((message, id))
+        self.schd.wake_main_loop()
         return (True, 'Event queued')
 
     def put_messages(
@@ -825,8 +1008,16 @@ class Resolvers(BaseResolvers):
             self.schd.message_queue.put(
                 TaskMsg(task_job, event_time, severity, message)
             )
+        self.schd.wake_main_loop()
         return (True, f'Messages queued: {len(messages)}')
 
+    def get_main_loop_timings(self) -> Optional[Dict[str, dict]]:
+        """Return main loop phase timings."""
+        timings = getattr(self.schd, 'main_loop_timings', None)
+        if timings is None:
+            return None
+        return timings.summary()
+
     def set_graph_window_extent(
         self, n_edge_distance: int
     ) -> Tuple[bool, str]:
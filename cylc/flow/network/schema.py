@@ -545,6 +545,18 @@ def resolve_state_tasks(root, info, **args):
         if state in data}
 
 
+def resolve_main_loop_timings(root, info: 'ResolveInfo', **args):
+    """Resolve main loop phase timings from the scheduler.
+
+    These are not held in the data store so are not available from other
+    GraphQL endpoints (e.g. the UI Server).
+    """
+    get_timings = getattr(get_resolvers(info), 'get_main_loop_timings', None)
+    if get_timings is None:
+        return None
+    return get_timings()
+
+
 async def resolve_broadcasts(root, info: 'ResolveInfo', **args):
     """Resolve and parse broadcasts from JSON."""
     broadcasts = json.loads(
@@ -822,6 +834,19 @@ class Workflow(ObjectType):
         resolver=resolve_broadcasts,
         description='Any active workflow broadcasts.'
     )
+    main_loop_timings = GenericScalar(
+        resolver=resolve_main_loop_timings,
+        description=sstrip('''
+            Durations of the phases of recent scheduler main loop
+            iterations (seconds) as a JSON object.
+
+            For each phase this includes the number of iterations and total
+            time since the scheduler started, along with statistics and a
+            histogram of the most recent durations.
+
+            Only available from the scheduler.
+        '''),
+    )
     pruned = Boolean()  # TODO: what is this? write description
     n_edge_distance = Int(
         description=sstrip('''
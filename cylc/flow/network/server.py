@@ -16,6 +16,7 @@
 """Server for workflow runtime API."""
 
 import asyncio
+from functools import partial
 from queue import Queue
 from textwrap import dedent
 from time import sleep
@@ -423,6 +424,34 @@ class WorkflowRuntimeServer:
             raise Exception(*executed.errors)
         return executed.data
 
+    @expose
+    def put_messages(
+        self,
+        messages: List[list],
+        meta: Optional[Dict[str, Any]] = None,
+        **_kwargs
+    ) -> str:
+        """Queue task messages from many jobs at once.
+
+        Used by message relays to send the messages of many jobs in a single
+        request rather than one ``message`` mutation per job.
+
+        Args:
+            messages: List in the format
+                ``[[job_id, event_time, [[severity, message], ...]], ...]``.
+            meta: Dict containing auth user etc.
+
+        Returns:
+            Information about outcome.
+
+        """
+        user = (meta or {}).get('auth_user', self.schd.owner)
+        if user != self.schd.owner:
+            LOG.info(f'Command "put_messages" received from {user}.')
+        for job_id, event_time, job_messages in messages:
+            self.resolvers.put_messages(job_id, event_time, job_messages)
+        return f'Messages queued for {len(messages)} jobs'
+
     # UIServer Data Commands
     @expose
     def pb_entire_workflow(self, **_kwargs) -> bytes:
@@ -431,8 +460,9 @@ class WorkflowRuntimeServer:
         Returns serialised Protobuf message
 
         """
-        pb_msg = self.schd.data_store_mgr.get_entire_workflow()
-        return pb_msg.SerializeToString()
+        data_store_mgr = self.schd.data_store_mgr
+        return data_store_mgr.get_serialised(
+            'entire_workflow', data_store_mgr.get_entire_workflow)
 
     @expose
     def pb_data_elements(self, element_type: str, **_kwargs) -> bytes:
@@ -444,5 +474,11 @@ class WorkflowRuntimeServer:
         Returns serialised Protobuf message
 
         """
-        pb_msg = self.schd.data_store_mgr.get_data_elements(element_type)
-        return pb_msg.SerializeToString()
+        data_store_mgr = self.schd.data_store_mgr
+        if element_type not in DELTAS_MAP:
+            return data_store_mgr.get_data_elements(
+                element_type).SerializeToString()
+        return data_store_mgr.get_serialised(
+            f'elements:{element_type}',
+            partial(data_store_mgr.get_data_elements, element_type)
+        )
@@ -21,7 +21,7 @@ import re
 from copy import deepcopy
 from typing import (
     TYPE_CHECKING, Any, Dict, Iterable,
-    List, Optional, Set, Union, overload
+    List, Optional, Set, Tuple, Union, overload
 )
 
 from cylc.flow import LOG
@@ -174,6 +174,28 @@ def get_platform(
     )
 
 
+# The default platform, shared by task proxies until job submission
+# (see get_default_platform):
+# (global config it was loaded from, platform)
+_DEFAULT_PLATFORM: Optional[Tuple[Any, Dict[str, Any]]] = None
+
+
+def get_default_platform() -> Dict[str, Any]:
+    """Return the default (localhost) platform.
+
+    Unlike get_platform(), this returns the same object each time (until the
+    global config is reloaded), so that task proxies can share it until their
+    platform is selected at job submission. It must not be modified.
+    """
+    global _DEFAULT_PLATFORM
+    cfg = glbl_cfg()
+    if _DEFAULT_PLATFORM is None or _DEFAULT_PLATFORM[0] is not cfg:
+        _DEFAULT_PLATFORM = (
+            cfg, platform_from_name(platforms=cfg.get(['platforms']))
+        )
+    return _DEFAULT_PLATFORM[1]
+
+
 def platform_from_name(
     platform_name: Optional[str] = None,
     platforms: Optional[Dict[str, Dict[str, Any]]] = None,
@@ -16,16 +16,19 @@
 
 """Functionality for expressing and evaluating logical triggers."""
 
-import re
 from typing import (
     TYPE_CHECKING,
+    Any,
+    Callable,
     Dict,
     ItemsView,
     Iterable,
     Iterator,
     KeysView,
+    List,
     NamedTuple,
     Optional,
+    Sequence,
     Tuple,
     Union,
 )
@@ -39,6 +42,7 @@ from cylc.flow.cycling.loader import get_point
 from cylc.flow.data_messages_pb2 import PbCondition, PbPrerequisite
 from cylc.flow.exceptions import TriggerExpressionError
 from cylc.flow.id import quick_relative_id
+from cylc.flow.listify import listify
 from cylc.flow.run_modes import RunMode
 
 
@@ -81,6 +85,138 @@ SatisfiedState = Literal[
 ]
 
 
+class ConditionalExpression:
+    """A compiled conditional (i.e. containing OR) prerequisite expression.
+
+    The expression is compiled into a tree of nested tuples of the form
+    ``(operator, operand, operand, ...)`` where the operator is ``&`` or
+    ``|`` and each operand is either a nested tuple or the index of a
+    dependency (task output) in the prerequisite. As with the Python
+    operators, ``&`` binds more tightly than ``|``.
+
+    Compiled expressions contain no task IDs or cycle points so can be
+    shared between Prerequisite instances of the same graph dependency.
+
+    Examples:
+        >>> expr = ConditionalExpression.from_list(
+        ...     ['a', '&', ['b', '|', 'c'], '|', 'd'], 'abcd'.index
+        ... )
+        >>> expr.tree
+        ('|', ('&', 0, ('|', 1, 2)), 3)
+        >>> expr.evaluate([True, False, True, False])
+        True
+        >>> expr.evaluate([True, False, False, False])
+        False
+        >>> expr.render(['1/a x', '1/b x', '1/c x', '1/d x'])
+        '1/a x&(1/b x|1/c x)|1/d x'
+
+    """
+
+    __slots__ = ('tree', 'template')
+
+    def __init__(self, tree: Union[int, tuple], template: str):
+        self.tree = tree
+        # Format string to render the expression from its operands.
+        self.template = template
+
+    @classmethod
+    def from_list(
+        cls,
+        nested_expr: List[Any],
+        index_of: Callable[[Any], int],
+    ) -> 'ConditionalExpression':
+        """Compile a nested list expression (see cylc.flow.listify).
+
+        Args:
+            nested_expr:
+                The expression as a nested list of operands and operators.
+            index_of:
+                Return the dependency index of an operand.
+
+        Raises:
+            ValueError: If an operand is not a known dependency or the
+                expression is malformed.
+
+        """
+        return cls(
+            cls._compile(nested_expr, index_of),
+            cls._template(nested_expr, index_of),
+        )
+
+    @classmethod
+    def _compile(
+        cls, nested_expr: List[Any], index_of: Callable[[Any], int]
+    ) -> Union[int, tuple]:
+        or_terms: List[Union[int, tuple]] = []
+        and_terms: List[Union[int, tuple]] = []
+        expect_operand = True
+        for item in nested_expr:
+            if expect_operand:
+                if isinstance(item, list):
+                    and_terms.append(cls._compile(item, index_of))
+                elif item in {'&', '|'}:
+                    raise ValueError(f'unexpected operator "{item}"')
+                else:
+                    and_terms.append(index_of(item))
+            elif item == '|':
+                or_terms.append(cls._group('&', and_terms))
+                and_terms = []
+            elif item != '&':
+                raise ValueError(f'expected operator, got "{item}"')
+            expect_operand = not expect_operand
+        if expect_operand:
+            raise ValueError('missing operand')
+        or_terms.append(cls._group('&', and_terms))
+        return cls._group('|', or_terms)
+
+    @staticmethod
+    def _group(
+        operator: str, terms: List[Union[int, tuple]]
+    ) -> Union[int, tuple]:
+        if len(terms) == 1:
+            return terms[0]
+        return (operator, *terms)
+
+    @classmethod
+    def _template(
+        cls, nested_expr: List[Any], index_of: Callable[[Any], int]
+    ) -> str:
+        ret = []
+        for item in nested_expr:
+            if isinstance(item, list):
+                ret.append(f'({cls._template(item, index_of)})')
+            elif item in {'&', '|'}:
+                ret.append(item)
+            else:
+                ret.append(f'{{{index_of(item)}}}')
+        return ''.join(ret)
+
+    def evaluate(self, values: Sequence[Any]) -> bool:
+        """Evaluate the expression given dependency satisfaction states.
+
+        Evaluation short-circuits as soon as the result is known.
+        """
+        return self._evaluate(self.tree, values)
+
+    @classmethod
+    def _evaluate(cls, node: Union[int, tuple], values: Sequence[Any]):
+        if node.__class__ is int:
+            return bool(values[node])  # type: ignore[index]
+        if node[0] == '|':  # type: ignore[index]
+            return any(
+                cls._evaluate(operand, values)
+                for operand in node[1:]  # type: ignore[index]
+            )
+        return all(
+            cls._evaluate(operand, values)
+            for operand in node[1:]  # type: ignore[index]
+        )
+
+    def render(self, operands: Sequence[str]) -> str:
+        """Return the expression as a string with the given operands."""
+        return self.template.format(*operands)
+
+
 class Prerequisite:
     """The concrete result of an abstract logical trigger expression.
 
@@ -98,12 +234,11 @@ class Prerequisite:
     __slots__ = (
         "_satisfied",
         "_cached_satisfied",
-        "conditional_expression",
+        "_condition",
+        "_condition_error",
         "point",
     )
 
-    # Extracts T from "foo.T succeeded" etc.
-    SATISFIED_TEMPLATE = 'bool(self._satisfied[("%s", "%s", "%s")])'
     MESSAGE_TEMPLATE = r'%s/%s %s'
 
     def __init__(self, point: 'PointBase'):
@@ -116,9 +251,12 @@ class Prerequisite:
         # {('point string', 'task name', 'output'): DEP_STATE_X, ...}
         self._satisfied: Dict[PrereqTuple, SatisfiedState] = {}
 
-        # Expression present only when the OR operator is used.
-        # '1/foo failed | 1/bar succeeded'
-        self.conditional_expression: Optional[str] = None
+        # Compiled expression present only when the OR operator is used.
+        # (Operands are indices into the keys of self._satisfied.)
+        self._condition: Optional[ConditionalExpression] = None
+        # (expression, error message) if the conditional expression could not
+        # be compiled (raised when the prerequisite is evaluated).
+        self._condition_error: Optional[Tuple[str, str]] = None
 
         # The cached state of this prerequisite:
         # * `None` (no cached state)
@@ -136,10 +274,28 @@ class Prerequisite:
         """
         return hash((
             self.point,
-            self.conditional_expression,
+            (
+                self._condition.template if self._condition
+                else self._condition_error
+            ),
             tuple(self._satisfied.keys()),
         ))
 
+    @property
+    def conditional_expression(self) -> Optional[str]:
+        """The conditional expression (or None if not conditional).
+
+        E.G. '1/foo failed|1/bar succeeded'
+        """
+        if self._condition is None:
+            if self._condition_error is not None:
+                return self._condition_error[0]
+            return None
+        return self._condition.render([
+            self.MESSAGE_TEMPLATE % task_output
+            for task_output in self._satisfied
+        ])
+
     def __getitem__(self, key: AnyPrereqTuple) -> SatisfiedState:
         """Return the satisfaction state of a dependency.
 
@@ -184,18 +340,27 @@ class Prerequisite:
         Returns None if this prerequisite does not involve an OR operator.
 
         """
-        expr = self.conditional_expression
-        if not expr:
-            return None
-        for task_output in self._satisfied:
-            expr = expr.replace(self.SATISFIED_TEMPLATE % task_output,
-                                self.MESSAGE_TEMPLATE % task_output)
-        return expr
+        return self.conditional_expression
+
+    def set_condition(self, condition: ConditionalExpression) -> None:
+        """Set a pre-compiled conditional expression for this prerequisite.
+
+        The operands of the expression must be the indices of the
+        dependencies of this prerequisite (in the order they were added).
+
+        Resets the cached state (self._cached_satisfied).
+        """
+        self._cached_satisfied = None
+        self._condition = condition
+        self._condition_error = None
 
     def set_conditional_expr(self, expr):
         """Set the conditional expression for this prerequisite.
         Resets the cached state (self._cached_satisfied).
 
+        The expression is compiled (see ConditionalExpression), it is not
+        evaluated until the satisfaction state is required.
+
         Examples:
             # GH #3644 construct conditional expression when one task name
             # is a substring of another: foo | xfoo => bar.
@@ -204,25 +369,38 @@ class Prerequisite:
             >>> preq[(1, 'foo', 'succeeded')] = False
             >>> preq[(1, 'xfoo', 'succeeded')] = False
             >>> preq.set_conditional_expr("1/foo succeeded|1/xfoo succeeded")
-            >>> expr = preq.conditional_expression
-            >>> expr.split('|')  # doctest: +NORMALIZE_WHITESPACE
-            ['bool(self._satisfied[("1", "foo", "succeeded")])',
-            'bool(self._satisfied[("1", "xfoo", "succeeded")])']
+            >>> preq._condition.tree
+            ('|', 0, 1)
+            >>> preq.conditional_expression
+            '1/foo succeeded|1/xfoo succeeded'
 
         """
         self._cached_satisfied = None
-        if '|' in expr:
-            # Make a Python expression so we can eval() the logic.
-            for t_output in self._satisfied:
-                # Use '\b' in case one task name is a substring of another
-                # and escape special chars ('.', timezone '+') in task IDs.
-                expr = re.sub(
-                    fr"\b{re.escape(self.MESSAGE_TEMPLATE % t_output)}\b",
-                    self.SATISFIED_TEMPLATE % t_output,
-                    expr
-                )
+        if '|' not in expr:
+            return
+        indices = {
+            self.MESSAGE_TEMPLATE % task_output: ind
+            for ind, task_output in enumerate(self._satisfied)
+        }
 
-            self.conditional_expression = expr
+        def _index_of(operand: str) -> int:
+            try:
+                return indices[operand]
+            except KeyError:
+                raise ValueError(f'unknown trigger "{operand}"') from None
+
+        try:
+            self.set_condition(
+                ConditionalExpression.from_list(listify(expr), _index_of)
+            )
+        except ValueError as exc:
+            err_msg = str(exc)
+            if err_msg == expr:
+                # Raised by listify.
+                err_msg = 'unmatched parentheses in the graph string?'
+            # Raise the error when the prerequisite is evaluated.
+            self._condition = None
+            self._condition_error = (expr, err_msg)
 
     def is_satisfied(self):
         """Return True if prerequisite is satisfied.
@@ -245,22 +423,12 @@ class Prerequisite:
         Does not cache the result.
 
         """
-        if not self.conditional_expression:
-            return all(self._satisfied.values())
-
-        try:
-            res = eval(self.conditional_expression)  # nosec
-            # * the expression is constructed internally
-            # * https://github.com/cylc/cylc-flow/issues/4403
-        except (SyntaxError, ValueError) as exc:
-            err_msg = str(exc)
-            if str(exc).find("unexpected EOF") != -1:
-                err_msg += (
-                    " (could be unmatched parentheses in the graph string?)")
-            raise TriggerExpressionError(
-                '"%s":\n%s' % (self.get_raw_conditional_expression(), err_msg)
-            ) from None
-        return res
+        if self._condition is not None:
+            return self._condition.evaluate(list(self._satisfied.values()))
+        if self._condition_error is not None:
+            expr, err_msg = self._condition_error
+            raise TriggerExpressionError(f'"{expr}":\n{err_msg}')
+        return all(self._satisfied.values())
 
     def satisfy_me(
         self,
@@ -293,7 +461,7 @@ class Prerequisite:
         """Return list of populated Protobuf data objects."""
         if not self._satisfied:
             return None
-        if self.conditional_expression:
+        if self._condition is not None:
             expr = (
                 self.get_raw_conditional_expression()
             ).replace('|', ' | ').replace('&', ' & ')
@@ -335,7 +503,7 @@ class Prerequisite:
         for task_output in self._satisfied:
             if not self._satisfied[task_output]:
                 self._satisfied[task_output] = 'force satisfied'
-        if self.conditional_expression:
+        if self._condition is not None:
             self._cached_satisfied = self._eval_satisfied()
         else:
             self._cached_satisfied = True
@@ -15,11 +15,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Cylc memory and performance profiling."""
 
+from collections import deque
+from contextlib import contextmanager
 import os
 import cProfile
 import io
 from pathlib import Path
 import pstats
+from time import perf_counter
+from typing import Deque, Dict, Iterator, List, Tuple
 
 import psutil
 
@@ -69,3 +73,115 @@ class Profiler:
             return
         memory = psutil.Process(os.getpid()).memory_info().rss / 1024
         print("PROFILE: Memory: %d KiB: %s" % (memory, message))
+
+
+class MainLoopTimings:
+    """Record how long each phase of the scheduler main loop takes.
+
+    A rolling window of the most recent durations is kept for each phase.
+    Summary statistics and a histogram are calculated from these on request
+    so recording a timing is cheap enough to be left on all the time.
+
+    Examples:
+        >>> timings = MainLoopTimings(window=3)
+        >>> for duration in (0.004, 0.02, 0.2, 0.02):
+        ...     timings.record('foo', duration)
+        >>> summary = timings.summary()['foo']
+        >>> summary['count'], summary['window'], summary['max']
+        (4, 3, 0.2)
+        >>> summary['histogram']
+        {'<1ms': 0, '<10ms': 0, '<100ms': 2, '<1s': 1, '<10s': 0, '>=10s': 0}
+        >>> with timings.time('bar'):
+        ...     pass
+        >>> list(timings.summary())
+        ['foo', 'bar']
+
+    """
+
+    # the number of durations to keep for each phase
+    WINDOW = 1000
+
+    # upper bounds of the histogram bins (seconds)
+    BINS: List[Tuple[str, float]] = [
+        ('<1ms', 0.001),
+        ('<10ms', 0.01),
+        ('<100ms', 0.1),
+        ('<1s', 1.0),
+        ('<10s', 10.0),
+        ('>=10s', float('inf')),
+    ]
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        # {phase: recent durations}
+        self.durations: Dict[str, Deque[float]] = {}
+        # {phase: [count, total duration]} since the scheduler started
+        self.totals: Dict[str, List[float]] = {}
+
+    def record(self, phase: str, duration: float) -> None:
+        """Record the duration of a main loop phase (seconds)."""
+        try:
+            self.durations[phase].append(duration)
+        except KeyError:
+            self.durations[phase] = deque([duration], maxlen=self.window)
+            self.totals[phase] = [0, 0.0]
+        totals = self.totals[phase]
+        totals[0] += 1
+        totals[1] += duration
+
+    @contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        """Time the body of a with statement as a main loop phase."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, perf_counter() - start)
+
+    def summary(self) -> Dict[str, dict]:
+        """Return statistics for each phase (durations in seconds).
+
+        The "count" and "total" cover every recorded duration, the other
+        statistics cover the most recent "window" durations.
+        """
+        ret: Dict[str, dict] = {}
+        for phase, durations in list(self.durations.items()):
+            # (copy, this may be called from another thread)
+            values = sorted(durations)
+            if not values:
+                continue
+            count, total = self.totals[phase]
+            histogram = dict.fromkeys((name for name, _ in self.BINS), 0)
+            bins = iter(self.BINS)
+            name, bound = next(bins)
+            for value in values:
+                while value >= bound:
+                    name, bound = next(bins)
+                histogram[name] += 1
+            ret[phase] = {
+                'count': int(count),
+                'total': total,
+                'window': len(values),
+                'mean': sum(values) / len(values),
+                'min': values[0],
+                'p50': self._percentile(values, 0.5),
+                'p95': self._percentile(values, 0.95),
+                'p99': self._percentile(values, 0.99),
+                'max': values[-1],
+                'histogram': histogram,
+            }
+        return ret
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> float:
+        """Return a percentile of a sorted list (nearest rank).
+
+        Examples:
+            >>> MainLoopTimings._percentile([1, 2, 3, 4], 0.5)
+            2
+            >>> MainLoopTimings._percentile([1, 2, 3, 4], 0.99)
+            4
+
+        """
+        index = max(0, -(-len(values) * fraction // 1) - 1)
+        return values[int(index)]
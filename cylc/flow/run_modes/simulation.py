@@ -110,7 +110,7 @@ def submit_task_job(
             'submit_status': 0   # Submission has succeeded
         }
     )
-    itask.state.status = TASK_STATUS_RUNNING
+    itask.state_reset(TASK_STATUS_RUNNING, silent=True)
     return True
 
 
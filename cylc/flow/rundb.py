@@ -15,17 +15,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Provide data access object for the workflow runtime database."""
 
-from collections import defaultdict
+from collections import (
+    defaultdict,
+    deque,
+)
 from contextlib import suppress
 from dataclasses import dataclass
+import os
 from os.path import expandvars
 from pprint import pformat
 import sqlite3
+import threading
 import traceback
 from typing import (
     TYPE_CHECKING,
     Any,
+    Callable,
     DefaultDict,
+    Deque,
     Dict,
     Iterable,
     List,
@@ -57,6 +64,7 @@ DbUpdateTuple = Union[
     Tuple[DbArgDict, DbArgDict],
     Tuple[str, list]
 ]
+SqlQueue = List[Tuple[str, list]]
 
 
 @dataclass
@@ -69,15 +77,29 @@ class CylcWorkflowDAOTableColumn:
 
 
 class CylcWorkflowDAOTable:
-    """Represent a table in the workflow runtime database."""
+    """Represent a table in the workflow runtime database.
+
+    Queued items are coalesced where this does not change the result of
+    executing the queues (DELETEs for each table are executed before its
+    INSERTs, which are executed before its UPDATEs):
+
+    * Repeated DELETE items are only queued once.
+    * An INSERT (OR REPLACE) item replaces any queued INSERT item with the
+      same primary key.
+    * An UPDATE item replaces any queued UPDATE item which sets the same
+      columns for the same WHERE arguments (unless it sets any of the
+      WHERE columns).
+
+    """
 
     FMT_CREATE = "CREATE TABLE %(name)s(%(columns_str)s%(primary_keys_str)s)"
     FMT_DELETE = "DELETE FROM %(name)s%(where_str)s"
     FMT_INSERT = "INSERT OR REPLACE INTO %(name)s VALUES(%(values_str)s)"
     FMT_UPDATE = "UPDATE %(name)s SET %(set_str)s%(where_str)s"
 
-    __slots__ = ('name', 'columns', 'delete_queues', 'insert_queue',
-                 'update_queues')
+    __slots__ = ('name', 'columns', 'primary_key_indices', 'delete_queues',
+                 'delete_keys', 'insert_queue', 'insert_keys',
+                 'update_queues', 'update_keys')
 
     def __init__(self, name, column_items):
         self.name = name
@@ -91,9 +113,29 @@ class CylcWorkflowDAOTable:
                 name,
                 attrs.get("datatype", "TEXT"),
                 attrs.get("is_primary_key", False)))
-        self.delete_queues = {}
-        self.insert_queue = []
+        self.primary_key_indices = [
+            i for i, column in enumerate(self.columns)
+            if column.is_primary_key
+        ]
+        self.clear_queues()
+
+    def clear_queues(self) -> None:
+        """Start new (empty) queues.
+
+        Note: the old queues are replaced rather than cleared, so they can
+        still be executed elsewhere.
+        """
+        self.delete_queues: Dict[str, list] = {}
+        # {stmt: {stmt_args, ...}}
+        self.delete_keys: Dict[str, Set[tuple]] = {}
+        self.insert_queue: list = []
+        # {primary key values: index in insert_queue}
+        self.insert_keys: Dict[tuple, int] = {}
         self.update_queues: DefaultDict[str, list] = defaultdict(list)
+        # {stmt: {where args: index in update_queues[stmt]}}
+        self.update_keys: DefaultDict[
+            str, Dict[tuple, int]
+        ] = defaultdict(dict)
 
     def get_create_stmt(self):
         """Return an SQL statement to create this table."""
@@ -137,6 +179,15 @@ class CylcWorkflowDAOTable:
         stmt = self.FMT_DELETE % {"name": self.name, "where_str": where_str}
         if stmt not in self.delete_queues:
             self.delete_queues[stmt] = []
+            self.delete_keys[stmt] = set()
+        try:
+            key = tuple(stmt_args)
+            if key in self.delete_keys[stmt]:
+                return
+            self.delete_keys[stmt].add(key)
+        except TypeError:
+            # unhashable argument, cannot coalesce
+            pass
         self.delete_queues[stmt].append(stmt_args)
 
     def add_insert_item(self, args):
@@ -160,6 +211,16 @@ class CylcWorkflowDAOTable:
         else:
             stmt_args = [
                 args.get(column.name, None) for column in self.columns]
+        if self.primary_key_indices:
+            key = tuple(stmt_args[i] for i in self.primary_key_indices)
+            # Note: NULL primary key values do not conflict in SQLite
+            if None not in key:
+                with suppress(TypeError):
+                    index = self.insert_keys.get(key)
+                    if index is not None:
+                        self.insert_queue[index] = stmt_args
+                        return
+                    self.insert_keys[key] = len(self.insert_queue)
         self.insert_queue.append(stmt_args)
 
     def add_update_item(self, item: DbUpdateTuple) -> None:
@@ -187,6 +248,7 @@ class CylcWorkflowDAOTable:
                 stmt_args.append(set_args[column.name])
         set_str = ", ".join(set_strs)
         where_str = ""
+        n_set_args = len(stmt_args)
         if where_args:
             where_strs = []
             for column in self.columns:
@@ -200,7 +262,18 @@ class CylcWorkflowDAOTable:
             "set_str": set_str,
             "where_str": where_str
         }
-        self.update_queues[stmt].append(stmt_args)
+        queue = self.update_queues[stmt]
+        if where_args and set_args.keys().isdisjoint(where_args):
+            # Last write wins for the same row(s).
+            keys = self.update_keys[stmt]
+            with suppress(TypeError):
+                key = tuple(stmt_args[n_set_args:])
+                index = keys.get(key)
+                if index is not None:
+                    queue[index] = stmt_args
+                    return
+                keys[key] = len(queue)
+        queue.append(stmt_args)
 
 
 class CylcWorkflowDAO:
@@ -367,6 +440,16 @@ class CylcWorkflowDAO:
         ],
     }
 
+    # Secondary indexes {name: (table, columns)}.
+    # These serve the workflow_state xtrigger and "cylc workflow-state"
+    # (see dbstatecheck), which look up the task_states table by cycle point
+    # (and status) and the task_outputs table by task name, neither of which
+    # the primary keys cover.
+    INDEXES = {
+        "task_states_cycle_status": (TABLE_TASK_STATES, ["cycle", "status"]),
+        "task_outputs_name": (TABLE_TASK_OUTPUTS, ["name"]),
+    }
+
     def __init__(
         self,
         db_file_name: Union['Path', str],
@@ -389,6 +472,7 @@ class CylcWorkflowDAO:
         self.is_public = is_public
         self.conn: Optional[sqlite3.Connection] = None
         self.n_tries = 0
+        self.writer: Optional[CylcWorkflowDAOWriter] = None
 
         self.tables = {
             name: CylcWorkflowDAOTable(name, attrs)
@@ -450,29 +534,82 @@ class CylcWorkflowDAO:
             self.conn = None
 
     def connect(self) -> sqlite3.Connection:
-        """Connect to the database."""
+        """Connect to the database.
+
+        If a writer thread has been started for this database, this waits for
+        it to write any outstanding items first, so that reads are
+        consistent with the items queued so far.
+        """
+        self.flush()
         if self.conn is None:
             self.conn = sqlite3.connect(self.db_file_name, self.CONN_TIMEOUT)
         return self.conn
 
+    def start_writer(self, wal: bool = False) -> None:
+        """Execute queued items in a background writer thread from now on.
+
+        Args:
+            wal: Put the database into write-ahead log mode whilst the
+                writer is running.
+
+        """
+        if self.writer is None:
+            self.writer = CylcWorkflowDAOWriter(self, wal=wal)
+
+    def stop_writer(self) -> None:
+        """Write any outstanding items and stop the writer thread."""
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            writer.stop()
+
+    def flush(self) -> None:
+        """Wait for the writer thread to write all items handed to it."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    @property
+    def backlog(self) -> int:
+        """Number of batches of queued items waiting to be written."""
+        if self.writer is None:
+            return 0
+        return self.writer.backlog
+
+    def checkpoint(self) -> None:
+        """Transfer the write-ahead log (if any) into the database file.
+
+        This is a no-op unless the database is in write-ahead log mode.
+        """
+        with suppress(sqlite3.Error):
+            self.connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
     def create_tables(self):
-        """Create tables."""
+        """Create tables and indexes (if they don't already exist)."""
         names = []
         for row in self.connect().execute(
                 "SELECT name FROM sqlite_master WHERE type==? ORDER BY name",
                 ["table"]):
             names.append(row[0])
-        cur = None
         for name, table in self.tables.items():
             if name not in names:
-                cur = self.conn.execute(table.get_create_stmt())
-        if cur is not None:
-            self.conn.commit()
+                self.conn.execute(table.get_create_stmt())
+        for name, (table_name, columns) in self.INDEXES.items():
+            self.conn.execute(
+                rf'''
+                    CREATE INDEX IF NOT EXISTS
+                        {name}
+                    ON
+                        {table_name}({", ".join(columns)})
+                '''  # nosec (names are code constants)
+            )
+        self.conn.commit()
 
-    def execute_queued_items(self):
-        """Execute queued items for each table."""
-        # determine the sql statements to execute
-        sql_queue = []  # (sql_statement, values)
+    def get_queued_items(self) -> SqlQueue:
+        """Return the SQL statements needed to execute the queued items.
+
+        Returns a list of (sql_statement, values) tuples.
+
+        """
+        sql_queue: SqlQueue = []
         for table in self.tables.values():
             # DELETE statements may have varying number of WHERE args so we
             # can only executemany for each identical template statement.
@@ -492,15 +629,67 @@ class CylcWorkflowDAO:
             # statement.
             for stmt, stmt_args_list in table.update_queues.items():
                 sql_queue.append((stmt, stmt_args_list))
+        return sql_queue
 
-        # execute the statements and commit the transaction
+    def clear_queued_items(self) -> None:
+        """Clear the queued items for each table."""
+        for table in self.tables.values():
+            table.clear_queues()
+
+    def execute_queued_items(self):
+        """Execute queued items for each table.
+
+        If a writer thread has been started for this database, the queued
+        items are handed over to it instead of being executed here.
+
+        """
+        if self.writer is not None:
+            sql_queue = self.get_queued_items()
+            # the writer takes ownership of the queued argument lists
+            self.clear_queued_items()
+            if sql_queue:
+                self.writer.put(sql_queue)
+            return
+
+        try:
+            if self.execute_sql_queue(self.get_queued_items()):
+                self.clear_queued_items()
+        finally:
+            # Note: This is not strictly necessary. But if the workflow run
+            # directory is removed, a forced reconnection to the private
+            # database will ensure that the workflow dies.
+            self.close()
+
+    def execute_sql_queue(
+        self,
+        sql_queue: SqlQueue,
+        connect: Optional[Callable[[], sqlite3.Connection]] = None,
+    ) -> bool:
+        """Execute SQL statements in a single transaction and commit it.
+
+        Args:
+            sql_queue: List of (sql_statement, values) tuples.
+            connect: Function returning the connection to use, defaults
+                to this object's own connection.
+
+        Returns:
+            True if the transaction was committed (or there was nothing to
+            do), False if a write to the public database failed (the
+            statements should be retried later).
+
+        Raises:
+            sqlite3.Error: If a write to the private database failed.
+
+        """
+        conn: Optional[sqlite3.Connection] = None
         try:
+            # Connection should only be opened if we have something to execute.
+            if not sql_queue:
+                return True
+            conn = (connect or self.connect)()
             for stmt, stmt_args in sql_queue:
-                self._execute_stmt(stmt, stmt_args)
-            # Connection should only be opened if we have executed something.
-            if self.conn is None:
-                return
-            self.conn.commit()
+                self._execute_stmt(stmt, stmt_args, conn)
+            conn.commit()
 
         # something went wrong
         # (includes DB file not found, transaction processing issue, db locked)
@@ -547,36 +736,25 @@ class CylcWorkflowDAO:
                     "error_name": error_name
                 }
             )
-            if self.conn is not None:
+            if conn is not None:
                 with suppress(sqlite3.Error):
-                    self.conn.rollback()
-            return
-
-        else:
-            # Clear the queues
-            for table in self.tables.values():
-                table.delete_queues.clear()
-                table.insert_queue.clear()
-                table.update_queues.clear()
-            # Report public database retry recovery if necessary
-            if self.n_tries:
-                LOG.warning(
-                    "%(file)s: recovered after (%(attempt)d) attempt(s)\n" % {
-                        "file": self.db_file_name, "attempt": self.n_tries})
-            self.n_tries = 0
+                    conn.rollback()
+            return False
 
-        finally:
-            # Note: This is not strictly necessary. But if the workflow run
-            # directory is removed, a forced reconnection to the private
-            # database will ensure that the workflow dies.
-            self.close()
+        # Report public database retry recovery if necessary
+        if self.n_tries:
+            LOG.warning(
+                "%(file)s: recovered after (%(attempt)d) attempt(s)\n" % {
+                    "file": self.db_file_name, "attempt": self.n_tries})
+        self.n_tries = 0
+        return True
 
-    def _execute_stmt(self, stmt, stmt_args_list):
-        """Helper for "self.execute_queued_items".
+    def _execute_stmt(self, stmt, stmt_args_list, conn=None):
+        """Helper for "self.execute_sql_queue".
 
-        Execute a statement. If this is the public database, return True on
-        success and False on failure. If this is the private database, return
-        True on success, and raise on failure.
+        Execute a statement (using the connection provided, or this
+        object's own connection). Raise on failure, logging the details if
+        this is the public database.
         """
         # Filter out CYLC_TEMPLATE_VARS which breaks executemany because it's:
         # - a dict
@@ -587,8 +765,7 @@ class CylcWorkflowDAO:
             ]
 
         try:
-            self.connect()
-            self.conn.executemany(stmt, stmt_args_list)
+            (conn or self.connect()).executemany(stmt, stmt_args_list)
         except sqlite3.Error as e:
             if not self.is_public:
                 raise
@@ -857,6 +1034,24 @@ class CylcWorkflowDAO:
             )
         ]
 
+    def select_task_states_for_cycle(
+        self, point: str
+    ) -> List[Tuple[str, str, int, int, str]]:
+        """Select task_states table info about all tasks in a cycle.
+
+        Return: [(name, flow_nums_str, submit_num, flow_wait, status), ...]
+
+        """
+        stmt = rf'''
+            SELECT
+                name,flow_nums,submit_num,flow_wait,status
+            FROM
+                {self.TABLE_TASK_STATES}
+            WHERE
+                cycle==?
+        '''  # nosec B608 (table name is code constant)
+        return list(self.connect().execute(stmt, (point,)))
+
     def select_latest_flow_nums(self) -> Optional['FlowNums']:
         """Return a list of the most recent previous flow numbers."""
         stmt = rf'''
@@ -897,6 +1092,24 @@ class CylcWorkflowDAO:
             )
         }
 
+    def select_task_outputs_for_cycle(
+        self, point: str
+    ) -> List[Tuple[str, str, str]]:
+        """Select task outputs for all tasks in a cycle.
+
+        Return: [(name, flow_nums_str, outputs_dict_str), ...]
+
+        """
+        stmt = rf'''
+            SELECT
+                name,flow_nums,outputs
+            FROM
+                {self.TABLE_TASK_OUTPUTS}
+            WHERE
+                cycle==?
+        '''  # nosec B608 (table name is code constant)
+        return list(self.connect().execute(stmt, (point,)))
+
     def select_xtriggers_for_restart(self, callback):
         stmt = rf'''
             SELECT
@@ -1010,6 +1223,38 @@ class CylcWorkflowDAO:
                 msg += f"\n * {platform}"
             raise PlatformLookupError(msg)
 
+    def select_task_prerequisites_for_restart(self, callback):
+        """Select prerequisites of all tasks in the task pool, for restart.
+
+        Invoke callback(row_idx, row) on each row, where each row contains:
+            [cycle, name, flow_nums,
+             prereq_name, prereq_cycle, prereq_output, satisfied]
+        """
+        form_stmt = r"""
+            SELECT
+                %(task_prerequisites)s.cycle,
+                %(task_prerequisites)s.name,
+                %(task_prerequisites)s.flow_nums,
+                %(task_prerequisites)s.prereq_name,
+                %(task_prerequisites)s.prereq_cycle,
+                %(task_prerequisites)s.prereq_output,
+                %(task_prerequisites)s.satisfied
+            FROM
+                %(task_prerequisites)s
+            JOIN
+                %(task_pool)s
+            ON  %(task_prerequisites)s.cycle == %(task_pool)s.cycle AND
+                %(task_prerequisites)s.name == %(task_pool)s.name AND
+                %(task_prerequisites)s.flow_nums == %(task_pool)s.flow_nums
+        """
+        form_data = {
+            "task_pool": self.TABLE_TASK_POOL,
+            "task_prerequisites": self.TABLE_TASK_PREREQUISITES,
+        }
+        stmt = form_stmt % form_data
+        for row_idx, row in enumerate(self.connect().execute(stmt)):
+            callback(row_idx, list(row))
+
     def select_task_prerequisites(
         self, cycle: str, name: str, flow_nums: str
     ) -> List[Tuple[str, str, str, str]]:
@@ -1172,3 +1417,142 @@ class CylcWorkflowDAO:
     def vacuum(self):
         """Vacuum to the database."""
         return self.connect().execute("VACUUM")
+
+
+class CylcWorkflowDAOWriter:
+    """Write queued items for a database in a background thread.
+
+    Batches of SQL statements are handed over by
+    CylcWorkflowDAO.execute_queued_items (normally once per main loop
+    iteration). The writer thread keeps its own connection to the database
+    open and writes all batches which have accumulated since its last
+    transaction in a single transaction, so a slow commit (e.g. on a shared
+    filesystem) does not hold up the main loop.
+
+    Batches are written in the order they were handed over. Failed writes to
+    the public database are retried along with the next batch. A failed
+    write to the private database stops the writer, the error is re-raised
+    in the calling thread by the next "put" or "flush".
+
+    The connection is re-opened if the database file is replaced or
+    removed (e.g. when the public database is recovered from the private
+    one).
+
+    """
+
+    def __init__(self, dao: CylcWorkflowDAO, wal: bool = False):
+        self.dao = dao
+        self.wal = wal
+        self.conn: Optional[sqlite3.Connection] = None
+        self.error: Optional[Exception] = None
+        # number of batches handed over but not yet committed
+        self.backlog = 0
+        self._conn_ino: Optional[int] = None
+        self._batches: Deque[SqlQueue] = deque()
+        self._n_put = 0
+        self._n_done = 0
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f'db-writer-{dao.db_file_name}',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def put(self, sql_queue: SqlQueue) -> None:
+        """Hand over a batch of (sql_statement, values) to be written."""
+        self._raise_error()
+        with self._cond:
+            self._batches.append(sql_queue)
+            self._n_put += 1
+            self.backlog += 1
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Wait for all batches handed over so far to be written.
+
+        Failed writes to the public database count as written (they will be
+        retried with the next batch).
+        """
+        with self._cond:
+            target = self._n_put
+            while self._n_done < target and self._thread.is_alive():
+                self._cond.wait()
+        self._raise_error()
+
+    def stop(self) -> None:
+        """Write any remaining batches, then close the connection."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def _run(self) -> None:
+        """Write batches until stopped (runs in the writer thread)."""
+        pending: SqlQueue = []
+        n_pending = 0
+        try:
+            while True:
+                with self._cond:
+                    while not self._batches and not self._stopping:
+                        self._cond.wait()
+                    batches = list(self._batches)
+                    self._batches.clear()
+                    stopping = self._stopping
+                for sql_queue in batches:
+                    pending.extend(sql_queue)
+                n_pending += len(batches)
+                n_committed = 0
+                try:
+                    if pending and self.dao.execute_sql_queue(
+                        pending, self._connect
+                    ):
+                        pending = []
+                        n_committed, n_pending = n_pending, 0
+                except Exception as exc:
+                    self.error = exc
+                with self._cond:
+                    self.backlog -= n_committed
+                    self._n_done += len(batches)
+                    self._cond.notify_all()
+                if stopping or self.error is not None:
+                    break
+        finally:
+            self._disconnect()
+            with self._cond:
+                self._cond.notify_all()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the writer connection, (re)connecting if necessary."""
+        try:
+            ino: Optional[int] = os.stat(self.dao.db_file_name).st_ino
+        except OSError:
+            ino = None
+        if self.conn is not None and ino != self._conn_ino:
+            # the database file has been replaced or removed
+            self._disconnect()
+        if self.conn is None:
+            self.conn = sqlite3.connect(
+                self.dao.db_file_name, self.dao.CONN_TIMEOUT)
+            if self.wal:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self._conn_ino = os.stat(self.dao.db_file_name).st_ino
+        return self.conn
+
+    def _disconnect(self) -> None:
+        """Close the writer connection (leaving write-ahead log mode)."""
+        if self.conn is None:
+            return
+        if self.wal:
+            with suppress(sqlite3.Error):
+                self.conn.execute("PRAGMA journal_mode=DELETE")
+        with suppress(sqlite3.Error):
+            self.conn.close()
+        self.conn = None
+        self._conn_ino = None
@@ -17,7 +17,10 @@
 
 import asyncio
 from collections import deque
-from contextlib import suppress
+from contextlib import (
+    contextmanager,
+    suppress,
+)
 import itertools
 import logging
 import os
@@ -40,6 +43,7 @@ from threading import (
     Thread,
 )
 from time import (
+    perf_counter,
     sleep,
     time,
 )
@@ -50,6 +54,7 @@ from typing import (
     AsyncGenerator,
     Dict,
     Iterable,
+    Iterator,
     List,
     NoReturn,
     Optional,
@@ -94,7 +99,7 @@ from cylc.flow.hostuserutil import (
     get_user,
     is_remote_platform,
 )
-from cylc.flow.id import Tokens
+from cylc.flow.id import Tokens, quick_parse_job_id
 from cylc.flow.log_level import (
     verbosity_to_env,
     verbosity_to_opts,
@@ -129,7 +134,7 @@ from cylc.flow.platforms import (
     get_platform,
     is_platform_with_target_in_list,
 )
-from cylc.flow.profiler import Profiler
+from cylc.flow.profiler import MainLoopTimings, Profiler
 from cylc.flow.resources import get_resources
 from cylc.flow.run_modes import RunMode
 from cylc.flow.run_modes.simulation import sim_time_check
@@ -293,6 +298,9 @@ class Scheduler:
 
     # main loop
     main_loop_intervals: deque = deque(maxlen=10)
+    main_loop_timings: MainLoopTimings
+    main_loop_wake: Optional[asyncio.Event] = None
+    _main_loop_asyncio: Optional[asyncio.AbstractEventLoop] = None
     main_loop_plugins: Optional[dict] = None
     auto_restart_mode: Optional[AutoRestartMode] = None
     auto_restart_time: Optional[float] = None
@@ -403,10 +411,20 @@ class Scheduler:
         """
         self.data_store_mgr = DataStoreMgr(self)
         self.broadcast_mgr = BroadcastMgr(self)
+        # Durations of the phases of each main loop iteration.
+        self.main_loop_timings = MainLoopTimings()
 
         self.server = WorkflowRuntimeServer(self)
 
+        # Event used to wake the main loop before its next scheduled
+        # iteration (e.g. when a task message or command arrives).
+        self.main_loop_wake = asyncio.Event()
+        self._main_loop_asyncio = asyncio.get_running_loop()
+
         self.proc_pool = SubProcPool()
+        # Run callbacks of exited commands without waiting for the next
+        # main loop iteration.
+        self.proc_pool.on_exit = self.wake_main_loop
         self.command_queue = Queue()
         self.message_queue = Queue()
         self.ext_trigger_queue = Queue()
@@ -443,6 +461,7 @@ class Scheduler:
             self.data_store_mgr,
             self.bad_hosts,
             self.server,
+            self.main_loop_timings,
         )
 
         self.profiler = Profiler(self, self.options.profile_mode)
@@ -866,43 +885,73 @@ class Scheduler:
         self.pool.load_from_point()
 
     def _load_pool_from_db(self):
-        """Load task pool from DB, for a restart."""
-        self.workflow_db_mgr.pri_dao.select_broadcast_states(
-            self.broadcast_mgr.load_db_broadcast_states)
-        self.broadcast_mgr.post_load_db_coerce()
-        self.workflow_db_mgr.pri_dao.select_task_job_run_times(
-            self._load_task_run_times)
-        self.workflow_db_mgr.pri_dao.select_task_pool_for_restart(
-            self.pool.load_db_task_pool_for_restart)
-        self.workflow_db_mgr.pri_dao.select_jobs_for_restart(
-            self.data_store_mgr.insert_db_job)
-        self.workflow_db_mgr.pri_dao.select_task_action_timers(
-            self.pool.load_db_task_action_timers)
-        self.workflow_db_mgr.pri_dao.select_xtriggers_for_restart(
-            self.xtrigger_mgr.load_xtrigger_for_restart)
-        self.workflow_db_mgr.pri_dao.select_abs_outputs_for_restart(
-            self.pool.load_abs_outputs_for_restart)
-
-        self.pool.load_db_tasks_to_hold()
-        self.pool.update_flow_mgr()
+        """Load task pool from DB, for a restart.
+
+        Each table is read in a single query, and the time taken by each
+        phase is logged.
+        """
+        dao = self.workflow_db_mgr.pri_dao
+        timings: Dict[str, float] = {}
+
+        @contextmanager
+        def timer(phase: str) -> Iterator[None]:
+            start = perf_counter()
+            yield
+            timings[phase] = perf_counter() - start
+
+        with timer('broadcasts'):
+            dao.select_broadcast_states(
+                self.broadcast_mgr.load_db_broadcast_states)
+            self.broadcast_mgr.post_load_db_coerce()
+        with timer('job run times'):
+            dao.select_task_job_run_times(self._load_task_run_times)
+        with timer('prerequisites'):
+            self.pool.start_restart_prereqs_load()
+            dao.select_task_prerequisites_for_restart(
+                self.pool.load_db_task_prerequisites_for_restart)
+        with timer('task pool'):
+            dao.select_task_pool_for_restart(
+                self.pool.load_db_task_pool_for_restart)
+        with timer('runahead release'):
+            self.pool.finish_db_task_pool_for_restart()
+        with timer('jobs'):
+            dao.select_jobs_for_restart(self.data_store_mgr.insert_db_job)
+        with timer('action timers'):
+            dao.select_task_action_timers(
+                self.pool.load_db_task_action_timers)
+        with timer('xtriggers'):
+            dao.select_xtriggers_for_restart(
+                self.xtrigger_mgr.load_xtrigger_for_restart)
+        with timer('absolute outputs'):
+            dao.select_abs_outputs_for_restart(
+                self.pool.load_abs_outputs_for_restart)
+        with timer('held tasks and flows'):
+            self.pool.load_db_tasks_to_hold()
+            self.pool.update_flow_mgr()
+
+        LOG.info(
+            'Restart load times:\n' + '\n'.join(
+                f'  {phase}: {duration:.3f}s'
+                for phase, duration in timings.items()
+            )
+        )
 
     def restart_remote_init(self):
         """Remote init for all submitted/running tasks in the pool."""
         self.task_job_mgr.task_remote_mgr.is_restart = True
         distinct_install_target_platforms = []
         for itask in self.pool.get_tasks():
+            # we don't need to remote-init for preparing tasks because
+            # they will be reset to waiting on restart
+            # (and other tasks may share the default platform, which must not
+            # be modified)
+            if not itask.state(*TASK_STATUSES_ACTIVE):
+                continue
             itask.platform['install target'] = (
                 get_install_target_from_platform(itask.platform))
-            if (
-                # we don't need to remote-init for preparing tasks because
-                # they will be reset to waiting on restart
-                itask.state(*TASK_STATUSES_ACTIVE)
-                and not (
-                    is_platform_with_target_in_list(
-                        itask.platform['install target'],
-                        distinct_install_target_platforms
-                    )
-                )
+            if not is_platform_with_target_in_list(
+                itask.platform['install target'],
+                distinct_install_target_platforms
             ):
                 distinct_install_target_platforms.append(itask.platform)
 
@@ -958,6 +1007,9 @@ class Scheduler:
     def process_queued_task_messages(self) -> None:
         """Process incoming task messages for each task proxy.
 
+        The messages are grouped by task, and the tasks are looked up in the
+        pool by ID, so the cost depends on the number of messages rather than
+        the size of the pool.
         """
         messages: 'Dict[str, List[Tuple[Optional[int], TaskMsg]]]' = {}
 
@@ -968,24 +1020,24 @@ class Scheduler:
             except Empty:
                 break
             self.message_queue.task_done()
-            tokens = Tokens(task_msg.job_id, relative=True)
-            # task ID (job stripped)
-            task_id = tokens.duplicate(job=None).relative_id
-            messages.setdefault(task_id, [])
+            # task ID (job stripped),
             # job may be None (e.g. simulation mode)
-            job = int(tokens['job']) if tokens['job'] else None
-            messages[task_id].append(
-                (job, task_msg)
-            )
+            task_id, job = quick_parse_job_id(task_msg.job_id)
+            messages.setdefault(task_id, []).append((job, task_msg))
+
+        if messages:
+            # Messages may spawn or queue tasks which are released on the
+            # next main loop iteration, so don't wait for it.
+            self.wake_main_loop()
 
         # Poll tasks for which messages caused a backward state change.
         to_poll_tasks = []
-        for itask in self.pool.get_tasks():
-            message_items = messages.get(itask.identity)
-            if message_items is None:
+        for task_id in list(messages):
+            itask = self.pool.get_task_by_id(task_id)
+            if itask is None:
                 continue
             should_poll = False
-            del messages[itask.identity]
+            message_items = messages.pop(task_id)
             for submit_num, tm in message_items:
                 if self.task_events_mgr.process_message(
                     itask, tm.severity, tm.message, tm.event_time,
@@ -1006,6 +1058,29 @@ class Scheduler:
                 warn += f'\n  {msg.job_id}: {msg.severity} - "{msg.message}"'
             LOG.warning(warn)
 
+    def wake_main_loop(self) -> None:
+        """Wake the main loop so that it runs its next iteration now.
+
+        This is thread safe, it may be called from the network server thread
+        when new task messages, commands or external triggers are queued.
+        """
+        loop = self._main_loop_asyncio
+        if self.main_loop_wake is None or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.main_loop_wake.set)
+
+    async def _main_loop_sleep(self, duration: float) -> None:
+        """Sleep until the next main loop iteration is due.
+
+        Returns early if the main loop is woken by wake_main_loop.
+        """
+        if self.main_loop_wake is None:
+            await asyncio.sleep(duration)
+            return
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.main_loop_wake.wait(), duration)
+        self.main_loop_wake.clear()
+
     async def process_command_queue(self) -> None:
         """Process queued commands."""
         qsize = self.command_queue.qsize()
@@ -1045,6 +1120,7 @@ class Scheduler:
                 else:
                     LOG.info(msg.format(result="actioned"))
                 self.is_updated = True
+                self.wake_main_loop()
 
             self.command_queue.task_done()
 
@@ -1506,10 +1582,9 @@ class Scheduler:
             )
         ):
             # finish processing preparing tasks first
-            pre_prep_tasks = {
-                itask for itask in self.pool.get_tasks()
-                if itask.state(TASK_STATUS_PREPARING)
-            }
+            pre_prep_tasks = set(
+                self.pool.get_tasks_by_status(TASK_STATUS_PREPARING)
+            )
 
         # Return, if no tasks to submit.
         else:
@@ -1625,7 +1700,7 @@ class Scheduler:
                     "Waiting for the command process pool to empty" +
                     " for shutdown")
                 while self.proc_pool.is_not_done():
-                    sleep(self.INTERVAL_STOP_PROCESS_POOL_EMPTY)
+                    await asyncio.sleep(self.INTERVAL_STOP_PROCESS_POOL_EMPTY)
                     if stop_process_pool_empty_msg:
                         LOG.info(stop_process_pool_empty_msg)
                         stop_process_pool_empty_msg = None
@@ -1753,6 +1828,9 @@ class Scheduler:
     async def _main_loop(self) -> None:
         """A single iteration of the main loop."""
         tinit = time()
+        # Time each phase of the main loop (see "cylc main-loop-timings").
+        timer = self.main_loop_timings.time
+        timer_init = perf_counter()
 
         # Useful for debugging core scheduler issues:
         # import logging
@@ -1760,42 +1838,40 @@ class Scheduler:
         if self.incomplete_ri_map:
             self.manage_remote_init()
 
-        await self.process_command_queue()
-        self.proc_pool.process()
-
-        # Unqueued tasks with satisfied prerequisites must be waiting on
-        # xtriggers or ext_triggers. Check these and queue tasks if ready.
-        for itask in self.pool.get_tasks():
-            if (
-                not itask.state(TASK_STATUS_WAITING)
-                or itask.state.is_queued
-                or itask.state.is_runahead
-            ):
-                continue
+        with timer('process_command_queue'):
+            await self.process_command_queue()
+        with timer('proc_pool_process'):
+            self.proc_pool.process()
 
-            if (
-                itask.state.xtriggers
-                and not itask.state.xtriggers_all_satisfied()
-            ):
-                self.xtrigger_mgr.call_xtriggers_async(itask)
+        with timer('xtrigger_scan'):
+            # Unqueued tasks with satisfied prerequisites must be waiting on
+            # xtriggers or ext_triggers. Check these and queue tasks if
+            # ready.
+            for itask in self.pool.get_unqueued_waiting_tasks():
+                if (
+                    itask.state.xtriggers
+                    and not itask.state.xtriggers_all_satisfied()
+                ):
+                    self.xtrigger_mgr.call_xtriggers_async(itask)
 
-            if (
-                itask.state.external_triggers
-                and not itask.state.external_triggers_all_satisfied()
-            ):
-                self.broadcast_mgr.check_ext_triggers(
-                    itask, self.ext_trigger_queue)
+                if (
+                    itask.state.external_triggers
+                    and not itask.state.external_triggers_all_satisfied()
+                ):
+                    self.broadcast_mgr.check_ext_triggers(
+                        itask, self.ext_trigger_queue)
 
-            if itask.is_ready_to_run() and not itask.is_manual_submit:
-                self.pool.queue_task(itask)
+                if itask.is_ready_to_run() and not itask.is_manual_submit:
+                    self.pool.queue_task(itask)
 
-        if self.xtrigger_mgr.sequential_spawn_next:
-            self.pool.spawn_parentless_sequential_xtriggers()
+            if self.xtrigger_mgr.sequential_spawn_next:
+                self.pool.spawn_parentless_sequential_xtriggers()
 
-        if self.xtrigger_mgr.do_housekeeping:
-            self.xtrigger_mgr.housekeep(self.pool.get_tasks())
+            if self.xtrigger_mgr.do_housekeeping:
+                self.xtrigger_mgr.housekeep(self.pool.get_tasks())
         self.pool.clock_expire_tasks()
-        self.release_tasks_to_run()
+        with timer('release_tasks_to_run'):
+            self.release_tasks_to_run()
 
         if (
             self.get_run_mode() == RunMode.SIMULATION
@@ -1811,9 +1887,12 @@ class Scheduler:
         self.broadcast_mgr.expire_broadcast(self.pool.get_min_point())
         self.late_tasks_check()
 
-        self.process_queued_task_messages()
-        await self.process_command_queue()
-        self.task_events_mgr.process_events(self)
+        with timer('process_queued_task_messages'):
+            self.process_queued_task_messages()
+        with timer('process_command_queue'):
+            await self.process_command_queue()
+        with timer('process_events'):
+            self.task_events_mgr.process_events(self)
 
         # Update state summary, database, and uifeed
         self.workflow_db_mgr.put_task_event_timers(self.task_events_mgr)
@@ -1831,7 +1910,8 @@ class Scheduler:
 
         if has_updated or self.data_store_mgr.updates_pending:
             # Update the datastore.
-            await self.update_data_structure()
+            with timer('update_data_structure'):
+                await self.update_data_structure()
 
         if has_updated:
             if not self.is_reloaded:
@@ -1849,7 +1929,8 @@ class Scheduler:
                 with suppress(KeyError):
                     self.timers[self.EVENT_STALL_TIMEOUT].stop()
 
-        self.process_workflow_db_queue()
+        with timer('process_workflow_db_queue'):
+            self.process_workflow_db_queue()
 
         # If public database is stuck, blast it away by copying the content
         # of the private database into it.
@@ -1865,21 +1946,27 @@ class Scheduler:
             self.update_profiler_logs(tinit)
 
         # Run plugin functions
-        await asyncio.gather(
-            *main_loop.get_runners(
-                self.main_loop_plugins,
-                main_loop.CoroTypes.Periodic,
-                self
+        with timer('plugins'):
+            await asyncio.gather(
+                *main_loop.get_runners(
+                    self.main_loop_plugins,
+                    main_loop.CoroTypes.Periodic,
+                    self
+                )
             )
-        )
 
         if not has_updated and not self.stop_mode:
             # Has the workflow stalled?
             self.check_workflow_stalled()
 
+        # Record the time taken by this iteration (excluding the sleep).
+        self.main_loop_timings.record(
+            'main_loop', perf_counter() - timer_init)
+
         # Sleep a bit for things to catch up.
         # Quick sleep if there are items pending in process pool.
-        # (Should probably use quick sleep logic for other queues?)
+        # The sleep is cut short if the main loop is woken (e.g. by an
+        # incoming task message or command).
         elapsed = time() - tinit
         quick_mode = self.proc_pool.is_not_done()
         if (elapsed >= self.INTERVAL_MAIN_LOOP or
@@ -1891,7 +1978,7 @@ class Scheduler:
             duration = self.INTERVAL_MAIN_LOOP_QUICK - elapsed
         else:
             duration = self.INTERVAL_MAIN_LOOP - elapsed
-        await asyncio.sleep(duration)
+        await self._main_loop_sleep(duration)
         # Record latest main loop interval
         self.main_loop_intervals.append(time() - tinit)
         # END MAIN LOOP
@@ -2006,6 +2093,9 @@ class Scheduler:
             except Exception as exc:
                 LOG.exception(exc)
 
+        if hasattr(self, 'task_job_mgr'):
+            self.task_job_mgr.close()
+
         if hasattr(self, 'pool'):
             try:
                 if not self.is_stalled:
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""cylc main-loop-timings [OPTIONS] ARGS
+
+Show how long each phase of the scheduler main loop is taking.
+
+The scheduler records the duration of each phase of every main loop
+iteration. This command shows statistics for the most recent iterations
+(durations in milliseconds) which can be used to find out which phase of the
+main loop is slowing a workflow down.
+
+Phases:
+  main_loop                     The whole iteration (excluding the sleep).
+  process_command_queue         Run queued commands (e.g. "cylc trigger").
+  proc_pool_process             Process finished subprocesses, launch queued
+                                ones (job submission, xtriggers, etc).
+  xtrigger_scan                 Check xtriggers and external triggers of
+                                waiting tasks.
+  release_tasks_to_run          Release queued tasks and submit their jobs.
+  process_queued_task_messages  Process received task messages.
+  process_events                Process task events (e.g. event handlers).
+  update_data_structure         Update the data store and publish changes.
+  process_workflow_db_queue     Write queued changes to the databases.
+  plugins                       Run main loop plugins.
+
+Examples:
+  # show main loop timings for a running workflow
+  $ cylc main-loop-timings myworkflow
+
+  # print the raw statistics (durations in seconds) as JSON
+  $ cylc main-loop-timings myworkflow --json
+"""
+
+from functools import partial
+import json
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from cylc.flow.network.client_factory import get_client
+from cylc.flow.network.multi import call_multi
+from cylc.flow.option_parsers import (
+    WORKFLOW_ID_MULTI_ARG_DOC,
+    CylcOptionParser as COP,
+)
+from cylc.flow.terminal import cli_function
+
+if TYPE_CHECKING:
+    from optparse import Values
+
+
+QUERY = '''
+query ($wFlows: [ID]) {
+  workflows(ids: $wFlows) {
+    id
+    mainLoopTimings
+  }
+}
+'''
+
+# statistics to display
+COLUMNS = ['count', 'mean', 'p50', 'p95', 'p99', 'max']
+
+
+def get_option_parser() -> COP:
+    parser = COP(
+        __doc__,
+        comms=True,
+        multiworkflow=True,
+        argdoc=[WORKFLOW_ID_MULTI_ARG_DOC],
+    )
+    parser.add_option(
+        '--json',
+        action='store_true',
+        default=False,
+        help='Print output in JSON format.',
+    )
+    return parser
+
+
+def format_timings(timings: Dict[str, dict]) -> str:
+    """Format main loop timings as a table.
+
+    Phases are listed in order of the total time spent in them.
+
+    Examples:
+        >>> print(format_timings({
+        ...     'a': {
+        ...         'count': 2, 'total': 0.003, 'mean': 0.0015,
+        ...         'p50': 0.001, 'p95': 0.002, 'p99': 0.002, 'max': 0.002,
+        ...     },
+        ...     'bb': {
+        ...         'count': 1, 'total': 0.1, 'mean': 0.1,
+        ...         'p50': 0.1, 'p95': 0.1, 'p99': 0.1, 'max': 0.1,
+        ...     },
+        ... }))
+        phase  count   mean    p50    p95    p99    max
+        bb         1  100.0  100.0  100.0  100.0  100.0
+        a          2    1.5    1.0    2.0    2.0    2.0
+
+    """
+    rows: List[List[str]] = [['phase', *COLUMNS]]
+    for phase, stats in sorted(
+        timings.items(),
+        key=lambda item: item[1]['total'],
+        reverse=True,
+    ):
+        rows.append([phase] + [
+            str(stats[key]) if key == 'count'
+            else f'{stats[key] * 1000:.1f}'
+            for key in COLUMNS
+        ])
+    widths = [max(len(cell) for cell in column) for column in zip(*rows)]
+    return '\n'.join(
+        '  '.join(
+            [row[0].ljust(widths[0])]
+            + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        )
+        for row in rows
+    )
+
+
+async def run(options: 'Values', workflow_id: str, *_) -> Optional[str]:
+    pclient = get_client(workflow_id, timeout=options.comms_timeout)
+
+    query_kwargs = {
+        'request_string': QUERY,
+        'variables': {'wFlows': [workflow_id]}
+    }
+
+    result = await pclient.async_request('graphql', query_kwargs)
+
+    for workflow in result['workflows']:
+        timings = workflow['mainLoopTimings'] or {}
+        if options.json:
+            return json.dumps(timings, indent=4)
+        return format_timings(timings)
+    return None
+
+
+@cli_function(get_option_parser)
+def main(parser: COP, options: 'Values', *ids: str) -> None:
+    rets = call_multi(
+        partial(run, options),
+        *ids,
+        report=lambda x: (x, None, True),
+        # we need the mixed format for call_multi but don't want any tasks
+        constraint='mixed',
+        max_tasks=0,
+    )
+    sys.exit(all(rets.values()) is False)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""cylc message-relay [OPTIONS] ARGS
+
+Relay task messages from jobs on this host to their schedulers in batches.
+
+Jobs report their progress with "cylc message", which normally connects to
+the scheduler once per call. On hosts which run many short jobs, run a
+message relay and point jobs at it with the platform setting:
+  global.cylc[platforms][<platform name>]message relay = SOCKET
+
+Jobs then hand their messages to the relay over the socket, and the relay
+sends the messages of all jobs of each workflow to its scheduler together.
+
+If the relay is not running, jobs send their messages directly. Messages are
+always written to the job status file first, so any that the relay fails to
+deliver will be picked up when the scheduler polls the job.
+
+The relay runs until interrupted (e.g. Ctrl-C or SIGTERM).
+
+Examples:
+  # run a relay on this host
+  $ cylc message-relay "/tmp/cylc-message-relay-${USER}.sock"
+"""
+
+import asyncio
+from contextlib import suppress
+import signal
+from typing import TYPE_CHECKING
+
+from cylc.flow.network.message_relay import MessageRelay
+from cylc.flow.option_parsers import CylcOptionParser as COP
+from cylc.flow.terminal import cli_function
+
+if TYPE_CHECKING:
+    from optparse import Values
+
+
+def get_option_parser() -> COP:
+    parser = COP(
+        __doc__,
+        comms=True,
+        argdoc=[('SOCKET', 'Path of the socket to listen on')],
+    )
+    parser.add_option(
+        '--interval',
+        metavar='SECONDS',
+        type=float,
+        default=1.0,
+        help=(
+            'Maximum time to hold messages for before sending them'
+            ' (default: %default).'
+        ),
+        action='store',
+        dest='interval',
+    )
+    parser.add_option(
+        '--max-batch-size',
+        metavar='N',
+        type=int,
+        default=1000,
+        help=(
+            'Maximum number of jobs to send messages for in one request'
+            ' (default: %default).'
+        ),
+        action='store',
+        dest='max_batch_size',
+    )
+    return parser
+
+
+async def run(relay: MessageRelay) -> None:
+    task = asyncio.ensure_future(relay.run())
+    loop = asyncio.get_event_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+    with suppress(asyncio.CancelledError):
+        await task
+
+
+@cli_function(get_option_parser)
+def main(parser: COP, options: 'Values', socket_path: str) -> None:
+    asyncio.run(run(MessageRelay(
+        socket_path,
+        interval=options.interval,
+        max_batch_size=options.max_batch_size,
+        timeout=options.comms_timeout,
+    )))
@@ -99,7 +99,7 @@ import asyncio
 import os
 import sqlite3
 import sys
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from cylc.flow.pathutil import get_cylc_run_dir
 from cylc.flow.id import Tokens
@@ -110,7 +110,10 @@ from cylc.flow.option_parsers import (
 )
 from cylc.flow import LOG
 from cylc.flow.command_polling import Poller
-from cylc.flow.dbstatecheck import CylcWorkflowDBChecker
+from cylc.flow.dbstatecheck import (
+    CylcWorkflowDBCache,
+    CylcWorkflowDBChecker,
+)
 from cylc.flow.terminal import cli_function
 from cylc.flow.workflow_files import infer_latest_run_from_id
 from cylc.flow.task_state import (
@@ -168,6 +171,7 @@ class WorkflowPoller(Poller):
         is_message: bool,
         old_format: bool = False,
         pretty_print: bool = False,
+        cache: Optional[CylcWorkflowDBCache] = None,
         **kwargs
     ):
         self.id_ = id_
@@ -178,6 +182,7 @@ class WorkflowPoller(Poller):
         self.pretty_print = pretty_print
         self.is_message = is_message
         self.is_trigger = is_trigger
+        self.cache = cache
 
         try:
             tokens = Tokens(self.id_)
@@ -247,24 +252,48 @@ class WorkflowPoller(Poller):
         if self.workflow_id is None and not self._find_workflow():
             return False
 
-        if self.db_checker is None:
+        if self.cache is None:
+            self.cycle, self.result = self._query()
+        else:
+            self.cycle, self.result = self.cache.get(
+                CylcWorkflowDBChecker.get_db_path(
+                    get_cylc_run_dir(self.alt_cylc_run_dir),
+                    self.workflow_id
+                ),
+                [
+                    self.task, self.cycle_raw, self.offset, self.selector,
+                    self.is_trigger, self.is_message, self.flow_num
+                ],
+                self._query,
+            )
+
+        if self.result is None:
+            # DB not connected
             return False
 
+        if self.result:
+            # End the polling dot stream and print inferred runN workflow ID.
+            # (Not via self.db_checker, which would connect to the DB even if
+            # the result came from the cache.)
+            CylcWorkflowDBChecker.display_maps(
+                self.result, self.old_format, self.pretty_print)
+
+        return bool(self.result)
+
+    def _query(self) -> Tuple[Optional[str], Optional[List[List[str]]]]:
+        """Query the workflow DB, return (DB cycle point, result)."""
+        if self.db_checker is None:
+            return self.cycle, None
+
         if self.cycle is None:
             # Adjust target cycle point to the DB format.
             self.cycle = self.db_checker.adjust_point_to_db(
                 self.cycle_raw, self.offset)
 
-        self.result = self.db_checker.workflow_state_query(
+        return self.cycle, self.db_checker.workflow_state_query(
             self.task, self.cycle, self.selector, self.is_trigger,
             self.is_message, self.flow_num
         )
-        if self.result:
-            # End the polling dot stream and print inferred runN workflow ID.
-            self.db_checker.display_maps(
-                self.result, self.old_format, self.pretty_print)
-
-        return bool(self.result)
 
 
 def get_option_parser() -> COP:
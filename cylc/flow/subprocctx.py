@@ -158,6 +158,8 @@ class SubFuncContext(SubProcContext):
         .intvl:
             function call interval in secs (how often to check the
             external trigger)
+        .src_dir:
+            workflow run directory (for local xtrigger modules)
         .ret_val
             function return: (satisfied?, result to pass to trigger tasks)
     """
@@ -186,12 +188,14 @@ class SubFuncContext(SubProcContext):
         self.ret_val: Tuple[
             bool, Optional[dict]
         ] = (False, None)  # (satisfied, broadcast)
+        self.src_dir: Optional[str] = None
         super(SubFuncContext, self).__init__(
             'xtrigger-func', cmd=[], shell=False
         )
 
     def update_command(self, workflow_run_dir):
         """Update the function wrap command after changes."""
+        self.src_dir = workflow_run_dir
         self.cmd = ['cylc', 'function-run',
                     self.mod_name,
                     self.func_name,
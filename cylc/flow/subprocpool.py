@@ -15,18 +15,27 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Manage queueing and pooling of subprocesses for the scheduler."""
 
+import asyncio
+import codecs
 from collections import deque
+from contextlib import redirect_stderr, redirect_stdout
+from inspect import iscoroutine
+from io import StringIO
 import json
+import multiprocessing
 import os
 import select
-from signal import SIGKILL
+from signal import SIGINT, SIGKILL, SIG_IGN, signal
 import sys
 import shlex
 from tempfile import SpooledTemporaryFile
 from threading import RLock
 from time import time
 from subprocess import DEVNULL, TimeoutExpired, run  # nosec
-from typing import TYPE_CHECKING, Any, Callable, List, Optional, Set
+import traceback
+from typing import (
+    TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+)
 
 from cylc.flow import LOG, iter_entry_points
 from cylc.flow.cfgspec.glbl_cfg import glbl_cfg
@@ -72,6 +81,48 @@ def _killpg(proc, signal):
     return True
 
 
+class _ProcWatch:
+    """Watch a running command using the asyncio event loop.
+
+    Command STDOUT/STDERR are read as soon as they are written and the
+    exit of the command is detected via a process file descriptor (the same
+    mechanism used by asyncio's PidfdChildWatcher), so the pool does not
+    need to poll running commands.
+
+    """
+
+    __slots__ = (
+        'loop', 'pidfd', 'fds', 'decoders', 'timer', 'err_xtra', 'timed_out'
+    )
+
+    def __init__(self, loop, pidfd: int) -> None:
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.pidfd: Optional[int] = pidfd
+        # {fileno: 'out'|'err'}
+        self.fds: Dict[int, str] = {}
+        # (decode incrementally, reads may split multi-byte characters)
+        self.decoders = {
+            'out': codecs.getincrementaldecoder('utf-8')(),
+            'err': codecs.getincrementaldecoder('utf-8')(),
+        }
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.err_xtra = ''
+        self.timed_out = False
+
+    def close(self) -> None:
+        """Stop watching the command."""
+        for fileno in self.fds:
+            self.loop.remove_reader(fileno)
+        self.fds.clear()
+        if self.pidfd is not None:
+            self.loop.remove_reader(self.pidfd)
+            os.close(self.pidfd)
+            self.pidfd = None
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
 def get_xtrig_mod(mod_name, src_dir):
     """Find, cache, and return a named xtrigger module.
 
@@ -148,6 +199,9 @@ def run_function(mod_name, func_name, json_args, json_kwargs, src_dir):
     orig_stdout = sys.stdout
     sys.stdout = sys.stderr
     res = func(*func_args, **func_kwargs)
+    if iscoroutine(res):
+        # Async xtrigger function.
+        res = asyncio.run(res)
 
     # Restore stdout.
     sys.stdout = orig_stdout
@@ -156,6 +210,265 @@ def run_function(mod_name, func_name, json_args, json_kwargs, src_dir):
     sys.stdout.write(json.dumps(res))
 
 
+def run_function_call(
+    mod_name: str,
+    func_name: str,
+    func_args: list,
+    func_kwargs: dict,
+    src_dir: str,
+) -> Tuple[int, str, str]:
+    """Run a Python function in this process.
+
+    This is the equivalent of run_function for use in a long-lived worker
+    process (see FunctionWorkerPool).
+
+    Function stdout and stderr are captured and returned as stderr.
+
+    Returns:
+        (ret_code, out, err) where out is the function return value as a
+        JSON string (as written to stdout by "cylc function-run").
+
+    """
+    err = StringIO()
+    try:
+        func = get_xtrig_func(mod_name, func_name, src_dir)
+        with redirect_stdout(err), redirect_stderr(err):
+            res = func(*func_args, **func_kwargs)
+            if iscoroutine(res):
+                # Async xtrigger function.
+                res = asyncio.run(res)
+        out = json.dumps(res)
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else 1
+        return code, '', err.getvalue()
+    except Exception:
+        err.write(traceback.format_exc())
+        return 1, '', err.getvalue()
+    return 0, out, err.getvalue()
+
+
+def _function_worker_main(conn) -> None:
+    """Main loop of a FunctionWorkerPool worker process.
+
+    Receives function calls, runs them and sends back the results.
+    """
+    # Ctrl-C in the terminal is for the scheduler not its workers.
+    signal(SIGINT, SIG_IGN)
+    while True:
+        try:
+            call = conn.recv()
+        except EOFError:
+            break
+        if call is None:
+            break
+        conn.send(run_function_call(*call))
+
+
+class _FunctionWorker:
+    """A worker process owned by a FunctionWorkerPool."""
+
+    def __init__(self, mp_context) -> None:
+        self.conn, child_conn = mp_context.Pipe()
+        self.proc = mp_context.Process(
+            target=_function_worker_main,
+            args=(child_conn,),
+            daemon=True,
+        )
+        self.proc.start()
+        child_conn.close()
+        # The call currently being run: [ctx, callback, callback_args]
+        self.item: Optional[list] = None
+        # Retire this worker once the current call has completed.
+        self.retire = False
+
+    def run(self, item: list) -> None:
+        """Send a function call to the worker."""
+        ctx = item[0]
+        self.item = item
+        self.conn.send((
+            ctx.mod_name,
+            ctx.func_name,
+            ctx.func_args,
+            ctx.func_kwargs,
+            ctx.src_dir,
+        ))
+
+    def stop(self, kill: bool = False) -> None:
+        """Tell the worker process to stop (see join)."""
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                kill = True
+        if kill:
+            self.proc.kill()
+
+    def join(self, timeout: float) -> None:
+        """Wait for the worker process to stop, kill it on timeout."""
+        self.proc.join(timeout=timeout)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+        self.conn.close()
+
+
+class FunctionWorkerPool:
+    """Run xtrigger functions in a pool of long-lived worker processes.
+
+    The SubProcPool runs xtrigger functions via "cylc function-run" which
+    starts a new Python interpreter and imports the xtrigger module for each
+    call. Workers in this pool keep xtrigger modules imported between
+    calls.
+
+    Each call still runs outside of the scheduler process. Calls which
+    exceed the timeout, and calls which crash their worker, have their
+    worker killed and replaced.
+
+    Results are returned via the SubFuncContext in the same way as for
+    "cylc function-run" (i.e. ret_code, JSON out and err).
+
+    """
+
+    def __init__(self, size: int, timeout: float) -> None:
+        self.size = size
+        self.timeout = timeout
+        self.queuings: 'Deque[list]' = deque()
+        self.workers: List[_FunctionWorker] = []
+        # Use "spawn" as the scheduler is multi-threaded.
+        self._mp_context = multiprocessing.get_context('spawn')
+
+    def is_not_done(self) -> bool:
+        """Return True if any calls are queued or running."""
+        return bool(
+            self.queuings
+            or any(worker.item for worker in self.workers)
+        )
+
+    def put(self, ctx: 'SubFuncContext', callback, callback_args) -> None:
+        """Queue a function call."""
+        self.queuings.append([ctx, callback, callback_args])
+
+    def process(self) -> List[list]:
+        """Collect finished calls and start queued ones.
+
+        Returns:
+            List of [ctx, callback, callback_args] for finished calls.
+
+        """
+        done: List[list] = []
+        for worker in list(self.workers):
+            if worker.item is None:
+                continue
+            ctx = worker.item[0]
+            if worker.conn.poll():
+                try:
+                    ctx.ret_code, ctx.out, ctx.err = worker.conn.recv()
+                except (EOFError, OSError):
+                    # Worker died, e.g. the function called os._exit.
+                    self._replace(worker)
+                    ctx.ret_code = worker.proc.exitcode or 1
+                    ctx.out = ''
+                    ctx.err = 'xtrigger worker process exited unexpectedly'
+            elif not worker.proc.is_alive():
+                self._replace(worker)
+                ctx.ret_code = worker.proc.exitcode or 1
+                ctx.out = ''
+                ctx.err = 'xtrigger worker process exited unexpectedly'
+            elif time() > ctx.timeout:
+                self._replace(worker, kill=True)
+                ctx.ret_code = -SIGKILL
+                ctx.out = ''
+                ctx.err = f"killed on timeout ({self.timeout})"
+            else:
+                # Still running.
+                continue
+            ctx.err = ctx.err or None
+            done.append(worker.item)
+            worker.item = None
+            if worker.retire:
+                self._replace(worker)
+
+        # Start queued calls on idle workers.
+        while self.queuings:
+            idle_worker: Optional[_FunctionWorker] = self._get_idle_worker()
+            if idle_worker is None:
+                break
+            item = self.queuings.popleft()
+            item[0].timeout = time() + self.timeout
+            LOG.debug(item[0].cmd)
+            idle_worker.run(item)
+        return done
+
+    def _get_idle_worker(self) -> Optional[_FunctionWorker]:
+        """Return an idle worker, starting a new one if there is space."""
+        for worker in self.workers:
+            if worker.item is None:
+                return worker
+        if len(self.workers) < self.size:
+            worker = _FunctionWorker(self._mp_context)
+            self.workers.append(worker)
+            return worker
+        return None
+
+    def _replace(self, worker: _FunctionWorker, kill: bool = False) -> None:
+        """Stop a worker and remove it from the pool.
+
+        A replacement is started on demand by _get_idle_worker.
+        """
+        self._stop_workers([worker], kill=kill)
+
+    def _stop_workers(
+        self, workers: List[_FunctionWorker], kill: bool = False
+    ) -> None:
+        """Stop workers and remove them from the pool.
+
+        All of the workers are told to stop before waiting for any of them,
+        so they share the (1 second) wait.
+        """
+        for worker in workers:
+            self.workers.remove(worker)
+            worker.stop(kill=kill or worker.item is not None)
+        deadline = time() + 1
+        for worker in workers:
+            worker.join(timeout=max(deadline - time(), 0))
+
+    def recycle(self) -> None:
+        """Restart workers so that xtrigger modules are re-imported.
+
+        Idle workers are stopped now, busy ones once their call completes.
+        """
+        idle = []
+        for worker in self.workers:
+            if worker.item is None:
+                idle.append(worker)
+            else:
+                worker.retire = True
+        self._stop_workers(idle)
+
+    def terminate(self) -> List[list]:
+        """Kill all workers and drain the queue.
+
+        Returns:
+            List of [ctx, callback, callback_args] for running and queued
+            calls, which have not been run to completion.
+
+        """
+        items = list(self.queuings)
+        self.queuings.clear()
+        for worker in self.workers:
+            if worker.item is not None:
+                items.append(worker.item)
+                worker.item = None
+        self._stop_workers(list(self.workers), kill=True)
+        return items
+
+    def close(self) -> None:
+        """Stop idle workers."""
+        self._stop_workers(
+            [worker for worker in self.workers if worker.item is None]
+        )
+
+
 class SubProcPool:
     """Manage queueing and pooling of subprocesses.
 
@@ -174,6 +487,16 @@ class SubProcPool:
     SubProcContext object as they are read. STDIN can also be specified for the
     command. This is currently fed into the command using a temporary file.
 
+    When the pool is run in an asyncio event loop (i.e. by the scheduler),
+    running commands are watched using the event loop: STDOUT/STDERR are read
+    as they are written and the exit of a command is noticed as soon as it
+    happens, rather than on the next call to SubProcPool.process. Exited
+    commands are handed back to SubProcPool.process which runs their
+    callbacks and launches queued commands, the `on_exit` hook can be used to
+    have this called promptly (e.g. by waking the main loop). Elsewhere
+    (or on platforms without pidfd support) running commands are polled by
+    SubProcPool.process.
+
     Note: For a cylc command that uses
     `cylc.flow.option_parsers.CylcOptionParser`, the default logging handler
     writes to the STDERR via a StreamHandler. Therefore, log messages will
@@ -197,6 +520,16 @@ class SubProcPool:
         self.stopping_lock = RLock()
         self.queuings = deque()
         self.runnings = []
+        # Watched commands which have exited, awaiting their callbacks.
+        self.exited: 'Deque[list]' = deque()
+        # Called when a watched command exits.
+        self.on_exit: Optional[Callable[[], None]] = None
+        self.func_pool: Optional[FunctionWorkerPool] = None
+        func_pool_size = glbl_cfg().get(
+            ['scheduler', 'xtrigger worker pool size'])
+        if func_pool_size:
+            self.func_pool = FunctionWorkerPool(
+                func_pool_size, self.proc_pool_timeout)
         try:
             self.pipepoller = select.poll()
         except AttributeError:  # select.poll not implemented for this OS
@@ -206,6 +539,8 @@ class SubProcPool:
         """Close pool."""
         self.set_stopping()
         self.closed = True
+        if self.func_pool:
+            self.func_pool.close()
 
     @staticmethod
     def get_temporary_file():
@@ -214,7 +549,20 @@ class SubProcPool:
 
     def is_not_done(self):
         """Return True if queuings or runnings not empty."""
-        return self.queuings or self.runnings
+        return (
+            self.queuings
+            or self.runnings
+            or self.exited
+            or (self.func_pool and self.func_pool.is_not_done())
+        )
+
+    def recycle_function_workers(self):
+        """Restart xtrigger function workers (e.g. on reload).
+
+        This ensures that changes to xtrigger modules are picked up.
+        """
+        if self.func_pool:
+            self.func_pool.recycle()
 
     def _is_stopping(self):
         """Return whether .stopping is True or not.
@@ -235,10 +583,16 @@ class SubProcPool:
         bad_hosts: Optional[Set[str]] = None,
         callback_255: Optional[Callable] = None,
         callback_255_args: Optional[list] = None,
+        watch: Optional[_ProcWatch] = None,
     ):
         """Get ret_code, out, err of exited command, and call its callback."""
         ctx.ret_code = proc.wait()
-        out, err = (f.decode() for f in proc.communicate())
+        out_bytes, err_bytes = proc.communicate()
+        if watch is None:
+            out, err = out_bytes.decode(), err_bytes.decode()
+        else:
+            out = watch.decoders['out'].decode(out_bytes, final=True)
+            err = watch.decoders['err'].decode(err_bytes, final=True)
         if out:
             if ctx.out is None:
                 ctx.out = ''
@@ -258,14 +612,35 @@ class SubProcPool:
 
     def process(self):
         """Process done child processes and submit more."""
-        # Handle child processes that are done
+        # Handle watched child processes that have exited
+        while self.exited:
+            (
+                proc, ctx, bad_hosts,
+                callback, callback_args,
+                callback_255, callback_255_args,
+                watch
+            ) = self.exited.popleft()
+            self._proc_exit(
+                proc, watch.err_xtra, ctx,
+                callback=callback, callback_args=callback_args,
+                bad_hosts=bad_hosts,
+                callback_255=None if watch.timed_out else callback_255,
+                callback_255_args=callback_255_args,
+                watch=watch
+            )
+        # Handle other child processes that are done
         runnings = []
         for running in self.runnings:
             (
                 proc, ctx, bad_hosts,
                 callback, callback_args,
-                callback_255, callback_255_args
+                callback_255, callback_255_args,
+                watch
             ) = running
+            if watch is not None and watch.pidfd is not None:
+                # Watched, see _watch_exit
+                runnings.append(running)
+                continue
             # Command completed/exited
             if proc.poll() is not None:
                 self._proc_exit(
@@ -273,7 +648,8 @@ class SubProcPool:
                     callback=callback, callback_args=callback_args,
                     bad_hosts=bad_hosts,
                     callback_255=callback_255,
-                    callback_255_args=callback_255_args
+                    callback_255_args=callback_255_args,
+                    watch=watch
                 )
                 continue
             # Command timed out, kill it
@@ -287,34 +663,50 @@ class SubProcPool:
                     proc, err_xtra, ctx,
                     callback=callback,
                     callback_args=callback_args,
-                    bad_hosts=bad_hosts
+                    bad_hosts=bad_hosts,
+                    watch=watch
                 )
                 continue
             # Command still running, see if STDOUT/STDERR are readable or not
-            runnings.append(
-                [
-                    proc,
-                    ctx,
-                    bad_hosts,
-                    callback,
-                    callback_args,
-                    callback_255,
-                    callback_255_args,
-                ]
-            )
+            runnings.append(running)
             # Unblock proc's STDOUT/STDERR if necessary. Otherwise, a full
             # STDOUT or STDERR may stop command from proceeding.
-            self._poll_proc_pipes(proc, ctx)
+            self._poll_proc_pipes(proc, ctx, watch)
 
         # Update list of running items
         self.runnings[:] = runnings
+        # Handle xtrigger functions run in the function worker pool
+        if self.func_pool:
+            for ctx, callback, callback_args in self.func_pool.process():
+                LOG.debug(ctx.dump())
+                self._run_command_exit(
+                    ctx, callback=callback, callback_args=callback_args)
         # Create more child processes, if items in queue and space in pool
+        self.start_queued()
+
+    def start_queued(self, cmd_key: Optional[str] = None) -> None:
+        """Start queued commands while there is space in the pool.
+
+        Unlike process, this does not handle commands which have finished,
+        so the only callbacks it calls are those of commands which could not
+        be started.
+
+        Args:
+            cmd_key: Only start commands of this kind (others keep their
+                place in the queue).
+
+        """
         stopping = self._is_stopping()
+        skipped: Deque[list] = deque()
         while self.queuings and len(self.runnings) < self.size:
+            item = self.queuings.popleft()
             (
                 ctx, bad_hosts, callback, callback_args,
                 callback_255, callback_255_args
-            ) = self.queuings.popleft()
+            ) = item
+            if cmd_key is not None and ctx.cmd_key != cmd_key:
+                skipped.append(item)
+                continue
             if stopping and ctx.cmd_key == self.JOBS_SUBMIT:
                 ctx.err = self.ERR_WORKFLOW_STOPPING
                 ctx.ret_code = self.RET_CODE_WORKFLOW_STOPPING
@@ -326,10 +718,80 @@ class SubProcPool:
                 )
                 if proc is not None:
                     ctx.timeout = time() + self.proc_pool_timeout
-                    self.runnings.append([
+                    running = [
                         proc, ctx, bad_hosts, callback, callback_args,
-                        callback_255, callback_255_args
-                    ])
+                        callback_255, callback_255_args, None
+                    ]
+                    self.runnings.append(running)
+                    self._watch(running)
+        self.queuings.extendleft(reversed(skipped))
+
+    def _watch(self, running: list) -> None:
+        """Watch a running command using the asyncio event loop.
+
+        If there is no running event loop, or process file descriptors are
+        not supported, the command is left to be polled by process.
+        """
+        if not hasattr(os, 'pidfd_open'):
+            # Linux only
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        proc = running[0]
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except OSError:
+            # e.g. not supported by the kernel
+            return
+        watch = _ProcWatch(loop, pidfd)
+        running[7] = watch
+        for handle, key in ((proc.stdout, 'out'), (proc.stderr, 'err')):
+            fileno = handle.fileno()
+            watch.fds[fileno] = key
+            loop.add_reader(fileno, self._watch_read, running, fileno)
+        watch.timer = loop.call_later(
+            self.proc_pool_timeout, self._watch_timeout, running)
+        # The pidfd becomes readable when the process exits.
+        loop.add_reader(pidfd, self._watch_exit, running)
+
+    @staticmethod
+    def _watch_read(running: list, fileno: int) -> None:
+        """Read some data from the STDOUT/ERR of a watched command."""
+        ctx, watch = running[1], running[7]
+        try:
+            data = os.read(fileno, 65536)  # 64K
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            # end of file
+            watch.loop.remove_reader(fileno)
+            del watch.fds[fileno]
+            return
+        key = watch.fds[fileno]
+        text = watch.decoders[key].decode(data)
+        if getattr(ctx, key) is None:
+            setattr(ctx, key, '')
+        setattr(ctx, key, getattr(ctx, key) + text)
+
+    def _watch_timeout(self, running: list) -> None:
+        """Kill a watched command which has exceeded the timeout."""
+        proc, watch = running[0], running[7]
+        watch.timer = None
+        watch.timed_out = True
+        if _killpg(proc, SIGKILL):
+            watch.err_xtra = f"\nkilled on timeout ({self.proc_pool_timeout})"
+
+    def _watch_exit(self, running: list) -> None:
+        """Hand a watched command which has exited back to process."""
+        running[7].close()
+        self.runnings.remove(running)
+        self.exited.append(running)
+        if self.on_exit is not None:
+            self.on_exit()
 
     def put_command(
         self, ctx, bad_hosts=None, callback=None, callback_args=None,
@@ -356,6 +818,8 @@ class SubProcPool:
                 callback=callback, callback_args=callback_args,
                 callback_255=callback_255, callback_255_args=callback_255_args
             )
+        elif self.func_pool and isinstance(ctx, SubFuncContext):
+            self.func_pool.put(ctx, callback, callback_args)
         else:
             self.queuings.append(
                 [
@@ -412,21 +876,40 @@ class SubProcPool:
             ctx.err = self.ERR_WORKFLOW_STOPPING
             ctx.ret_code = self.RET_CODE_WORKFLOW_STOPPING
             self._run_command_exit(ctx)
+        # Kill xtrigger function workers
+        if self.func_pool:
+            for ctx, callback, callback_args in self.func_pool.terminate():
+                ctx.err = self.ERR_WORKFLOW_STOPPING
+                ctx.ret_code = self.RET_CODE_WORKFLOW_STOPPING
+                self._run_command_exit(
+                    ctx, callback=callback, callback_args=callback_args)
         # Kill remaining processes
         for value in self.runnings:
-            proc = value[0]
+            proc, watch = value[0], value[7]
+            if watch is not None:
+                # stop watching, the processes are waited for below
+                watch.close()
             if proc:
                 _killpg(proc, SIGKILL)
         # Wait for child processes
         self.process()
 
-    def _poll_proc_pipes(self, proc, ctx):
+    def _poll_proc_pipes(self, proc, ctx, watch=None):
         """Poll STDOUT/ERR of proc and read some data if possible.
 
         This helps to unblock the command by unblocking its pipes.
         """
         if self.pipepoller is None:
             return  # select.poll not supported on this OS
+        if watch is not None:
+            # Pipes have been read by _watch_read, the decoders may hold
+            # partial characters so carry on using them.
+            decode = {
+                proc.stdout.fileno(): watch.decoders['out'].decode,
+                proc.stderr.fileno(): watch.decoders['err'].decode,
+            }
+        else:
+            decode = None
         for handle in [proc.stdout, proc.stderr]:
             if not handle.closed:
                 self.pipepoller.register(handle.fileno(), self.POLLREAD)
@@ -448,10 +931,14 @@ class SubProcPool:
                 # 2. Call os.read only once after a poll. Poll again before
                 #    another read - otherwise the os.read call may block.
                 try:
-                    data = os.read(fileno, 65536).decode()  # 64K
+                    data_bytes = os.read(fileno, 65536)  # 64K
                 except OSError:
                     continue
-                received_data.append(data != '')
+                if decode is None:
+                    data = data_bytes.decode()
+                else:
+                    data = decode[fileno](data_bytes)
+                received_data.append(data_bytes != b'')
                 if fileno == proc.stdout.fileno():
                     if ctx.out is None:
                         ctx.out = ''
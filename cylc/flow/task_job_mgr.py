@@ -24,7 +24,13 @@ This module provides logic to:
 * Prepare jobs poll/kill, and manage the callbacks.
 """
 
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
 from contextlib import suppress
+from itertools import chain
 import json
 from logging import (
     CRITICAL,
@@ -40,14 +46,17 @@ from typing import (
     Any,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
+    Set,
     Tuple,
     Union,
     cast,
 )
 
 from cylc.flow import LOG
+from cylc.flow.cfgspec.glbl_cfg import glbl_cfg
 from cylc.flow.cfgspec.globalcfg import SYSPATH
 from cylc.flow.exceptions import (
     NoHostsError,
@@ -60,6 +69,7 @@ from cylc.flow.hostuserutil import (
     get_host,
     is_remote_platform,
 )
+from cylc.flow.job_cmd_batcher import JobCommandBatcher
 from cylc.flow.job_file import JobFileWriter
 from cylc.flow.job_runner_mgr import JOB_FILES_REMOVED_MESSAGE, JobPollContext
 from cylc.flow.pathutil import get_remote_workflow_run_job_dir
@@ -69,6 +79,7 @@ from cylc.flow.platforms import (
     get_localhost_install_target,
     get_platform,
 )
+from cylc.flow.profiler import MainLoopTimings
 from cylc.flow.remote import construct_ssh_cmd
 from cylc.flow.run_modes import (
     WORKFLOW_ONLY_MODES,
@@ -170,6 +181,7 @@ class TaskJobManager:
         data_store_mgr,
         bad_hosts,
         server,
+        timings: Optional[MainLoopTimings] = None,
     ):
         self.workflow: str = workflow
         self.proc_pool = proc_pool
@@ -178,11 +190,26 @@ class TaskJobManager:
         self.data_store_mgr: DataStoreMgr = data_store_mgr
         self.job_file_writer = JobFileWriter()
         self.job_runner_mgr = self.job_file_writer.job_runner_mgr
+        self.timings: MainLoopTimings = timings or MainLoopTimings()
+        self.job_file_executor: Optional[ThreadPoolExecutor] = None
+        job_file_threads = glbl_cfg().get(
+            ['scheduler', 'job file writer threads'])
+        if job_file_threads:
+            self.job_file_executor = ThreadPoolExecutor(
+                max_workers=job_file_threads,
+                thread_name_prefix='job-file-writer',
+            )
         self.bad_hosts = bad_hosts
-        self.bad_hosts_to_clear = set()
+        self.bad_hosts_to_clear: Set[str] = set()
         self.task_remote_mgr = TaskRemoteMgr(
             workflow, proc_pool, self.bad_hosts, self.workflow_db_mgr, server
         )
+        self.job_cmd_batcher = JobCommandBatcher()
+
+    def close(self) -> None:
+        """Stop the job file writer threads."""
+        if self.job_file_executor:
+            self.job_file_executor.shutdown()
 
     def check_task_jobs(self, task_pool):
         """Check submission and execution timeout and polling timers.
@@ -258,8 +285,26 @@ class TaskJobManager:
 
         Return (good_tasks, bad_tasks)
         """
+        prepared_tasks, bad_tasks, to_write = (
+            self._prep_submit_task_job_confs(itasks)
+        )
+        for itasks_ in self._iter_job_files(to_write, bad_tasks, check_syntax):
+            prepared_tasks.extend(itasks_)
+        return (prepared_tasks, bad_tasks)
+
+    def _prep_submit_task_job_confs(
+        self,
+        itasks: 'Iterable[TaskProxy]',
+    ) -> 'Tuple[List[TaskProxy], List[TaskProxy], Dict[str, List[TaskProxy]]]':
+        """Prepare task job configs for submit, but not the job files.
+
+        Return (good_tasks, bad_tasks, to_write) where good_tasks already
+        have job files and to_write maps platform names to tasks whose job
+        files need to be written (see _iter_job_files).
+        """
         prepared_tasks = []
         bad_tasks = []
+        to_write: 'Dict[str, List[TaskProxy]]' = {}
         for itask in itasks:
             if not itask.state(TASK_STATUS_PREPARING):
                 # bump the submit_num *before* resetting the state so that the
@@ -268,13 +313,156 @@ class TaskJobManager:
                 itask.state_reset(TASK_STATUS_PREPARING)
                 self.data_store_mgr.delta_task_state(itask)
             prep_task = self._prep_submit_task_job(
-                itask, check_syntax=check_syntax
+                itask, write_job_file=False
             )
             if prep_task:
-                prepared_tasks.append(itask)
+                if itask.local_job_file_path:
+                    prepared_tasks.append(itask)
+                else:
+                    to_write.setdefault(
+                        itask.platform['name'], []
+                    ).append(itask)
             elif prep_task is False:
                 bad_tasks.append(itask)
-        return (prepared_tasks, bad_tasks)
+        return (prepared_tasks, bad_tasks, to_write)
+
+    def _iter_job_files(
+        self,
+        to_write: 'Dict[str, List[TaskProxy]]',
+        bad_tasks: 'List[TaskProxy]',
+        check_syntax: bool = True,
+    ) -> 'Iterator[List[TaskProxy]]':
+        """Write job files, yielding batches of tasks as they are written.
+
+        Tasks are written in batches of up to the platform's "max batch
+        submit size". If "[scheduler]job file writer threads" is set, the
+        batches are written concurrently and each is yielded as soon as it is
+        done (the jobs of batches already yielded are submitted while waiting
+        for the rest, see _start_job_submits), otherwise they are written in
+        turn.
+
+        Tasks whose job files could not be written are appended to bad_tasks.
+
+        Args:
+            to_write: Tasks to write job files for, by platform name.
+            bad_tasks: List of tasks which failed preparation.
+            check_syntax: Check the syntax of job files.
+
+        """
+        batches = [
+            itasks[i:i + size]
+            for itasks in to_write.values()
+            for size in [max(1, itasks[0].platform['max batch submit size'])]
+            for i in range(0, len(itasks), size)
+        ]
+        if not self.job_file_executor:
+            for itasks in batches:
+                with self.timings.time('job_submit_write_files'):
+                    errors = self._write_job_files(itasks, check_syntax)
+                yield self._job_files_written(itasks, errors, bad_tasks)
+            return
+
+        futures = {
+            self.job_file_executor.submit(
+                self._write_job_files, itasks, check_syntax
+            ): itasks
+            for itasks in batches
+        }
+        not_done = set(futures)
+        while not_done:
+            self._start_job_submits()
+            with self.timings.time('job_submit_write_files'):
+                done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+            LOG.debug(
+                f'job files: {len(done)} batch(es) written,'
+                f' {len(not_done)} batch(es) being written,'
+                f' {len(self.proc_pool.queuings)} command(s) queued'
+            )
+            for future in done:
+                itasks = futures[future]
+                yield self._job_files_written(
+                    itasks, future.result(), bad_tasks
+                )
+
+    def _write_job_files(
+        self,
+        itasks: 'List[TaskProxy]',
+        check_syntax: bool = True,
+    ) -> 'List[Optional[Exception]]':
+        """Create job log directories and write job files for tasks.
+
+        This may be called in a job file writer thread, so it must not change
+        anything other than the files.
+
+        Returns:
+            The error for each task whose job file could not be written,
+            else None.
+
+        """
+        errors: 'List[Optional[Exception]]' = []
+        for itask in itasks:
+            try:
+                self._create_job_log_path(itask)
+                self.job_file_writer.write(
+                    get_task_job_job_log(
+                        self.workflow,
+                        itask.point,
+                        itask.tdef.name,
+                        itask.submit_num,
+                    ),
+                    itask.jobs[-1],
+                    check_syntax=check_syntax,
+                )
+            except Exception as exc:
+                errors.append(exc)
+            else:
+                errors.append(None)
+        return errors
+
+    def _start_job_submits(self) -> None:
+        """Start queued "cylc jobs-submit" commands.
+
+        This is for batches submitted while more job files are being written,
+        rather than waiting for the main loop. The jobs are recorded in the
+        database first, so that a restart knows about them even if the
+        scheduler is killed.
+        """
+        if any(
+            item[0].cmd_key == self.JOBS_SUBMIT
+            for item in self.proc_pool.queuings
+        ):
+            self.workflow_db_mgr.sync_queued_ops()
+            self.proc_pool.start_queued(self.JOBS_SUBMIT)
+
+    def _job_files_written(
+        self,
+        itasks: 'List[TaskProxy]',
+        errors: 'List[Optional[Exception]]',
+        bad_tasks: 'List[TaskProxy]',
+    ) -> 'List[TaskProxy]':
+        """Handle the results of _write_job_files.
+
+        Return the tasks whose job files were written; append the others to
+        bad_tasks.
+        """
+        prepared_tasks = []
+        for itask, exc in zip(itasks, errors):
+            if exc is None:
+                itask.local_job_file_path = get_task_job_job_log(
+                    self.workflow,
+                    itask.point,
+                    itask.tdef.name,
+                    itask.submit_num,
+                )
+                prepared_tasks.append(itask)
+            else:
+                # Could be a bad command template, IOError, etc
+                itask.waiting_on_job_prep = False
+                self._prep_submit_task_job_error(
+                    itask, '(prepare job file)', exc
+                )
+                bad_tasks.append(itask)
+        return prepared_tasks
 
     def submit_task_jobs(
         self,
@@ -308,96 +496,69 @@ class TaskJobManager:
         Once preparation has completed or failed, reset .waiting_on_job_prep in
         task instances so the scheduler knows to stop sending them back here.
 
-        This method uses prep_submit_task_jobs() as helper.
+        Job files are written in batches (see _iter_job_files). If they are
+        written in threads, the "cylc jobs-submit" command for each batch is
+        started while the next batches are written, otherwise the commands
+        are started by the main loop.
 
         Return: tasks that attempted submission.
         """
-        done_tasks: 'List[TaskProxy]' = []
-        # Mapping of platforms to task proxies:
-        auth_itasks: 'Dict[str, List[TaskProxy]]' = {}
-
-        prepared_tasks, bad_tasks = self.prep_submit_task_jobs(itasks)
+        with self.timings.time('job_submit_prepare'):
+            prepared_tasks, bad_tasks, to_write = (
+                self._prep_submit_task_job_confs(itasks)
+            )
 
         # Reset consumed host selection results
         self.task_remote_mgr.subshell_eval_reset()
 
-        if not prepared_tasks:
-            return bad_tasks
-
-        for itask in prepared_tasks:
-            auth_itasks.setdefault(itask.platform['name'], []).append(itask)
-
         # Submit task jobs for each platform
         # Non-prepared tasks can be considered done for now:
         done_tasks = bad_tasks
 
-        for _, itasks in sorted(auth_itasks.items()):
-            platform = self._get_platform_with_good_host(itasks, done_tasks)
-            if not platform:
-                continue
+        for itasks in chain(
+            [prepared_tasks],
+            self._iter_job_files(to_write, done_tasks, check_syntax=True),
+        ):
+            auth_itasks: 'Dict[str, List[TaskProxy]]' = {}
+            for itask in itasks:
+                auth_itasks.setdefault(
+                    itask.platform['name'], []
+                ).append(itask)
+            for _, platform_itasks in sorted(auth_itasks.items()):
+                with self.timings.time('job_submit_queue'):
+                    self._submit_platform_task_jobs(
+                        platform_itasks, done_tasks
+                    )
+        return done_tasks
 
-            install_target = get_install_target_from_platform(platform)
-            ri_map = self.task_remote_mgr.remote_init_map
-
-            if ri_map.get(install_target) != REMOTE_FILE_INSTALL_DONE:
-                if install_target == get_localhost_install_target():
-                    # Skip init and file install for localhost.
-                    LOG.debug(f"REMOTE INIT NOT REQUIRED for {install_target}")
-                    ri_map[install_target] = (REMOTE_FILE_INSTALL_DONE)
-
-                elif install_target not in ri_map:
-                    # Remote init not in progress for target, so start it.
-                    self.task_remote_mgr.remote_init(platform)
-                    for itask in itasks:
-                        self.data_store_mgr.delta_job_msg(
-                            itask.tokens.duplicate(
-                                job=str(itask.submit_num)
-                            ),
-                            self.REMOTE_INIT_MSG,
-                        )
-                    continue
+    def _submit_platform_task_jobs(
+        self,
+        itasks: 'List[TaskProxy]',
+        done_tasks: 'List[TaskProxy]',
+    ) -> None:
+        """Submit prepared task jobs for a platform.
 
-                elif ri_map[install_target] == REMOTE_INIT_DONE:
-                    # Already done remote init so move on to file install
-                    self.task_remote_mgr.file_install(platform)
-                    continue
+        Remote init and file installation are started for the platform's
+        install target if required, otherwise "cylc jobs-submit" commands are
+        queued in the process pool.
 
-                elif ri_map[install_target] in self.IN_PROGRESS:
-                    # Remote init or file install in progress.
-                    for itask in itasks:
-                        msg = self.IN_PROGRESS[ri_map[install_target]]
-                        self.data_store_mgr.delta_job_msg(
-                            itask.tokens.duplicate(job=str(itask.submit_num)),
-                            msg
-                        )
-                    continue
-                elif ri_map[install_target] == REMOTE_INIT_255:
-                    # Remote init previously failed because a host was
-                    # unreachable, so start it again.
-                    del ri_map[install_target]
-                    self.task_remote_mgr.remote_init(platform)
-                    for itask in itasks:
-                        self.data_store_mgr.delta_job_msg(
-                            itask.tokens.duplicate(
-                                job=str(itask.submit_num)
-                            ),
-                            self.REMOTE_INIT_MSG
-                        )
-                    continue
+        Tasks that attempted submission are appended to done_tasks.
+        """
+        platform = self._get_platform_with_good_host(itasks, done_tasks)
+        if not platform:
+            return
 
-            # Ensure that localhost background/at jobs are recorded as running
-            # on the host name of the current workflow host, rather than just
-            # "localhost". On restart on a different workflow host, this
-            # allows the restart logic to correctly poll the status of the
-            # background/at jobs that may still be running on the previous
-            # workflow host.
-            try:
-                host = get_host_from_platform(
-                    platform,
-                    bad_hosts=self.task_remote_mgr.bad_hosts
-                )
-            except NoHostsError:
-                del ri_map[install_target]
+        install_target = get_install_target_from_platform(platform)
+        ri_map = self.task_remote_mgr.remote_init_map
+
+        if ri_map.get(install_target) != REMOTE_FILE_INSTALL_DONE:
+            if install_target == get_localhost_install_target():
+                # Skip init and file install for localhost.
+                LOG.debug(f"REMOTE INIT NOT REQUIRED for {install_target}")
+                ri_map[install_target] = (REMOTE_FILE_INSTALL_DONE)
+
+            elif install_target not in ri_map:
+                # Remote init not in progress for target, so start it.
                 self.task_remote_mgr.remote_init(platform)
                 for itask in itasks:
                     self.data_store_mgr.delta_job_msg(
@@ -406,161 +567,216 @@ class TaskJobManager:
                         ),
                         self.REMOTE_INIT_MSG,
                     )
-                continue
+                return
 
-            if self.job_runner_mgr.is_job_local_to_host(
-                itask.summary['job_runner_name']
-            ) and not is_remote_platform(platform):
-                host = get_host()
+            elif ri_map[install_target] == REMOTE_INIT_DONE:
+                # Already done remote init so move on to file install
+                self.task_remote_mgr.file_install(platform)
+                return
 
-            done_tasks.extend(itasks)
-            for itask in itasks:
-                # Log and persist
-                LOG.debug(f"[{itask}] host={host}")
-                self.workflow_db_mgr.put_insert_task_jobs(itask, {
-                    'flow_nums': serialise_set(itask.flow_nums),
-                    'is_manual_submit': itask.is_manual_submit,
-                    'try_num': itask.get_try_num(),
-                    'time_submit': get_current_time_string(),
-                    'platform_name': itask.platform['name'],
-                    'job_runner_name': itask.summary['job_runner_name'],
-                })
-
-                itask.is_manual_submit = False
-
-            if ri_map[install_target] == REMOTE_FILE_INSTALL_255:
+            elif ri_map[install_target] in self.IN_PROGRESS:
+                # Remote init or file install in progress.
+                for itask in itasks:
+                    msg = self.IN_PROGRESS[ri_map[install_target]]
+                    self.data_store_mgr.delta_job_msg(
+                        itask.tokens.duplicate(job=str(itask.submit_num)),
+                        msg
+                    )
+                return
+            elif ri_map[install_target] == REMOTE_INIT_255:
+                # Remote init previously failed because a host was
+                # unreachable, so start it again.
                 del ri_map[install_target]
-                self.task_remote_mgr.file_install(platform)
+                self.task_remote_mgr.remote_init(platform)
                 for itask in itasks:
                     self.data_store_mgr.delta_job_msg(
                         itask.tokens.duplicate(
                             job=str(itask.submit_num)
                         ),
-                        REMOTE_FILE_INSTALL_IN_PROGRESS
+                        self.REMOTE_INIT_MSG
                     )
-                continue
+                return
+
+        # Ensure that localhost background/at jobs are recorded as running
+        # on the host name of the current workflow host, rather than just
+        # "localhost". On restart on a different workflow host, this
+        # allows the restart logic to correctly poll the status of the
+        # background/at jobs that may still be running on the previous
+        # workflow host.
+        try:
+            host = get_host_from_platform(
+                platform,
+                bad_hosts=self.task_remote_mgr.bad_hosts
+            )
+        except NoHostsError:
+            del ri_map[install_target]
+            self.task_remote_mgr.remote_init(platform)
+            for itask in itasks:
+                self.data_store_mgr.delta_job_msg(
+                    itask.tokens.duplicate(
+                        job=str(itask.submit_num)
+                    ),
+                    self.REMOTE_INIT_MSG,
+                )
+            return
 
-            if ri_map[install_target] in {
-                REMOTE_INIT_FAILED, REMOTE_FILE_INSTALL_FAILED
-            }:
-                # Remote init or install failed. Set submit-failed for all
-                # affected tasks and remove target from remote init map
-                # - this enables new tasks to re-initialise that target
-                init_error = ri_map[install_target]
-                del ri_map[install_target]
-                for itask in itasks:
-                    itask.waiting_on_job_prep = False
-                    itask.local_job_file_path = None  # reset for retry
-                    log_task_job_activity(
-                        SubProcContext(
-                            self.JOBS_SUBMIT,
-                            '(init %s)' % host,
-                            err=init_error,
-                            ret_code=1,
-                        ),
-                        self.workflow,
-                        itask.point,
-                        itask.tdef.name,
-                    )
-                    self._prep_submit_task_job_error(
-                        itask, '(remote init)', ''
-                    )
-                continue
+        if self.job_runner_mgr.is_job_local_to_host(
+            itasks[0].summary['job_runner_name']
+        ) and not is_remote_platform(platform):
+            host = get_host()
 
-            # Build the "cylc jobs-submit" command
-            cmd = [self.JOBS_SUBMIT]
-            if LOG.isEnabledFor(DEBUG):
-                cmd.append('--debug')
-            if get_utc_mode():
-                cmd.append('--utc-mode')
-            if is_remote_platform(itask.platform):
-                remote_mode = True
-                cmd.append('--remote-mode')
-            else:
-                remote_mode = False
-            if itask.platform[
-                    'clean job submission environment']:
-                cmd.append('--clean-env')
-            for var in itask.platform[
-                    'job submission environment pass-through']:
-                cmd.append(f"--env={var}")
-            for path in itask.platform[
-                    'job submission executable paths'] + SYSPATH:
-                cmd.append(f"--path={path}")
-            cmd.append('--')
-            cmd.append(get_remote_workflow_run_job_dir(self.workflow))
-            # Chop itasks into a series of shorter lists if it's very big
-            # to prevent overloading of stdout and stderr pipes.
-            itasks = sorted(itasks, key=lambda itask: itask.identity)
-            chunk_size = (
-                len(itasks) // (
-                    (len(itasks) // platform['max batch submit size']) + 1
-                ) + 1
-            )
-            itasks_batches = [
-                itasks[i:i + chunk_size]
-                for i in range(0, len(itasks), chunk_size)
-            ]
-            LOG.debug(
-                '%s ... # will invoke in batches, sizes=%s',
-                cmd, [len(b) for b in itasks_batches])
+        done_tasks.extend(itasks)
+        for itask in itasks:
+            # Log and persist
+            LOG.debug(f"[{itask}] host={host}")
+            self.workflow_db_mgr.put_insert_task_jobs(itask, {
+                'flow_nums': serialise_set(itask.flow_nums),
+                'is_manual_submit': itask.is_manual_submit,
+                'try_num': itask.get_try_num(),
+                'time_submit': get_current_time_string(),
+                'platform_name': itask.platform['name'],
+                'job_runner_name': itask.summary['job_runner_name'],
+            })
 
-            if remote_mode:
-                cmd = construct_ssh_cmd(
-                    cmd, platform, host
-                )
-            else:
-                cmd = ['cylc'] + cmd
-
-            for itasks_batch in itasks_batches:
-                stdin_files = []
-                job_log_dirs = []
-                for itask in itasks_batch:
-                    if not itask.waiting_on_job_prep:
-                        # Avoid duplicate job submissions when flushing
-                        # preparing tasks before a reload. See
-                        # https://github.com/cylc/cylc-flow/pull/6345
-                        continue
-
-                    if remote_mode:
-                        stdin_files.append(
-                            os.path.expandvars(
-                                get_task_job_job_log(
-                                    self.workflow,
-                                    itask.point,
-                                    itask.tdef.name,
-                                    itask.submit_num,
-                                )
-                            )
-                        )
-                    job_log_dirs.append(
-                        itask.tokens.duplicate(
-                            job=str(itask.submit_num),
-                        ).relative_id
-                    )
-                    # The job file is now (about to be) used: reset the file
-                    # write flag so that subsequent manual retrigger will
-                    # generate a new job file.
-                    itask.local_job_file_path = None
-                    itask.waiting_on_job_prep = False
+            itask.is_manual_submit = False
 
-                if not job_log_dirs:
-                    continue
+        if ri_map[install_target] == REMOTE_FILE_INSTALL_255:
+            del ri_map[install_target]
+            self.task_remote_mgr.file_install(platform)
+            for itask in itasks:
+                self.data_store_mgr.delta_job_msg(
+                    itask.tokens.duplicate(
+                        job=str(itask.submit_num)
+                    ),
+                    REMOTE_FILE_INSTALL_IN_PROGRESS
+                )
+            return
 
-                self.proc_pool.put_command(
+        if ri_map[install_target] in {
+            REMOTE_INIT_FAILED, REMOTE_FILE_INSTALL_FAILED
+        }:
+            # Remote init or install failed. Set submit-failed for all
+            # affected tasks and remove target from remote init map
+            # - this enables new tasks to re-initialise that target
+            init_error = ri_map[install_target]
+            del ri_map[install_target]
+            for itask in itasks:
+                itask.waiting_on_job_prep = False
+                itask.local_job_file_path = None  # reset for retry
+                log_task_job_activity(
                     SubProcContext(
                         self.JOBS_SUBMIT,
-                        cmd + job_log_dirs,
-                        stdin_files=stdin_files,
-                        job_log_dirs=job_log_dirs,
-                        host=host
+                        '(init %s)' % host,
+                        err=init_error,
+                        ret_code=1,
                     ),
-                    bad_hosts=self.task_remote_mgr.bad_hosts,
-                    callback=self._submit_task_jobs_callback,
-                    callback_args=[itasks_batch],
-                    callback_255=self._submit_task_jobs_callback_255,
+                    self.workflow,
+                    itask.point,
+                    itask.tdef.name,
                 )
-        return done_tasks
+                self._prep_submit_task_job_error(
+                    itask, '(remote init)', ''
+                )
+            return
+
+        if self.workflow_db_mgr.background_writes:
+            # Record the jobs before submitting them, in case the scheduler
+            # is killed before the background writers catch up.
+            self.workflow_db_mgr.sync_queued_ops()
+
+        # Build the "cylc jobs-submit" command
+        cmd = [self.JOBS_SUBMIT]
+        if LOG.isEnabledFor(DEBUG):
+            cmd.append('--debug')
+        if get_utc_mode():
+            cmd.append('--utc-mode')
+        if is_remote_platform(itask.platform):
+            remote_mode = True
+            cmd.append('--remote-mode')
+        else:
+            remote_mode = False
+        if itask.platform[
+                'clean job submission environment']:
+            cmd.append('--clean-env')
+        for var in itask.platform[
+                'job submission environment pass-through']:
+            cmd.append(f"--env={var}")
+        for path in itask.platform[
+                'job submission executable paths'] + SYSPATH:
+            cmd.append(f"--path={path}")
+        cmd.append('--')
+        cmd.append(get_remote_workflow_run_job_dir(self.workflow))
+        # Chop itasks into a series of shorter lists if it's very big
+        # to prevent overloading of stdout and stderr pipes.
+        itasks = sorted(itasks, key=lambda itask: itask.identity)
+        chunk_size = (
+            len(itasks) // (
+                (len(itasks) // platform['max batch submit size']) + 1
+            ) + 1
+        )
+        itasks_batches = [
+            itasks[i:i + chunk_size]
+            for i in range(0, len(itasks), chunk_size)
+        ]
+        LOG.debug(
+            '%s ... # will invoke in batches, sizes=%s',
+            cmd, [len(b) for b in itasks_batches])
+
+        if remote_mode:
+            cmd = construct_ssh_cmd(
+                cmd, platform, host
+            )
+        else:
+            cmd = ['cylc'] + cmd
+
+        for itasks_batch in itasks_batches:
+            stdin_files = []
+            job_log_dirs = []
+            for itask in itasks_batch:
+                if not itask.waiting_on_job_prep:
+                    # Avoid duplicate job submissions when flushing
+                    # preparing tasks before a reload. See
+                    # https://github.com/cylc/cylc-flow/pull/6345
+                    continue
+
+                if remote_mode:
+                    stdin_files.append(
+                        os.path.expandvars(
+                            get_task_job_job_log(
+                                self.workflow,
+                                itask.point,
+                                itask.tdef.name,
+                                itask.submit_num,
+                            )
+                        )
+                    )
+                job_log_dirs.append(
+                    itask.tokens.duplicate(
+                        job=str(itask.submit_num),
+                    ).relative_id
+                )
+                # The job file is now (about to be) used: reset the file
+                # write flag so that subsequent manual retrigger will
+                # generate a new job file.
+                itask.local_job_file_path = None
+                itask.waiting_on_job_prep = False
+
+            if not job_log_dirs:
+                continue
+
+            self.proc_pool.put_command(
+                SubProcContext(
+                    self.JOBS_SUBMIT,
+                    cmd + job_log_dirs,
+                    stdin_files=stdin_files,
+                    job_log_dirs=job_log_dirs,
+                    host=host
+                ),
+                bad_hosts=self.task_remote_mgr.bad_hosts,
+                callback=self._submit_task_jobs_callback,
+                callback_args=[itasks_batch],
+                callback_255=self._submit_task_jobs_callback_255,
+            )
 
     def _get_platform_with_good_host(
         self, itasks: 'Iterable[TaskProxy]', done_tasks: 'List[TaskProxy]'
@@ -956,7 +1172,9 @@ class TaskJobManager:
         """Run job commands, e.g. poll, kill, etc.
 
         Group itasks with their platform_name and host.
-        Put a job command for each group to the multiprocess pool.
+        Put job commands for each group to the multiprocess pool, in batches
+        and with a limit on the number running at once for each platform
+        (see JobCommandBatcher).
 
         """
         if not itasks:
@@ -985,6 +1203,21 @@ class TaskJobManager:
                     f' platform {platform_name}.'
                 )
                 continue
+            self.job_cmd_batcher.put(
+                cmd_key, platform, itasks, callback, callback_255
+            )
+            self._run_job_cmd_batches(platform)
+
+    def _run_job_cmd_batches(self, platform: dict) -> None:
+        """Put waiting job command batches for a platform to the pool.
+
+        Only as many as the platform's "max concurrent job commands" allows.
+        """
+        for batch in self.job_cmd_batcher.get(
+            platform['name'], platform['max concurrent job commands']
+        ):
+            cmd_key = batch.cmd_key
+            itasks = batch.itasks
             if is_remote_platform(platform):
                 remote_mode = True
                 cmd = [cmd_key]
@@ -1010,7 +1243,8 @@ class TaskJobManager:
                 except NoHostsError:
                     ctx.err = f'No available hosts for {platform["name"]}'
                     LOG.debug(ctx)
-                    callback_255(ctx, itasks)
+                    self.job_cmd_batcher.done(batch)
+                    batch.callback_255(ctx, itasks)
                     continue
                 else:
                     ctx = SubProcContext(cmd_key, cmd, host=host)
@@ -1022,15 +1256,33 @@ class TaskJobManager:
                     ).relative_id
                 )
             cmd += job_log_dirs
-            LOG.debug(f'{cmd_key} for {platform["name"]} on {host}')
+            LOG.debug(
+                f'{cmd_key} for {platform["name"]} on {host}'
+                f' ({len(itasks)} jobs)'
+            )
             self.proc_pool.put_command(
                 ctx,
                 bad_hosts=self.task_remote_mgr.bad_hosts,
-                callback=callback,
-                callback_args=[itasks],
-                callback_255=callback_255,
+                callback=self._job_cmd_callback,
+                callback_args=[batch, batch.callback],
+                callback_255=self._job_cmd_callback,
+                callback_255_args=[batch, batch.callback_255],
             )
 
+    def _job_cmd_callback(self, ctx, batch, callback):
+        """Callback when a batched job command exits.
+
+        Record the command duration (unless the host could not be contacted)
+        then call the callback and start any waiting batches.
+        """
+        self.job_cmd_batcher.done(
+            batch,
+            None if ctx.ret_code == 255 else time() - batch.time_started,
+        )
+        ret = callback(ctx, batch.itasks)
+        self._run_job_cmd_batches(batch.platform)
+        return ret
+
     @staticmethod
     def _set_retry_timers(
         itask: 'TaskProxy',
@@ -1175,10 +1427,18 @@ class TaskJobManager:
     def _prep_submit_task_job(
         self,
         itask: 'TaskProxy',
-        check_syntax: bool = True
+        check_syntax: bool = True,
+        write_job_file: bool = True,
     ) -> 'Union[TaskProxy, None, Literal[False]]':
         """Prepare a task job submission.
 
+        Args:
+            itask: The task to prepare.
+            check_syntax: Check the syntax of the job file.
+            write_job_file: If False, only prepare the job config, leaving
+                the job file to be written by the caller (the task's
+                local_job_file_path remains unset).
+
         Returns:
             * itask - preparation complete.
             * None - preparation in progress.
@@ -1297,25 +1557,21 @@ class TaskJobManager:
                 rtconfig,
             )
             itask.jobs.append(job_conf)
-
-            local_job_file_path = get_task_job_job_log(
-                self.workflow,
-                itask.point,
-                itask.tdef.name,
-                itask.submit_num,
-            )
-            self.job_file_writer.write(
-                local_job_file_path,
-                job_conf,
-                check_syntax=check_syntax,
-            )
         except Exception as exc:
-            # Could be a bad command template, IOError, etc
+            # Could be a bad command template, etc
             itask.waiting_on_job_prep = False
             self._prep_submit_task_job_error(itask, '(prepare job file)', exc)
             return False
 
-        itask.local_job_file_path = local_job_file_path
+        if not write_job_file:
+            return itask
+        bad_tasks: 'List[TaskProxy]' = []
+        if not self._job_files_written(
+            [itask],
+            self._write_job_files([itask], check_syntax),
+            bad_tasks,
+        ):
+            return False
         return itask
 
     def _prep_submit_task_job_error(
@@ -1374,7 +1630,6 @@ class TaskJobManager:
         ] = self.get_execution_time_limit(rtconfig['execution time limit'])
 
         # Location of job file, etc
-        self._create_job_log_path(itask)
         job_d = itask.tokens.duplicate(job=str(itask.submit_num)).relative_id
         job_file_path = get_remote_workflow_run_job_dir(
             self.workflow, job_d, JOB_LOG_JOB
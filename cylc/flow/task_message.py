@@ -18,11 +18,14 @@
 Send messages to:
 - The stdout/stderr.
 - The job status file, if there is one.
-- The scheduler, if communication is possible.
+- The scheduler, if communication is possible, either directly or via a
+  message relay (see cylc.flow.network.message_relay).
 """
 
+import json
 from logging import getLevelName, WARNING, ERROR, CRITICAL
 import os
+import socket
 import sys
 from typing import List
 
@@ -43,6 +46,13 @@ CYLC_JOB_INIT_TIME = "CYLC_JOB_INIT_TIME"
 CYLC_JOB_EXIT = "CYLC_JOB_EXIT"
 CYLC_JOB_EXIT_TIME = "CYLC_JOB_EXIT_TIME"
 CYLC_MESSAGE = "CYLC_MESSAGE"
+# Path of the socket of a message relay, if there is one.
+CYLC_MESSAGE_RELAY = "CYLC_MESSAGE_RELAY"
+
+# Reply from the message relay when it has accepted messages.
+RELAY_OK = 'ok'
+# How long to wait for the message relay (seconds).
+RELAY_TIMEOUT = 5.0
 
 ABORT_MESSAGE_PREFIX = "aborted/"
 FAIL_MESSAGE_PREFIX = "failed/"
@@ -106,6 +116,9 @@ def send_messages(
     workflow: str, job_id: str, messages: List[list], event_time: str
 ) -> None:
     workflow = os.path.normpath(workflow)
+    relay = os.getenv(CYLC_MESSAGE_RELAY)
+    if relay and send_to_relay(relay, workflow, job_id, messages, event_time):
+        return
     try:
         pclient = get_client(workflow)
     except WorkflowStopped:
@@ -133,6 +146,44 @@ def send_messages(
     pclient('graphql', mutation_kwargs)
 
 
+def send_to_relay(
+    socket_path: str,
+    workflow: str,
+    job_id: str,
+    messages: List[list],
+    event_time: str,
+) -> bool:
+    """Hand messages to the message relay listening on a socket.
+
+    The relay sends them to the scheduler, batched with those of other jobs.
+
+    Returns:
+        True if the relay accepted the messages, False if they should be
+        sent to the scheduler directly instead.
+
+    """
+    request = json.dumps({
+        'workflow': workflow,
+        'job_id': job_id,
+        'event_time': event_time,
+        'messages': messages,
+    }) + '\n'
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(RELAY_TIMEOUT)
+            sock.connect(socket_path)
+            sock.sendall(request.encode())
+            with sock.makefile() as reply:
+                return reply.readline().strip() == RELAY_OK
+    except OSError as exc:
+        if cylc.flow.flags.verbosity > 0:
+            print(
+                f"Message relay unavailable: {type(exc).__name__}: {exc}",
+                file=sys.stderr
+            )
+        return False
+
+
 def _append_job_status_file(workflow, job_id, event_time, messages):
     """Write messages to job status file."""
     job_log_name = os.getenv('CYLC_TASK_LOG_ROOT')
@@ -16,6 +16,7 @@
 """Task output message manager and constants."""
 
 import ast
+from functools import lru_cache
 import re
 from typing import (
     TYPE_CHECKING,
@@ -299,6 +300,35 @@ FINAL_OUTPUT_COMPLETION = ' or '.join(
 )
 
 
+@lru_cache(maxsize=None)
+def get_output_maps(
+    outputs: Tuple[Tuple[str, str], ...]
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Return message maps for a task's (trigger, message) outputs.
+
+    The maps are cached and shared by all tasks with the same outputs (i.e.
+    all instances of a task definition), so they must not be modified.
+
+    Returns:
+        ({message: trigger}, {message: completion_variable})
+
+    Examples:
+        >>> get_output_maps((('submit-failed', 'submit-fail message'),))
+        ({'submit-fail message': 'submit-failed'},
+         {'submit-fail message': 'submit_failed'})
+        >>> get_output_maps((('x', 'x'),)) is get_output_maps((('x', 'x'),))
+        True
+
+    """
+    return (
+        {message: trigger for trigger, message in outputs},
+        {
+            message: trigger_to_completion_variable(trigger)
+            for trigger, message in outputs
+        },
+    )
+
+
 class TaskOutputs:
     """Represents a collection of outputs for a task.
 
@@ -329,29 +359,32 @@ class TaskOutputs:
         "_message_to_compvar",
         "_completed",
         "_completion_expression",
-        "_forced",
     )
 
+    # NOTE: the message maps are shared with other instances of the task (see
+    # get_output_maps), only the completed outputs are stored per instance
     _message_to_trigger: Dict[str, str]  # message: trigger
     _message_to_compvar: Dict[str, str]  # message: completion variable
-    _completed: Dict[str, bool]  # message: is_complete
+    _completed: Dict[str, bool]  # completed message: is_forced
     _completion_expression: str
-    _forced: List[str]  # list of messages of force-completed outputs
 
     def __init__(self, tdef: 'Union[TaskDef, str]'):
-        self._message_to_trigger = {}
-        self._message_to_compvar = {}
         self._completed = {}
-        self._forced = []
 
         if isinstance(tdef, str):
             # abnormal use e.g. from the "cylc show" command
             self._completion_expression = tdef
+            self._message_to_trigger = {}
+            self._message_to_compvar = {}
         else:
             # normal use e.g. from within the scheduler
             self._completion_expression = get_completion_expression(tdef)
-            for trigger, (message, _required) in tdef.outputs.items():
-                self.add(trigger, message)
+            self._message_to_trigger, self._message_to_compvar = (
+                get_output_maps(tuple(
+                    (trigger, message)
+                    for trigger, (message, _required) in tdef.outputs.items()
+                ))
+            )
 
     def add(self, trigger: str, message: str) -> None:
         """Register a new output.
@@ -361,11 +394,15 @@ class TaskOutputs:
         where TaskOutputs are used outside of the scheduler where there is no
         TaskDef object handy so outputs must be listed manually.
         """
-        self._message_to_trigger[message] = trigger
-        self._message_to_compvar[message] = trigger_to_completion_variable(
-            trigger
-        )
-        self._completed[message] = False
+        # (copy rather than modify the maps as they may be shared)
+        self._message_to_trigger = {
+            **self._message_to_trigger, message: trigger
+        }
+        self._message_to_compvar = {
+            **self._message_to_compvar,
+            message: trigger_to_completion_variable(trigger),
+        }
+        self._completed.pop(message, None)
 
     def get_trigger(self, message: str) -> str:
         """Return the trigger associated with this message."""
@@ -412,15 +449,13 @@ class TaskOutputs:
                 If the output does not apply.
 
         """
-        if message not in self._completed:
+        if message not in self._message_to_trigger:
             # no matching output
             return None
 
-        if self._completed[message] is False:
+        if message not in self._completed:
             # output was incomplete
-            self._completed[message] = True
-            if forced:
-                self._forced.append(message)
+            self._completed[message] = forced
             return True
 
         # output was already completed
@@ -434,8 +469,8 @@ class TaskOutputs:
             * False if the message is not complete.
             * None if the message does not apply to these outputs.
         """
-        if message in self._completed:
-            return self._completed[message]
+        if message in self._message_to_trigger:
+            return message in self._completed
         return None
 
     def get_completed_outputs(self) -> Dict[str, str]:
@@ -445,11 +480,11 @@ class TaskOutputs:
 
         """
         return {
-            self._message_to_trigger[message]: (
-                FORCED_COMPLETION_MSG if message in self._forced else message
+            trigger: (
+                FORCED_COMPLETION_MSG if self._completed[message] else message
             )
-            for message, is_completed in self._completed.items()
-            if is_completed
+            for message, trigger in self._message_to_trigger.items()
+            if message in self._completed
         }
 
     def __iter__(self) -> Iterator[Tuple[str, str, bool]]:
@@ -466,8 +501,8 @@ class TaskOutputs:
                 True if the output is complete, else False.
 
         """
-        for message, is_complete in self._completed.items():
-            yield self._message_to_trigger[message], message, is_complete
+        for message, trigger in self._message_to_trigger.items():
+            yield trigger, message, message in self._completed
 
     def is_complete(self) -> bool:
         """Return True if the outputs are complete."""
@@ -480,8 +515,8 @@ class TaskOutputs:
         return CompletionEvaluator(
             expr,
             **{
-                self._message_to_compvar[message]: completed
-                for message, completed in self._completed.items()
+                compvar: message in self._completed
+                for message, compvar in self._message_to_compvar.items()
             },
         )
 
@@ -16,13 +16,15 @@
 
 """Wrangle task proxies to manage the workflow."""
 
-from collections import Counter
+from collections import Counter, deque
 from contextlib import suppress
+import heapq
 import json
 import logging
 from textwrap import indent
 from typing import (
     TYPE_CHECKING,
+    Deque,
     Dict,
     Iterable,
     List,
@@ -92,6 +94,7 @@ from cylc.flow.task_state import (
     TASK_STATUS_WAITING,
     TASK_STATUSES_ACTIVE,
     TASK_STATUSES_FINAL,
+    TASK_STATUSES_ORDERED,
 )
 from cylc.flow.task_trigger import TaskTrigger
 from cylc.flow.util import deserialise_set
@@ -190,15 +193,41 @@ class TaskPool:
 
         self.max_future_offset: Optional['IntervalBase'] = None
         self._prev_runahead_base_point: Optional['PointBase'] = None
-        self._prev_runahead_sequence_points: Optional[Set['PointBase']] = None
+        # Per-sequence cycle points from the runahead base point out to the
+        # runahead limit (advanced as the base point moves forward):
+        self._runahead_cursors: Optional[List[Deque['PointBase']]] = None
         self.runahead_limit_point: Optional['PointBase'] = None
 
+        # Prerequisites of tasks to be loaded on restart, bulk loaded ahead of
+        # the tasks themselves (see load_db_task_prerequisites_for_restart):
+        # {(cycle, name, flow_nums_str): [(prereq_name, prereq_cycle,
+        #                                  prereq_output, satisfied), ...]}
+        self._restart_prereqs: Optional[
+            Dict[Tuple[str, str, str], List[Tuple[str, str, str, str]]]
+        ] = None
+
         # Tasks in the active window of the workflow.
         self.active_tasks: Pool = {}
+        # Min-heap of cycle points in the active window, for finding the
+        # earliest one. Points removed from active_tasks are left in the heap
+        # until they reach the top (see _get_min_point).
+        self._active_points: List['PointBase'] = []
+        self._active_points_set: Set['PointBase'] = set()
         self._active_tasks_list: List[TaskProxy] = []
         self.active_tasks_changed = False
         self.tasks_removed = False
 
+        # Secondary indexes of active tasks (see _index_task):
+        # {task_id: itask}
+        self._tasks_by_id: Dict[str, TaskProxy] = {}
+        # {status: {task_id: itask}}
+        self._tasks_by_status: Dict[str, Dict[str, TaskProxy]] = {
+            status: {} for status in TASK_STATUSES_ORDERED
+        }
+        # Waiting tasks which are not queued or runahead limited
+        # {task_id: itask}
+        self._unqueued_waiting_tasks: Dict[str, TaskProxy] = {}
+
         self.hold_point: Optional['PointBase'] = None
         self.abs_outputs_done: Set[Tuple[str, str, str]] = set()
 
@@ -244,8 +273,47 @@ class TaskPool:
     def _swap_out(self, itask):
         """Swap old task for new, during reload."""
         if itask.identity in self.active_tasks.get(itask.point, set()):
+            self._unindex_task(self.active_tasks[itask.point][itask.identity])
             self.active_tasks[itask.point][itask.identity] = itask
             self.active_tasks_changed = True
+            self._index_task(itask)
+
+    def _index_task(self, itask: TaskProxy) -> None:
+        """Add a task to (or update it in) the secondary indexes.
+
+        This is called when a task is added to the pool and thereafter
+        whenever its state changes (via TaskProxy.state_reset).
+        """
+        id_ = itask.identity
+        self._tasks_by_id[id_] = itask
+        for status, tasks in self._tasks_by_status.items():
+            if status == itask.state.status:
+                tasks[id_] = itask
+            else:
+                tasks.pop(id_, None)
+        if itask.state(
+            TASK_STATUS_WAITING, is_queued=False, is_runahead=False
+        ):
+            self._unqueued_waiting_tasks[id_] = itask
+        else:
+            self._unqueued_waiting_tasks.pop(id_, None)
+        itask.state_listener = self._index_task
+
+    def _unindex_task(self, itask: TaskProxy) -> None:
+        """Remove a task from the secondary indexes."""
+        id_ = itask.identity
+        itask.state_listener = None
+        self._tasks_by_id.pop(id_, None)
+        for tasks in self._tasks_by_status.values():
+            tasks.pop(id_, None)
+        self._unqueued_waiting_tasks.pop(id_, None)
+
+    def _get_min_point(self) -> Optional['PointBase']:
+        """Return the earliest cycle point in the active window."""
+        heap = self._active_points
+        while heap and heap[0] not in self.active_tasks:
+            self._active_points_set.discard(heapq.heappop(heap))
+        return heap[0] if heap else None
 
     def load_from_point(self):
         """Load the task pool for the workflow start point.
@@ -276,6 +344,10 @@ class TaskPool:
         self.active_tasks.setdefault(itask.point, {})
         self.active_tasks[itask.point][itask.identity] = itask
         self.active_tasks_changed = True
+        if itask.point not in self._active_points_set:
+            self._active_points_set.add(itask.point)
+            heapq.heappush(self._active_points, itask.point)
+        self._index_task(itask)
         LOG.debug(f"[{itask}] added to the n=0 window")
 
         self.create_data_store_elements(itask)
@@ -379,21 +451,19 @@ class TaskPool:
                 ),
                 default=None,
             )
-        else:
-            # Find the earliest point with incomplete tasks.
-            for point, itasks in sorted(self.get_tasks_by_point().items()):
-                # All n=0 tasks are incomplete by definition, but Cylc 7
-                # ignores failed ones (it does not ignore submit-failed!).
-                if (
-                    cylc.flow.flags.cylc7_back_compat and
-                    all(
-                        itask.state(TASK_STATUS_FAILED)
-                        for itask in itasks
-                    )
+        elif cylc.flow.flags.cylc7_back_compat:
+            # All n=0 tasks are incomplete by definition, but Cylc 7
+            # ignores failed ones (it does not ignore submit-failed!).
+            for point in sorted(self.active_tasks):
+                if not all(
+                    itask.state(TASK_STATUS_FAILED)
+                    for itask in self.active_tasks[point].values()
                 ):
-                    continue
-                base_point = point
-                break
+                    base_point = point
+                    break
+        else:
+            # The earliest point with incomplete tasks.
+            base_point = self._get_min_point()
 
         if base_point is None:
             return False
@@ -415,45 +485,53 @@ class TaskPool:
             # change or the runahead limit is already at stop point.
             return False
 
+        # Task history is no longer needed for cycles behind the base point.
+        self.workflow_db_mgr.task_history.prune(base_point)
+
         # Now generate all possible cycle points from the base point and stop
         # at the runahead limit point. Note both cycle count and time interval
         # limits involve all possible cycles, not just active cycles.
-        sequence_points: Set['PointBase'] = set()
         if (
-            not force
-            and self._prev_runahead_sequence_points
-            and base_point == self._prev_runahead_base_point
+            force
+            or self._runahead_cursors is None
+            or base_point < self._prev_runahead_base_point
         ):
-            # Cache for speed.
-            sequence_points = self._prev_runahead_sequence_points
-        else:
-            # Recompute possible points.
-            for sequence in self.config.sequences:
+            # Start again from the base point.
+            self._runahead_cursors = [deque() for _ in self.config.sequences]
+        self._prev_runahead_base_point = base_point
+        sequence_points: Set['PointBase'] = set()
+        for sequence, cursor in zip(
+            self.config.sequences, self._runahead_cursors
+        ):
+            # Drop points behind the base point, then extend from the last
+            # point (rather than from the base point) out to the limit.
+            while cursor and cursor[0] < base_point:
+                cursor.popleft()
+            if cursor:
+                seq_point = sequence.get_next_point(cursor[-1])
+            else:
                 seq_point = sequence.get_first_point(base_point)
-                count = 1
-                while seq_point is not None:
-                    if count_cycles:
-                        # P0 allows only the base cycle point to run.
-                        if count > 1 + ilimit:
-                            # this point may be beyond the runahead limit
-                            break
-                    else:
-                        # PT0H allows only the base cycle point to run.
-                        if seq_point > base_point + limit:
-                            # this point can not be beyond the runahead limit
-                            break
-                    count += 1
-                    sequence_points.add(seq_point)
-                    seq_point = sequence.get_next_point(seq_point)
-            self._prev_runahead_sequence_points = sequence_points
-            self._prev_runahead_base_point = base_point
+            while seq_point is not None:
+                if count_cycles:
+                    # P0 allows only the base cycle point to run.
+                    if len(cursor) > ilimit:
+                        # this point may be beyond the runahead limit
+                        break
+                else:
+                    # PT0H allows only the base cycle point to run.
+                    if seq_point > base_point + limit:
+                        # this point can not be beyond the runahead limit
+                        break
+                cursor.append(seq_point)
+                seq_point = sequence.get_next_point(seq_point)
+            sequence_points.update(cursor)
 
         if count_cycles:
             if not sequence_points:
                 limit_point = base_point
             else:
                 # (len(list) may be less than ilimit due to sequence end)
-                limit_point = sorted(sequence_points)[:ilimit + 1][-1]
+                limit_point = heapq.nsmallest(ilimit + 1, sequence_points)[-1]
         else:
             limit_point = max(sequence_points)
 
@@ -531,6 +609,30 @@ class TaskPool:
             # no matching entries
             return False
 
+    def start_restart_prereqs_load(self) -> None:
+        """Start loading the prerequisites of task pool tasks in bulk.
+
+        Call before load_db_task_prerequisites_for_restart, so that
+        load_db_task_pool_for_restart does not query the prerequisites of
+        each task separately (even if there are no prerequisites to load).
+        """
+        self._restart_prereqs = {}
+
+    def load_db_task_prerequisites_for_restart(self, row_idx, row):
+        """Load the prerequisites of task pool tasks from the DB.
+
+        Call (after start_restart_prereqs_load) before
+        load_db_task_pool_for_restart.
+        """
+        if row_idx == 0:
+            LOG.info("LOADING task prerequisites")
+        if self._restart_prereqs is None:
+            self.start_restart_prereqs_load()
+        cycle, name, flow_nums, *prereq = row
+        self._restart_prereqs.setdefault(
+            (cycle, name, flow_nums), []
+        ).append(tuple(prereq))
+
     def load_db_task_pool_for_restart(self, row_idx, row):
         """Load tasks from DB task pool/states/jobs tables.
 
@@ -538,6 +640,8 @@ class TaskPool:
         as submitted or running are polled to confirm their true status.
         Tasks are added to queues again on release from runahead pool.
 
+        Call finish_db_task_pool_for_restart once all tasks are loaded.
+
         Returns:
             Names of platform if attempting to look up that platform
             has led to a PlatformNotFoundError.
@@ -615,11 +719,19 @@ class TaskPool:
                 f"+ {cycle}/{name} {status}{' (held)' if is_held else ''}")
 
             # Update prerequisite satisfaction status from DB
+            if self._restart_prereqs is None:
+                prereq_rows = (
+                    self.workflow_db_mgr.pri_dao.select_task_prerequisites(
+                        cycle, name, flow_nums,
+                    )
+                )
+            else:
+                prereq_rows = self._restart_prereqs.pop(
+                    (cycle, name, flow_nums), []
+                )
             sat = {}
             for prereq_name, prereq_cycle, prereq_output_msg, satisfied in (
-                self.workflow_db_mgr.pri_dao.select_task_prerequisites(
-                    cycle, name, flow_nums,
-                )
+                prereq_rows
             ):
                 # Prereq satisfaction as recorded in the DB.
                 sat[
@@ -664,8 +776,14 @@ class TaskPool:
             ):
                 self.rh_release_and_queue(itask)
 
-            self.compute_runahead()
-            self.release_runahead_tasks()
+    def finish_db_task_pool_for_restart(self) -> None:
+        """Release loaded tasks up to the runahead limit, for restart.
+
+        (Done once, rather than after loading each task.)
+        """
+        self._restart_prereqs = None
+        self.compute_runahead()
+        self.release_runahead_tasks()
 
     def load_db_task_action_timers(self, row_idx: int, row: Iterable) -> None:
         """Load a task action timer, e.g. event handlers, retry states."""
@@ -709,14 +827,14 @@ class TaskPool:
             return
         LOG.info("+ %s/%s %s" % (cycle, name, ctx_key))
         if ctx_key == "poll_timer":
-            itask = self._get_task_by_id(id_)
+            itask = self.get_task_by_id(id_)
             if itask is None:
                 LOG.warning("%(id)s: task not found, skip" % {"id": id_})
                 return
             itask.poll_timer = TaskActionTimer(
                 ctx, delays, num, delay, timeout)
         elif ctx_key[0] == "try_timers":
-            itask = self._get_task_by_id(id_)
+            itask = self.get_task_by_id(id_)
             if itask is None:
                 LOG.warning("%(id)s: task not found, skip" % {"id": id_})
                 return
@@ -908,6 +1026,7 @@ class TaskPool:
         else:
             self.tasks_removed = True
             self.active_tasks_changed = True
+            self._unindex_task(itask)
             if not self.active_tasks[itask.point]:
                 del self.active_tasks[itask.point]
             self.task_queue_mgr.remove_task(itask)
@@ -958,7 +1077,23 @@ class TaskPool:
 
     def get_task_ids(self) -> Set[str]:
         """Return a list of task IDs in the task pool."""
-        return {itask.identity for itask in self.get_tasks()}
+        return set(self._tasks_by_id)
+
+    def get_tasks_by_status(self, *statuses: str) -> List[TaskProxy]:
+        """Return a list of task proxies with any of the given statuses."""
+        return [
+            itask
+            for status in statuses
+            for itask in self._tasks_by_status[status].values()
+        ]
+
+    def get_unqueued_waiting_tasks(self) -> List[TaskProxy]:
+        """Return waiting tasks which are not queued or runahead limited.
+
+        I.e. tasks which may be waiting on xtriggers, external triggers or
+        prerequisites before they can be queued.
+        """
+        return list(self._unqueued_waiting_tasks.values())
 
     def get_tasks_by_point(self) -> 'Dict[PointBase, List[TaskProxy]]':
         """Return a map of task proxies by cycle point."""
@@ -975,12 +1110,9 @@ class TaskPool:
             return tasks.get(rel_id)
         return None
 
-    def _get_task_by_id(self, id_: str) -> Optional[TaskProxy]:
+    def get_task_by_id(self, id_: str) -> Optional[TaskProxy]:
         """Return pool task by ID if it exists, or None."""
-        for itask_ids in self.active_tasks.values():
-            if id_ in itask_ids:
-                return itask_ids[id_]
-        return None
+        return self._tasks_by_id.get(id_)
 
     def queue_task(self, itask: TaskProxy) -> None:
         """Queue a task that is ready to run.
@@ -1063,11 +1195,7 @@ class TaskPool:
 
     def get_min_point(self):
         """Return the minimum cycle point currently in the pool."""
-        cycles = list(self.active_tasks)
-        minc = None
-        if cycles:
-            minc = min(cycles)
-        return minc
+        return self._get_min_point()
 
     def set_max_future_offset(self):
         """Calculate the latest required future trigger offset."""
@@ -1088,6 +1216,7 @@ class TaskPool:
 
     def reload(self, config: 'WorkflowConfig') -> None:
         self.config = config   # store the updated config
+        self._runahead_cursors = None
         self.xtrigger_mgr.add_xtriggers(
             self.config.xtrigger_collator, reload=True)
         self._reload_taskdefs()
@@ -1485,7 +1614,7 @@ class TaskPool:
                     str(itask.point), itask.tdef.name, output)
                 self.workflow_db_mgr.process_queued_ops()
 
-            c_task = self._get_task_by_id(quick_relative_id(c_point, c_name))
+            c_task = self.get_task_by_id(quick_relative_id(c_point, c_name))
             in_pool = c_task is not None
 
             if c_task is not None and c_task != itask:
@@ -1629,7 +1758,7 @@ class TaskPool:
                     cycle=str(c_point),
                     task=c_name,
                 ).relative_id
-                c_task = self._get_task_by_id(c_taskid)
+                c_task = self.get_task_by_id(c_taskid)
                 if c_task is not None:
                     # already spawned
                     continue
@@ -1704,7 +1833,7 @@ class TaskPool:
         status: Optional[str] = None
         flow_wait = False
 
-        info = self.workflow_db_mgr.pri_dao.select_prev_instances(
+        info = self.workflow_db_mgr.task_history.get_prev_instances(
             name, str(point)
         )
         with suppress(ValueError):
@@ -1726,7 +1855,7 @@ class TaskPool:
 
     def _load_historical_outputs(self, itask: 'TaskProxy') -> None:
         """Load a task's historical outputs from the DB."""
-        info = self.workflow_db_mgr.pri_dao.select_task_outputs(
+        info = self.workflow_db_mgr.task_history.get_task_outputs(
             itask.tdef.name, str(itask.point))
         if not info:
             # task never ran before
@@ -2447,7 +2576,7 @@ class TaskPool:
         """Spawn successor(s) of parentless wall clock satisfied tasks."""
         while self.xtrigger_mgr.sequential_spawn_next:
             taskid = self.xtrigger_mgr.sequential_spawn_next.pop()
-            itask = self._get_task_by_id(taskid)
+            itask = self.get_task_by_id(taskid)
             self.check_spawn_psx_task(itask)
 
     def check_spawn_psx_task(self, itask: 'TaskProxy') -> None:
@@ -39,7 +39,7 @@ from cylc.flow.cycling.iso8601 import (
     point_parse,
 )
 from cylc.flow.flow_mgr import repr_flow_nums
-from cylc.flow.platforms import get_platform
+from cylc.flow.platforms import get_default_platform
 from cylc.flow.run_modes import RunMode
 from cylc.flow.task_action_timer import TimerFlags
 from cylc.flow.task_state import (
@@ -140,6 +140,8 @@ class TaskProxy:
             Object representing the state of this task.
         .platform:
             Dict containing info for platform where latest job is submitted.
+            Before the first job submission, this is the default platform
+            (shared with other tasks, do not modify).
         .tdef:
             The definition object of this task.
         .timeout:
@@ -166,6 +168,10 @@ class TaskProxy:
         .removed:
             A flag to indicate this task has been removed by command (used
             e.g. to disable failed/submit-failed event handlers).
+        .state_listener:
+            Function called with this task proxy whenever its state is
+            changed via state_reset (used by the task pool to keep its
+            indexes up to date).
 
     Args:
         tdef: The definition object of this task.
@@ -212,6 +218,7 @@ class TaskProxy:
         'transient',
         'is_xtrigger_sequential',
         'removed',
+        'state_listener',
     )
 
     def __init__(
@@ -263,8 +270,6 @@ class TaskProxy:
             'execution_time_limit': None,
             'job_runner_name': None,
             'submit_method_id': None,
-            'flow_nums': set(),
-            'flow_wait': self.flow_wait
         }
 
         self.local_job_file_path: Optional[str] = None
@@ -272,7 +277,8 @@ class TaskProxy:
         if data_mode:
             self.platform = {}
         else:
-            self.platform = get_platform()
+            # (shared, replaced with the task's own platform on job submission)
+            self.platform = get_default_platform()
 
         self.transient = transient
 
@@ -288,6 +294,7 @@ class TaskProxy:
         self.is_late = is_late
         self.waiting_on_job_prep = False
         self.removed: bool = False
+        self.state_listener: Optional[Callable[['TaskProxy'], None]] = None
 
         self.state = TaskState(tdef, self.point, status, is_held)
 
@@ -564,6 +571,8 @@ class TaskProxy:
         ):
             if not silent and not self.transient:
                 LOG.info(f"[{before}] => {self.state}")
+            if self.state_listener is not None:
+                self.state_listener(self)
             return True
 
         return False
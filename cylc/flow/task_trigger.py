@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from contextlib import suppress
 from typing import (
     TYPE_CHECKING,
     Optional,
@@ -25,7 +26,10 @@ from cylc.flow.cycling.loader import (
     get_point,
     get_point_relative,
 )
-from cylc.flow.prerequisite import Prerequisite
+from cylc.flow.prerequisite import (
+    ConditionalExpression,
+    Prerequisite,
+)
 from cylc.flow.task_qualifiers import ALT_QUALIFIERS
 
 
@@ -216,15 +220,29 @@ class Dependency:
 
     """
 
-    __slots__ = ['_exp', 'task_triggers', 'suicide']
+    __slots__ = [
+        '_exp', 'task_triggers', 'suicide', '_is_conditional', '_condition'
+    ]
 
     def __init__(self, exp, task_triggers, suicide):
         self._exp = exp
         self.task_triggers: Tuple[
-            TaskTrigger
+            TaskTrigger, ...
         ] = tuple(task_triggers)  # More memory efficient.
         self.suicide = suicide
 
+        # Compile conditional expressions once, to be shared by all of the
+        # Prerequisites generated from this dependency.
+        self._is_conditional = self._contains_or(exp)
+        self._condition: Optional[ConditionalExpression] = None
+        if self._is_conditional:
+            with suppress(ValueError):
+                # (Else compiled per-prerequisite which will error on
+                # evaluation.)
+                self._condition = ConditionalExpression.from_list(
+                    exp, self.task_triggers.index
+                )
+
     def get_prerequisite(
         self, point: 'PointBase', tdef: 'TaskDef'
     ) -> Prerequisite:
@@ -271,7 +289,14 @@ class Dependency:
                     task_trigger.task_name,
                     task_trigger.output,
                 )] = False
-        cpre.set_conditional_expr(self.get_expression(point))
+        if (
+            self._condition is not None
+            # (Coincident triggers result in fewer dependencies.)
+            and len(cpre.keys()) == len(self.task_triggers)
+        ):
+            cpre.set_condition(self._condition)
+        elif self._is_conditional:
+            cpre.set_conditional_expr(self.get_expression(point))
         return cpre
 
     def get_expression(self, point):
@@ -299,6 +324,15 @@ class Dependency:
                 ret.append('( %s )' % str(item))
         return ' '.join(ret)
 
+    @classmethod
+    def _contains_or(cls, nested_expr) -> bool:
+        """Return True if a nested expression contains the OR operator."""
+        return any(
+            cls._contains_or(item) if isinstance(item, list)
+            else isinstance(item, str) and item == '|'
+            for item in nested_expr
+        )
+
     @classmethod
     def _stringify_list(cls, nested_expr, point):
         """Stringify a nested list of TaskTrigger objects."""
@@ -24,18 +24,21 @@ This module provides the logic to:
 """
 
 from collections import defaultdict
+from contextlib import closing
 import json
 import os
 from shutil import (
     copy,
     rmtree,
 )
+import sqlite3
 from sqlite3 import OperationalError
 from tempfile import mkstemp
 from typing import (
     TYPE_CHECKING,
     Any,
     AnyStr,
+    Callable,
     DefaultDict,
     Dict,
     List,
@@ -43,6 +46,7 @@ from typing import (
     Set,
     Tuple,
     Union,
+    cast,
 )
 
 from packaging.version import parse as parse_version
@@ -52,6 +56,8 @@ from cylc.flow import (
     __version__ as CYLC_VERSION,
 )
 from cylc.flow.broadcast_report import get_broadcast_change_iter
+from cylc.flow.cfgspec.glbl_cfg import glbl_cfg
+from cylc.flow.cycling.loader import get_point
 from cylc.flow.exceptions import (
     CylcError,
     ServiceFileError,
@@ -91,6 +97,176 @@ PERM_PRIVATE = 0o600  # -rw-------
 INCOMPAT_MSG = f"Workflow database is incompatible with Cylc {CYLC_VERSION}"
 
 
+class TaskHistory:
+    """In-memory index of the task_states and task_outputs tables.
+
+    Spawning a task needs the history of previous instances with the same
+    name and cycle point. Rather than querying the private database for each
+    spawned task, the rows of both tables are loaded in bulk for a whole
+    cycle the first time it is needed, and subsequently kept in sync with the
+    write operations handed over to the private database.
+
+    Cycles are dropped from the index once they fall behind the runahead base
+    point (they will be reloaded from the database if needed again).
+
+    Args:
+        get_dao: Function returning the private database DAO.
+
+    """
+
+    def __init__(self, get_dao: Callable[[], Optional[CylcWorkflowDAO]]):
+        self.get_dao = get_dao
+        # {cycle: {name: {flow_nums_str: [submit_num, flow_wait, status]}}}
+        self.states: Dict[str, Dict[str, Dict[str, list]]] = {}
+        # {cycle: {name: {flow_nums_str: outputs_str}}}
+        self.outputs: Dict[str, Dict[str, Dict[str, str]]] = {}
+
+    def _load(self, cycle: str) -> None:
+        """Load the history of all tasks in a cycle from the database."""
+        dao = self.get_dao()
+        states: Dict[str, Dict[str, list]] = defaultdict(dict)
+        outputs: Dict[str, Dict[str, str]] = defaultdict(dict)
+        if dao is not None:
+            for name, flow_nums, submit_num, flow_wait, status in (
+                dao.select_task_states_for_cycle(cycle)
+            ):
+                states[name][flow_nums] = [submit_num, flow_wait, status]
+            for name, flow_nums, outputs_str in (
+                dao.select_task_outputs_for_cycle(cycle)
+            ):
+                outputs[name][flow_nums] = outputs_str
+        self.states[cycle] = states
+        self.outputs[cycle] = outputs
+
+    def get_prev_instances(
+        self, name: str, cycle: str
+    ) -> List[Tuple[int, bool, Set[int], str]]:
+        """Return info about previous instances of a task.
+
+        Equivalent to CylcWorkflowDAO.select_prev_instances.
+        """
+        if cycle not in self.states:
+            self._load(cycle)
+        return [
+            (submit_num, flow_wait == 1, deserialise_set(flow_nums), status)
+            for flow_nums, (submit_num, flow_wait, status) in (
+                self.states[cycle].get(name, {}).items()
+            )
+        ]
+
+    def get_task_outputs(self, name: str, cycle: str) -> 'Dict[str, FlowNums]':
+        """Return the outputs of a task for each flow.
+
+        Equivalent to CylcWorkflowDAO.select_task_outputs.
+        """
+        if cycle not in self.outputs:
+            self._load(cycle)
+        return {
+            outputs: deserialise_set(flow_nums)
+            for flow_nums, outputs in (
+                self.outputs[cycle].get(name, {}).items()
+            )
+        }
+
+    def prune(self, base_point: 'PointBase') -> None:
+        """Drop cycles earlier than the runahead base point."""
+        for cycle in list(self.states):
+            if get_point(cycle) < base_point:
+                del self.states[cycle]
+                self.outputs.pop(cycle, None)
+
+    def clear(self, cycle: Optional[str] = None) -> None:
+        """Drop a cycle (or everything) from the index."""
+        if cycle is None:
+            self.states.clear()
+            self.outputs.clear()
+        else:
+            self.states.pop(cycle, None)
+            self.outputs.pop(cycle, None)
+
+    def on_delete(self, table_name: str, where_args: 'DbArgDict') -> None:
+        """Apply a DELETE operation handed over to the database."""
+        if table_name in (
+            CylcWorkflowDAO.TABLE_TASK_STATES,
+            CylcWorkflowDAO.TABLE_TASK_OUTPUTS,
+        ):
+            self.clear(where_args.get('cycle') if where_args else None)
+
+    def on_insert(self, table_name: str, args: 'DbArgDict') -> None:
+        """Apply an INSERT OR REPLACE operation handed over to the database.
+        """
+        if table_name == CylcWorkflowDAO.TABLE_TASK_STATES:
+            states = self.states.get(args['cycle'])
+            if states is not None:
+                states[args['name']][args['flow_nums']] = [
+                    args.get('submit_num'),
+                    args.get('flow_wait'),
+                    args.get('status'),
+                ]
+        elif table_name == CylcWorkflowDAO.TABLE_TASK_OUTPUTS:
+            outputs = self.outputs.get(args['cycle'])
+            if outputs is not None:
+                outputs[args['name']][args['flow_nums']] = args['outputs']
+
+    def on_updates(
+        self, table_name: str, db_updates: 'List[DbUpdateTuple]'
+    ) -> None:
+        """Apply UPDATE operations handed over to the database.
+
+        The database executes updates grouped by statement (i.e. by the
+        columns they set and match), so they are applied here in that order.
+        """
+        if table_name not in (
+            CylcWorkflowDAO.TABLE_TASK_STATES,
+            CylcWorkflowDAO.TABLE_TASK_OUTPUTS,
+        ):
+            return
+        groups: Dict[tuple, List[Tuple[DbArgDict, DbArgDict]]] = {}
+        for item in db_updates:
+            if isinstance(item[0], str):
+                # raw SQL (e.g. removing flow numbers), can't interpret it
+                self.clear()
+                return
+            set_args, where_args = cast('Tuple[DbArgDict, DbArgDict]', item)
+            groups.setdefault(
+                (frozenset(set_args), frozenset(where_args)), []
+            ).append((set_args, where_args))
+        for items in groups.values():
+            for set_args, where_args in items:
+                self._update(table_name, set_args, where_args)
+
+    def _update(
+        self, table_name: str, set_args: 'DbArgDict', where_args: 'DbArgDict'
+    ) -> None:
+        """Apply an UPDATE operation to a single row."""
+        if (
+            where_args.keys() != {'cycle', 'name', 'flow_nums'}
+            or not set_args.keys().isdisjoint(where_args)
+        ):
+            # not a single-row update, or the row's key changes
+            self.clear(where_args.get('cycle'))
+            return
+        cycle = where_args['cycle']
+        if table_name == CylcWorkflowDAO.TABLE_TASK_STATES:
+            row = self.states.get(cycle, {}).get(
+                where_args['name'], {}
+            ).get(where_args['flow_nums'])
+            if row is not None:
+                for index, column in enumerate(
+                    ('submit_num', 'flow_wait', 'status')
+                ):
+                    if column in set_args:
+                        row[index] = set_args[column]
+        else:
+            outputs = self.outputs.get(cycle, {}).get(where_args['name'])
+            if (
+                outputs is not None
+                and where_args['flow_nums'] in outputs
+                and 'outputs' in set_args
+            ):
+                outputs[where_args['flow_nums']] = set_args['outputs']
+
+
 class WorkflowDatabaseManager:
     """Manage the workflow runtime private and public databases."""
 
@@ -131,6 +307,9 @@ class WorkflowDatabaseManager:
     TABLE_XTRIGGERS = CylcWorkflowDAO.TABLE_XTRIGGERS
     TABLE_ABS_OUTPUTS = CylcWorkflowDAO.TABLE_ABS_OUTPUTS
 
+    # Warn if this many batches are waiting for the background writers.
+    WRITE_BACKLOG_WARN = 50
+
     def __init__(self, pri_d=None, pub_d=None):
         self.pri_path = None
         if pri_d:
@@ -143,6 +322,12 @@ class WorkflowDatabaseManager:
         self.pri_dao = None
         self.pub_dao = None
         self.n_restart = 0
+        self.background_writes = False
+        self.write_backlog_warned = 0
+        # Table content last queued by put_task_pool, {table: {key: row}}
+        self.table_rows: Dict[str, Dict[tuple, DbArgDict]] = {}
+        # Task history, kept in sync with writes to the private database
+        self.task_history = TaskHistory(lambda: self.pri_dao)
 
         self.db_deletes_map: Dict[str, List[DbArgDict]] = {
             self.TABLE_BROADCAST_STATES: [],
@@ -175,6 +360,10 @@ class WorkflowDatabaseManager:
 
     def copy_pri_to_pub(self) -> None:
         """Copy content of primary database file to public database file."""
+        if self.pri_dao.writer is not None:
+            # ensure everything written so far is in the database file
+            self.pri_dao.checkpoint()
+        self.pub_dao.flush()
         self.pub_dao.close()
         # Use temporary file to ensure that we do not end up with a
         # partial file.
@@ -195,6 +384,11 @@ class WorkflowDatabaseManager:
             st_mode = os.stat(self.pub_dao.db_file_name).st_mode
 
             copy(self.pri_dao.db_file_name, temp_pub_db_file_name)
+            if self.pri_dao.writer is not None:
+                # the private database may be in write-ahead log mode, which
+                # is not suitable for the public database
+                with closing(sqlite3.connect(temp_pub_db_file_name)) as conn:
+                    conn.execute("PRAGMA journal_mode=DELETE")
             os.rename(temp_pub_db_file_name, self.pub_dao.db_file_name)
             os.chmod(self.pub_dao.db_file_name, st_mode)
         except OSError:
@@ -208,6 +402,9 @@ class WorkflowDatabaseManager:
         NOTE: the DAO should be closed after use. You can use this function as
         a context manager, which handles this for you.
         """
+        if self.pri_dao is not None:
+            # make sure the new connection sees all items queued so far
+            self.pri_dao.flush()
         return CylcWorkflowDAO(self.pri_path, create_tables=True)
 
     @staticmethod
@@ -245,14 +442,24 @@ class WorkflowDatabaseManager:
         os.chmod(self.pri_path, PERM_PRIVATE)
         self.pub_dao = CylcWorkflowDAO(self.pub_path, is_public=True)
         self.copy_pri_to_pub()
+        self.background_writes = glbl_cfg().get(
+            ['scheduler', 'background database writes'])
+        if self.background_writes:
+            self.pri_dao.start_writer(wal=True)
+            self.pub_dao.start_writer()
 
     def on_workflow_shutdown(self):
-        """Close data access objects."""
+        """Close data access objects.
+
+        Any items handed to the background writers are written first.
+        """
         if self.pri_dao:
             self.pri_dao.close()
+            self.pri_dao.stop_writer()
             self.pri_dao = None
         if self.pub_dao:
             self.pub_dao.close()
+            self.pub_dao.stop_writer()
             self.pub_dao = None
 
     def process_queued_ops(self) -> None:
@@ -267,29 +474,55 @@ class WorkflowDatabaseManager:
                     where_args = db_deletes.pop(0)
                     self.pri_dao.add_delete_item(table_name, where_args)
                     self.pub_dao.add_delete_item(table_name, where_args)
+                    self.task_history.on_delete(table_name, where_args)
         if any(self.db_inserts_map.values()):
             for table_name, db_inserts in sorted(self.db_inserts_map.items()):
                 while db_inserts:
                     db_insert = db_inserts.pop(0)
                     self.pri_dao.add_insert_item(table_name, db_insert)
                     self.pub_dao.add_insert_item(table_name, db_insert)
+                    self.task_history.on_insert(table_name, db_insert)
         if any(self.db_updates_map.values()):
             for table_name, db_updates in sorted(self.db_updates_map.items()):
+                self.task_history.on_updates(table_name, db_updates)
                 while db_updates:
                     db_update = db_updates.pop(0)
                     self.pri_dao.add_update_item(table_name, db_update)
                     self.pub_dao.add_update_item(table_name, db_update)
 
-        # Previously, we used a separate thread for database writes. This has
-        # now been removed. For the private database, there is no real
-        # advantage in using a separate thread as it needs to be always in sync
-        # with what is current. For the public database, which does not need to
-        # be fully in sync, there is some advantage of using a separate
-        # thread/process, if writing to it becomes a bottleneck. At the moment,
-        # there is no evidence that this is a bottleneck, so it is better to
-        # keep the logic simple.
+        # By default the databases are written here, in the main loop.
+        # If "background database writes" is configured, the items are
+        # handed over to writer threads instead (reads from the private
+        # database wait for outstanding writes so remain consistent).
         self.pri_dao.execute_queued_items()
         self.pub_dao.execute_queued_items()
+        if self.background_writes:
+            self._check_write_backlog()
+
+    def sync_queued_ops(self) -> None:
+        """Write queued items and wait for the private DB to be written.
+
+        Call this before irreversible actions (e.g. job submission) so that
+        a restart knows about them even if the scheduler is killed.
+        """
+        self.process_queued_ops()
+        if self.pri_dao is not None:
+            self.pri_dao.flush()
+
+    def _check_write_backlog(self) -> None:
+        """Log a warning if the background writers are falling behind.
+
+        Warns each time the backlog doubles beyond the threshold.
+        """
+        backlog = max(self.pri_dao.backlog, self.pub_dao.backlog)
+        if backlog < self.WRITE_BACKLOG_WARN:
+            self.write_backlog_warned = 0
+        elif backlog >= 2 * self.write_backlog_warned:
+            self.write_backlog_warned = backlog
+            LOG.warning(
+                f'Database writes are falling behind: {backlog}'
+                ' batches waiting to be written'
+            )
 
     def put_broadcast(self, modified_settings, is_cancel=False):
         """Put or clear broadcasts in runtime database."""
@@ -495,56 +728,73 @@ class WorkflowDatabaseManager:
             (set_args, where_args))
 
     def put_task_pool(self, pool: 'TaskPool') -> None:
-        """Delete task pool table content and recreate from current task pool.
+        """Update task pool table content from current task pool.
 
-        Also recreate:
+        Also update:
         - prerequisites table
         - timeout timers table
         - action timers table
-
-        And update:
         - task states table
+
+        The task pool, prerequisites and timeout timers tables are recreated
+        the first time, after that only rows which have changed are
+        rewritten.
         """
-        self.db_deletes_map[self.TABLE_TASK_POOL].append({})
-        # Comment this out to retain the trigger-time prereq status of past
-        # tasks (but then the prerequisite table will grow indefinitely):
-        self.db_deletes_map[self.TABLE_TASK_PREREQUISITES].append({})
-        # This should already be done by self.put_task_event_timers above:
-        # self.db_deletes_map[self.TABLE_TASK_ACTION_TIMERS].append({})
-        self.db_deletes_map[self.TABLE_TASK_TIMEOUT_TIMERS].append({})
+        # Comment out the prerequisites to retain the trigger-time prereq
+        # status of past tasks (but then the prerequisite table will grow
+        # indefinitely).
+        # The action timers table should already have been cleared by
+        # self.put_task_event_timers above.
+        pool_rows: Dict[tuple, DbArgDict] = {}
+        prereq_rows: Dict[tuple, DbArgDict] = {}
+        timeout_rows: Dict[tuple, DbArgDict] = {}
         for itask in pool.get_tasks():
+            cycle = str(itask.point)
+            name = itask.tdef.name
+            flow_nums = serialise_set(itask.flow_nums)
             for prereq in itask.state.prerequisites:
                 for (p_cycle, p_name, p_output), satisfied_state in (
                     prereq.items()
                 ):
-                    self.put_insert_task_prerequisites(itask, {
+                    prereq_rows[
+                        (cycle, name, flow_nums, p_name, p_cycle, p_output)
+                    ] = {
+                        "name": name,
+                        "cycle": cycle,
+                        "flow_nums": flow_nums,
                         "prereq_name": p_name,
                         "prereq_cycle": p_cycle,
                         "prereq_output": p_output,
                         "satisfied": satisfied_state
-                    })
+                    }
             for x_label, x_satisfied in itask.state.xtriggers.items():
                 if x_satisfied:
-                    self.put_insert_task_prerequisites(itask, {
+                    prereq_rows[(
+                        cycle, name, flow_nums, x_label,
+                        XTRIGGER_PREREQ_PREFIX, TASK_OUTPUT_SUCCEEDED
+                    )] = {
+                        "name": name,
+                        "cycle": cycle,
+                        "flow_nums": flow_nums,
                         "prereq_name": x_label,
                         "prereq_cycle": XTRIGGER_PREREQ_PREFIX,
                         "prereq_output": TASK_OUTPUT_SUCCEEDED,
                         "satisfied": True
-                    })
+                    }
 
-            self.db_inserts_map[self.TABLE_TASK_POOL].append({
-                "name": itask.tdef.name,
-                "cycle": str(itask.point),
-                "flow_nums": serialise_set(itask.flow_nums),
+            pool_rows[(cycle, name, flow_nums)] = {
+                "name": name,
+                "cycle": cycle,
+                "flow_nums": flow_nums,
                 "status": itask.state.status,
                 "is_held": itask.state.is_held
-            })
+            }
             if itask.timeout is not None:
-                self.db_inserts_map[self.TABLE_TASK_TIMEOUT_TIMERS].append({
-                    "name": itask.tdef.name,
-                    "cycle": str(itask.point),
+                timeout_rows[(cycle, name)] = {
+                    "name": name,
+                    "cycle": cycle,
                     "timeout": itask.timeout
-                })
+                }
             if itask.poll_timer is not None:
                 self.db_inserts_map[self.TABLE_TASK_ACTION_TIMERS].append({
                     "name": itask.tdef.name,
@@ -587,6 +837,49 @@ class WorkflowDatabaseManager:
                 )
                 itask.state.time_updated = None
 
+        self._put_table_rows(
+            self.TABLE_TASK_POOL, pool_rows,
+            ("cycle", "name", "flow_nums"))
+        self._put_table_rows(
+            self.TABLE_TASK_PREREQUISITES, prereq_rows,
+            ("cycle", "name", "flow_nums", "prereq_name", "prereq_cycle",
+             "prereq_output"))
+        self._put_table_rows(
+            self.TABLE_TASK_TIMEOUT_TIMERS, timeout_rows, ("cycle", "name"))
+
+    def _put_table_rows(
+        self,
+        table_name: str,
+        rows: Dict[tuple, 'DbArgDict'],
+        key_columns: Tuple[str, ...],
+    ) -> None:
+        """Queue the changes needed for a table to contain exactly these rows.
+
+        Args:
+            table_name: The table (its content must only be written here).
+            rows: The table content, {key: row}, where the key is the values
+                of the key_columns in the row.
+            key_columns: The primary key columns of the table.
+
+        The first time, the table is recreated. After that, only rows which
+        have been removed since the last call are deleted and only new or
+        changed rows are inserted (INSERT OR REPLACE replaces the old row).
+        """
+        prev_rows = self.table_rows.get(table_name)
+        if prev_rows is None:
+            self.db_deletes_map[table_name].append({})
+            self.db_inserts_map[table_name].extend(rows.values())
+        else:
+            for key in prev_rows:
+                if key not in rows:
+                    self.db_deletes_map[table_name].append(
+                        dict(zip(key_columns, key))
+                    )
+            for key, row in rows.items():
+                if prev_rows.get(key) != row:
+                    self.db_inserts_map[table_name].append(row)
+        self.table_rows[table_name] = rows
+
     def put_tasks_to_hold(
         self, tasks: Set[Tuple[str, 'PointBase']]
     ) -> None:
@@ -631,11 +924,6 @@ class WorkflowDatabaseManager:
             },
         )
 
-    def put_insert_task_prerequisites(self, itask, args):
-        """Put INSERT statement for task_prerequisites table."""
-        args.setdefault("flow_nums", serialise_set(itask.flow_nums))
-        self._put_insert_task_x(self.TABLE_TASK_PREREQUISITES, itask, args)
-
     def put_insert_task_outputs(self, itask):
         """Reset outputs for a task."""
         self._put_insert_task_x(
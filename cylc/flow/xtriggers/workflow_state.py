@@ -22,7 +22,7 @@ from cylc.flow.scripts.workflow_state import WorkflowPoller
 from cylc.flow.id import tokenise
 from cylc.flow.exceptions import WorkflowConfigError, InputError
 from cylc.flow.task_state import TASK_STATUS_SUCCEEDED
-from cylc.flow.dbstatecheck import check_polling_config
+from cylc.flow.dbstatecheck import CylcWorkflowDBCache, check_polling_config
 
 
 DEFAULT_STATUS = TASK_STATUS_SUCCEEDED
@@ -40,6 +40,10 @@ def workflow_state(
 
     If the status or output has been achieved, return {True, result}.
 
+    Results are cached (in ~/.cylc), so that xtriggers making the same query
+    of the same workflow (including those of other workflows) only query its
+    DB once between changes to it.
+
     Args:
         workflow_task_id:
             ID (workflow//point/task:selector) of the target task.
@@ -94,7 +98,9 @@ def workflow_state(
         condition=workflow_task_id,
         max_polls=1,  # (for xtriggers the scheduler does the polling)
         interval=0,  # irrelevant for 1 poll
-        args=[]
+        args=[],
+        # (share results with other xtriggers polling the same workflow)
+        cache=CylcWorkflowDBCache(),
     )
 
     # NOTE the results dict item names remain compatible with older usage.
@@ -0,0 +1,149 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Database writes of the task pool.
+
+This measures the statements and rows written to the workflow databases,
+and the time taken to queue and commit them, for each main loop pass of a
+large workflow in which some of the tasks change state several times. Only
+the rows of tasks which have changed are rewritten, this is compared with
+rewriting the task pool tables in full each pass.
+"""
+
+from time import perf_counter
+from types import SimpleNamespace
+
+from cylc.flow.rundb import CylcWorkflowDAO
+from cylc.flow.workflow_db_mgr import WorkflowDatabaseManager
+
+
+# number of tasks in the pool
+POOL_SIZE = 10000
+
+# number of tasks which change each main loop pass
+CHANGED_TASKS = 2000
+
+# number of times each changed task changes state in a pass
+CHANGES_PER_TASK = 5
+
+PASSES = 5
+
+# upper limit on the rows written per pass, as a fraction of those written
+# if the task pool tables are rewritten in full
+MAX_ROWS_RATIO = 0.5
+
+
+def make_task(i):
+    cycle = str(i // 10 + 1)
+    name = f't{i % 10}'
+    return SimpleNamespace(
+        point=cycle,
+        tdef=SimpleNamespace(name=name),
+        flow_nums={1},
+        submit_num=0,
+        is_manual_submit=False,
+        timeout=None,
+        poll_timer=None,
+        try_timers={},
+        get_try_num=lambda: 1,
+        state=SimpleNamespace(
+            status='waiting',
+            is_held=False,
+            time_updated=None,
+            xtriggers={},
+            prerequisites=[
+                {(str(int(cycle) - 1), name, 'succeeded'): False}
+            ],
+        ),
+    )
+
+
+def run_passes(db_mgr, pool, full_rewrite, written):
+    """Return the (statements, rows written, seconds) per pass."""
+    written.clear()
+    duration = 0.0
+    for i in range(PASSES):
+        changed = pool.tasks[
+            (i * CHANGED_TASKS) % POOL_SIZE:
+            (i * CHANGED_TASKS) % POOL_SIZE + CHANGED_TASKS
+        ]
+        start = perf_counter()
+        for j in range(CHANGES_PER_TASK):
+            for itask in changed:
+                itask.state.status = f'state-{i}-{j}'
+                itask.state.time_updated = f'time-{i}-{j}'
+                itask.state.prerequisites[0][
+                    next(iter(itask.state.prerequisites[0]))
+                ] = j % 2 == 0
+            if full_rewrite:
+                db_mgr.table_rows.clear()
+            db_mgr.put_task_pool(pool)
+        db_mgr.process_queued_ops()
+        duration += perf_counter() - start
+    return (
+        sum(stmts for stmts, _ in written) / PASSES,
+        sum(rows for _, rows in written) / PASSES,
+        duration / PASSES,
+    )
+
+
+def test_db_task_pool_writes(tmp_path, monkeypatch):
+    """Measure the rows written per main loop pass."""
+    monkeypatch.setattr(
+        'cylc.flow.workflow_db_mgr.glbl_cfg',
+        lambda: SimpleNamespace(get=lambda *_: False),
+    )
+    # count the statements and rows written to the databases
+    written = []
+    execute_sql_queue = CylcWorkflowDAO.execute_sql_queue
+
+    def _execute_sql_queue(self, sql_queue, *args, **kwargs):
+        written.append((
+            len(sql_queue),
+            sum(len(stmt_args) for _, stmt_args in sql_queue),
+        ))
+        return execute_sql_queue(self, sql_queue, *args, **kwargs)
+
+    monkeypatch.setattr(
+        CylcWorkflowDAO, 'execute_sql_queue', _execute_sql_queue
+    )
+    results = {}
+    for full_rewrite in (True, False):
+        run_dir = tmp_path / str(full_rewrite)
+        (run_dir / 'log').mkdir(parents=True)
+        db_mgr = WorkflowDatabaseManager(
+            str(run_dir / 'log'), str(run_dir)
+        )
+        db_mgr.on_workflow_start(is_restart=False)
+        pool = SimpleNamespace(tasks=[make_task(i) for i in range(POOL_SIZE)])
+        pool.get_tasks = lambda pool=pool: pool.tasks
+        try:
+            # (the first write is a full rewrite either way)
+            db_mgr.put_task_pool(pool)
+            db_mgr.process_queued_ops()
+            results[full_rewrite] = run_passes(
+                db_mgr, pool, full_rewrite, written
+            )
+        finally:
+            db_mgr.on_workflow_shutdown()
+
+    for full_rewrite, label in ((True, 'full rewrite'), (False, 'changes')):
+        stmts, rows, seconds = results[full_rewrite]
+        print(
+            f'\n{label}: {stmts:.0f} statements, {rows:.0f} rows written'
+            f' per pass in {seconds * 1000:.0f}ms'
+        )
+    assert results[False][1] < MAX_ROWS_RATIO * results[True][1]
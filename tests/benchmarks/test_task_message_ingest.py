@@ -0,0 +1,90 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Throughput of task message ingest by the scheduler.
+
+This measures how quickly Scheduler.process_queued_task_messages takes
+messages off the queue and dispatches them to the tasks in a large pool.
+Processing each message (TaskEventsManager.process_message) is left out, as
+its cost does not depend on the dispatch.
+"""
+
+from queue import Queue
+from time import perf_counter
+from types import SimpleNamespace
+
+from cylc.flow.network.resolvers import TaskMsg
+from cylc.flow.scheduler import Scheduler
+
+
+# number of tasks in the pool
+POOL_SIZE = 30000
+
+# number of messages received per main loop iteration
+MESSAGES_PER_ITERATION = 50
+
+ITERATIONS = 200
+
+# lower limit on the number of messages ingested per second
+MIN_MESSAGES_PER_SECOND = 30000
+
+
+class MockPool:
+    def __init__(self, task_ids):
+        self.tasks = {
+            task_id: SimpleNamespace(identity=task_id)
+            for task_id in task_ids
+        }
+
+    def get_task_by_id(self, id_):
+        return self.tasks.get(id_)
+
+
+def test_task_message_ingest():
+    """Measure the number of task messages ingested per second."""
+    task_ids = [f'{i // 10 + 1}/t{i % 10}' for i in range(POOL_SIZE)]
+    processed = []
+    schd = SimpleNamespace(
+        message_queue=Queue(),
+        pool=MockPool(task_ids),
+        task_events_mgr=SimpleNamespace(
+            FLAG_RECEIVED='received',
+            process_message=lambda itask, *args: processed.append(itask),
+        ),
+        wake_main_loop=lambda: None,
+    )
+
+    duration = 0.0
+    for i in range(ITERATIONS):
+        for j in range(MESSAGES_PER_ITERATION):
+            task_id = task_ids[
+                (i * MESSAGES_PER_ITERATION + j) * 7 % POOL_SIZE
+            ]
+            schd.message_queue.put(
+                TaskMsg(f'{task_id}/01', 'now', 'INFO', 'started')
+            )
+        start = perf_counter()
+        Scheduler.process_queued_task_messages(schd)  # type: ignore
+        duration += perf_counter() - start
+
+    num_messages = ITERATIONS * MESSAGES_PER_ITERATION
+    assert len(processed) == num_messages
+    messages_per_second = num_messages / duration
+    print(
+        f'\n{num_messages} messages to a pool of {POOL_SIZE} tasks:'
+        f' {messages_per_second:.0f} messages per second'
+    )
+    assert messages_per_second > MIN_MESSAGES_PER_SECOND
@@ -0,0 +1,88 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Memory used by task proxies."""
+
+import gc
+import tracemalloc
+
+from cylc.flow.config import WorkflowConfig
+from cylc.flow.cycling.integer import IntegerInterval
+from cylc.flow.id import Tokens
+from cylc.flow.scripts.validate import ValidateOptions
+from cylc.flow.task_proxy import TaskProxy
+
+
+FLOW_CYLC = '''
+[scheduling]
+    cycling mode = integer
+    initial cycle point = 1
+    [[graph]]
+        P1 = """
+            a[-P1] => a => b & c
+            b => d
+            c:x? => d
+            d => e
+        """
+[runtime]
+    [[a, b, d, e]]
+    [[c]]
+        [[[outputs]]]
+            x = the x message
+'''
+
+# number of cycles to instantiate tasks for
+CYCLES = 1000
+
+# upper limit on the memory used per task (bytes)
+MAX_BYTES_PER_TASK = 6000
+
+
+def test_task_proxy_memory(tmp_path):
+    """Measure the memory used by task proxies."""
+    flow_file = tmp_path / 'flow.cylc'
+    flow_file.write_text(FLOW_CYLC)
+    config = WorkflowConfig('benchmark', str(flow_file), ValidateOptions())
+    tokens = Tokens('~user/benchmark')
+    step = IntegerInterval('P1')
+    points = [config.start_point]
+    for _ in range(CYCLES - 1):
+        points.append(points[-1] + step)
+
+    # (instantiate one of each task first, to leave out one-off costs)
+    for tdef in config.taskdefs.values():
+        TaskProxy(tokens, tdef, points[0])
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        itasks = [
+            TaskProxy(tokens, tdef, point)
+            for point in points
+            for tdef in config.taskdefs.values()
+        ]
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    bytes_per_task = used / len(itasks)
+    print(
+        f'\n{len(itasks)} task proxies: {used / 1024 ** 2:.1f} MiB'
+        f' ({bytes_per_task:.0f} bytes per task)'
+    )
+    assert bytes_per_task < MAX_BYTES_PER_TASK
@@ -17,10 +17,11 @@
 import logging
 from typing import AsyncGenerator, Callable
 from unittest.mock import Mock
+from uuid import uuid4
 
 import pytest
 
-from cylc.flow.data_store_mgr import EDGES, TASK_PROXIES
+from cylc.flow.data_store_mgr import DELTA_ADDED, EDGES, TASK_PROXIES
 from cylc.flow.id import Tokens
 from cylc.flow import CYLC_LOG
 from cylc.flow.network.resolvers import Resolvers
@@ -127,6 +128,40 @@ async def test_get_nodes_all(mock_flow, node_args):
     assert len(nodes) == 1
 
 
+@pytest.mark.parametrize(
+    'ids, states',
+    [
+        pytest.param([], ['waiting'], id='states'),
+        pytest.param(['20000101T0000Z'], [], id='cycle'),
+        pytest.param(['*/foo', '20000101T0000Z/bar'], [], id='cycle-name'),
+        pytest.param(['2000*/prep'], ['waiting'], id='glob-states'),
+        pytest.param(['20000101T0000Z/*'], [], id='name-glob'),
+        pytest.param(
+            ['*/foo', '20000101T0000Z'], ['waiting', 'failed'], id='mixed'
+        ),
+        pytest.param(['3000/foo'], [], id='no-match'),
+    ]
+)
+async def test_get_nodes_all_indexed(mock_flow, node_args, ids, states):
+    """Nodes looked up via the data-store indexes match a full scan."""
+    node_args['ids'] = [Tokens(n_id, relative=True) for n_id in ids]
+    node_args['states'] = states
+    nodes = await mock_flow.resolvers.get_nodes_all(TASK_PROXIES, node_args)
+    indexes = mock_flow.schd.data_store_mgr.node_indexes
+    mock_flow.schd.data_store_mgr.node_indexes = {}
+    try:
+        expected = await mock_flow.resolvers.get_nodes_all(
+            TASK_PROXIES, node_args
+        )
+    finally:
+        mock_flow.schd.data_store_mgr.node_indexes = indexes
+    assert sorted(node.id for node in nodes) == sorted(
+        node.id for node in expected
+    )
+    if ids != ['3000/foo']:
+        assert nodes
+
+
 async def test_get_nodes_by_ids(mock_flow, node_args):
     """Test method returning workflow(s) node messages
     who's ID is a match to any given."""
@@ -194,6 +229,62 @@ async def test_get_edges_by_ids(mock_flow, node_args):
     assert len(edges) > 0
 
 
+async def test_delta_projections(mock_flow, node_args):
+    """Subscriptions with the same arguments should share filtered deltas."""
+    resolvers = mock_flow.resolvers
+    delta = {DELTA_ADDED: mock_flow.data}
+    sub1, sub2 = uuid4(), uuid4()
+    resolvers.delta_store[sub1] = {mock_flow.id: delta}
+    resolvers.delta_store[sub2] = {mock_flow.id: delta}
+    node_args.update(
+        delta_store=True,
+        delta_type=DELTA_ADDED,
+        native_ids=mock_flow.node_ids,
+    )
+    try:
+        # the same delta and arguments -> shared
+        nodes = await resolvers.get_nodes_by_ids(
+            TASK_PROXIES, {**node_args, 'sub_id': sub1}
+        )
+        assert nodes
+        assert await resolvers.get_nodes_by_ids(
+            TASK_PROXIES, {**node_args, 'sub_id': sub2}
+        ) is nodes
+
+        # different arguments -> not shared
+        assert await resolvers.get_nodes_by_ids(
+            TASK_PROXIES, {**node_args, 'sub_id': sub2, 'states': ['failed']}
+        ) == []
+
+        # different delta -> not shared
+        resolvers.delta_store[sub1][mock_flow.id] = {
+            DELTA_ADDED: mock_flow.data
+        }
+        resolvers.prune_delta_projections()
+        assert len(resolvers.delta_projections) == 2
+        nodes_1 = await resolvers.get_nodes_by_ids(
+            TASK_PROXIES, {**node_args, 'sub_id': sub1}
+        )
+        assert nodes_1 == nodes
+        assert nodes_1 is not nodes
+
+        # the views are dropped with the deltas
+        del resolvers.delta_store[sub1]
+        resolvers.prune_delta_projections()
+        assert len(resolvers.delta_projections) == 2
+        del resolvers.delta_store[sub2]
+        resolvers.prune_delta_projections()
+        assert resolvers.delta_projections == {}
+
+        summary = mock_flow.schd.main_loop_timings.summary()
+        assert summary['subscription_projection']['count'] >= 3
+        assert summary['subscription_projection_shared']['count'] >= 1
+    finally:
+        resolvers.delta_store.pop(sub1, None)
+        resolvers.delta_store.pop(sub2, None)
+        resolvers.delta_projections.clear()
+
+
 async def test_mutator(mock_flow, flow_args):
     """Test the mutation method."""
     flow_args['workflows'].append({
@@ -21,6 +21,7 @@ from typing import Callable
 import pytest
 
 from cylc.flow import __version__ as CYLC_VERSION
+from cylc.flow.network.message_relay import MessageRelay
 from cylc.flow.network.server import PB_METHOD_MAP
 from cylc.flow.scheduler import Scheduler
 
@@ -71,6 +72,34 @@ def test_pb_entire_workflow(myflow):
     assert data.workflow.id == myflow.id
 
 
+async def test_put_messages(one: Scheduler, start):
+    """Test the put_messages endpoint queues the messages of many jobs."""
+    async with start(one):
+        assert one.server.put_messages([
+            ['1/one/01', 'now', [['INFO', 'started'], ['INFO', 'x']]],
+            ['1/one/02', 'then', [['INFO', 'started']]],
+        ]) == 'Messages queued for 2 jobs'
+        messages = []
+        while one.message_queue.qsize():
+            messages.append(tuple(one.message_queue.get()))
+        assert messages == [
+            ('1/one/01', 'now', 'INFO', 'started'),
+            ('1/one/01', 'now', 'INFO', 'x'),
+            ('1/one/02', 'then', 'INFO', 'started'),
+        ]
+
+
+async def test_put_messages_relay(one: Scheduler, start):
+    """Test a message relay sends batches of messages to the scheduler."""
+    async with start(one):
+        relay = MessageRelay('relay.sock')
+        relay.put(one.workflow, '1/one/01', 'now', [['INFO', 'started']])
+        relay.put(one.workflow, '1/one/02', 'now', [['INFO', 'started']])
+        await relay.flush()
+        assert not relay.queues
+        assert one.message_queue.qsize() == 2
+
+
 async def test_stop(one: Scheduler, start):
     """Test stop."""
     async with start(one):
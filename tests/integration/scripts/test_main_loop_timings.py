@@ -0,0 +1,54 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+from types import SimpleNamespace
+
+from cylc.flow.scripts.main_loop_timings import run
+
+
+async def test_main_loop_timings(one, start):
+    """It should report the durations of the main loop phases."""
+    async with start(one):
+        await one._main_loop()
+        await one._main_loop()
+
+        opts = SimpleNamespace(comms_timeout=5, json=True)
+        timings = json.loads(await run(opts, one.workflow))
+        for phase in (
+            'main_loop',
+            'process_command_queue',
+            'proc_pool_process',
+            'xtrigger_scan',
+            'release_tasks_to_run',
+            'process_queued_task_messages',
+            'process_events',
+            'process_workflow_db_queue',
+            'plugins',
+        ):
+            assert timings[phase]['count'] >= 2
+            assert timings[phase]['max'] >= timings[phase]['p50'] >= 0
+        # (called twice per iteration)
+        assert timings['process_command_queue']['count'] == 4
+        assert sum(timings['main_loop']['histogram'].values()) == 2
+
+        opts.json = False
+        table = (await run(opts, one.workflow)).splitlines()
+        assert table[0].split() == [
+            'phase', 'count', 'mean', 'p50', 'p95', 'p99', 'max'
+        ]
+        assert table[1].split()[:2] == ['main_loop', '2']
@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from collections import Counter
 from logging import INFO
 from typing import (
     Iterable,
@@ -24,6 +25,8 @@ from typing import (
 import pytest
 
 from cylc.flow.data_messages_pb2 import (
+    AllDeltas,
+    PbEntireWorkflow,
     PbPrerequisite,
     PbTaskProxy,
 )
@@ -422,7 +425,7 @@ async def test_prune_data_store(flow, scheduler, start):
             if f.name == 'BAR'
         }) == 1
         # Before updating the data-store, remove bar/BAR.
-        schd.pool.remove(schd.pool._get_task_by_id('1/bar'), 'Test removal')
+        schd.pool.remove(schd.pool.get_task_by_id('1/bar'), 'Test removal')
         schd.data_store_mgr.update_data_structure()
         # bar/BAR not found in data or added stores.
         assert len({
@@ -490,8 +493,8 @@ def test_delta_task_xtrigger(xharness):
     """Test delta_task_xtrigger."""
     schd: Scheduler
     schd, _ = xharness
-    foo = schd.pool._get_task_by_id('1/foo')
-    bar = schd.pool._get_task_by_id('1/bar')
+    foo = schd.pool.get_task_by_id('1/foo')
+    bar = schd.pool.get_task_by_id('1/bar')
 
     assert not foo.state.xtriggers['x']  # not satisfied
     assert not foo.state.xtriggers['y']  # not satisfied
@@ -739,3 +742,208 @@ async def test_remove_added_jobs_of_pruned_task(one: Scheduler, start):
         one.data_store_mgr.update_data_structure()
         assert not one.data_store_mgr.data[one.id][JOBS]
         assert not one.data_store_mgr.added[JOBS]
+
+
+async def test_family_task_totals(flow, scheduler, start):
+    """Family state totals are updated incrementally as tasks change.
+
+    They should always match a recount of the states of the child tasks and
+    families.
+    """
+    id_ = flow({
+        'scheduling': {
+            'graph': {
+                'R1': 'FAM:succeed-all => bar'
+            }
+        },
+        'runtime': {
+            'FAM': {},
+            'SUBFAM': {'inherit': 'FAM'},
+            **{f'm{i}': {'inherit': 'FAM'} for i in range(10)},
+            **{f's{i}': {'inherit': 'SUBFAM'} for i in range(5)},
+            'bar': {},
+        }
+    })
+    schd = scheduler(id_)
+
+    def recount(fp_id):
+        data = schd.data_store_mgr.data[schd.data_store_mgr.workflow_id]
+        all_nodes = schd.data_store_mgr.all_n_window_nodes
+        fam_node = data[FAMILY_PROXIES][fp_id]
+        states = Counter()
+        n_held = 0
+        for child_id in fam_node.child_families:
+            child_states, child_held = recount(child_id)
+            states.update(child_states)
+            n_held += child_held
+        for tp_id in fam_node.child_tasks:
+            if all_nodes and tp_id not in all_nodes:
+                continue
+            tp_node = data[TASK_PROXIES][tp_id]
+            states[tp_node.state] += 1
+            n_held += tp_node.is_held
+        return states, n_held
+
+    def check():
+        data = schd.data_store_mgr.data[schd.data_store_mgr.workflow_id]
+        for fp_id, fp_node in data[FAMILY_PROXIES].items():
+            states, n_held = recount(fp_id)
+            assert {
+                state: total
+                for state, total in fp_node.state_totals.items()
+                if total
+            } == states
+            assert fp_node.is_held_total == n_held
+
+    async with start(schd):
+        await schd.update_data_structure()
+        check()
+
+        itasks = sorted(schd.pool.get_tasks(), key=lambda t: t.identity)
+        schd.pool.hold_tasks([itasks[0].identity, itasks[-1].identity])
+        await schd.update_data_structure()
+        check()
+
+        for i, itask in enumerate(itasks):
+            for status in (TASK_STATUS_PREPARING, TASK_STATUS_FAILED):
+                itask.state_reset(status)
+                schd.data_store_mgr.delta_task_state(itask)
+                if i % 3 == 0:
+                    await schd.update_data_structure()
+                    check()
+        await schd.update_data_structure()
+        check()
+
+        # remove some tasks => pruned from the data store
+        for itask in itasks[:4]:
+            schd.pool.remove(itask, 'Test removal')
+        await schd.update_data_structure()
+        check()
+
+        # change the n-window extent
+        schd.data_store_mgr.set_graph_window_extent(0)
+        await schd.update_data_structure()
+        check()
+
+
+async def test_node_indexes(flow, scheduler, start):
+    """The node indexes are kept up to date as deltas are applied."""
+    id_ = flow({
+        'scheduling': {
+            'cycling mode': 'integer',
+            'initial cycle point': '1',
+            'final cycle point': '3',
+            'graph': {
+                'P1': 'FAM:succeed-all => bar'
+            }
+        },
+        'runtime': {
+            'FAM': {},
+            'a': {'inherit': 'FAM'},
+            'b': {'inherit': 'FAM'},
+            'bar': {},
+        }
+    })
+    schd = scheduler(id_)
+
+    def check():
+        data = schd.data_store_mgr.data[schd.data_store_mgr.workflow_id]
+        indexes = schd.data_store_mgr.node_indexes[
+            schd.data_store_mgr.workflow_id]
+        for node_type in (TASK_PROXIES, FAMILY_PROXIES, JOBS):
+            index = indexes[node_type]
+            assert set(index.node_values) == set(data[node_type])
+            for attr in index.ATTRS:
+                expected = {}
+                for node in data[node_type].values():
+                    expected.setdefault(
+                        getattr(node, attr, ''), set()
+                    ).add(node.id)
+                assert index.index[attr] == expected
+
+    async with start(schd):
+        await schd.update_data_structure()
+        check()
+        index = schd.data_store_mgr.node_indexes[
+            schd.data_store_mgr.workflow_id][TASK_PROXIES]
+        assert index.get('state', [TASK_STATUS_FAILED]) == set()
+
+        itasks = sorted(schd.pool.get_tasks(), key=lambda t: t.identity)
+        for itask in itasks[:2]:
+            itask.state_reset(TASK_STATUS_FAILED)
+            schd.data_store_mgr.delta_task_state(itask)
+        schd.data_store_mgr.insert_job(
+            itasks[0].tdef.name, str(itasks[0].point), TASK_STATUS_FAILED,
+            job_config(schd),
+        )
+        await schd.update_data_structure()
+        check()
+        assert schd.data_store_mgr.node_indexes[
+            schd.data_store_mgr.workflow_id][JOBS].node_values
+        assert index.get('state', [TASK_STATUS_FAILED]) == {
+            f'{schd.data_store_mgr.workflow_id}//{itask.identity}'
+            for itask in itasks[:2]
+        }
+
+        # remove tasks => pruned from the data store
+        for itask in itasks:
+            schd.pool.remove(itask, 'Test removal')
+        await schd.update_data_structure()
+        check()
+        assert index.get('state', [TASK_STATUS_FAILED]) == set()
+
+
+async def test_publish_deltas(one: Scheduler, start):
+    """The "all" deltas are assembled from the serialised topic deltas."""
+    async with start(one):
+        for itask in one.pool.get_tasks():
+            itask.state_reset(TASK_STATUS_FAILED)
+            one.data_store_mgr.delta_task_state(itask)
+        await one.update_data_structure()
+        publish_deltas = one.data_store_mgr.publish_deltas
+
+    topics = {topic.decode(): msg for topic, msg, _ in publish_deltas}
+    assert TASK_PROXIES in topics
+    expected = AllDeltas()
+    for key, msg in topics.items():
+        if key != 'all':
+            getattr(expected, key).ParseFromString(msg)
+    all_deltas = AllDeltas()
+    all_deltas.ParseFromString(topics['all'])
+    assert all_deltas == expected
+    assert {
+        tproxy.state for tproxy in all_deltas.task_proxies.updated
+    } == {TASK_STATUS_FAILED}
+
+
+async def test_get_serialised(one: Scheduler, start):
+    """Serialised messages are only rebuilt when the data-store changes."""
+    async with start(one):
+        data_store_mgr = one.data_store_mgr
+        await one.update_data_structure()
+        calls = []
+
+        def get_msg():
+            calls.append(1)
+            return data_store_mgr.get_entire_workflow()
+
+        first = data_store_mgr.get_serialised('x', get_msg)
+        assert data_store_mgr.get_serialised('x', get_msg) is first
+        assert len(calls) == 1
+
+        # no change => no new version
+        await one.update_data_structure()
+        assert data_store_mgr.get_serialised('x', get_msg) is first
+        assert len(calls) == 1
+
+        # change => message rebuilt
+        for itask in one.pool.get_tasks():
+            itask.state_reset(TASK_STATUS_FAILED)
+            data_store_mgr.delta_task_state(itask)
+        await one.update_data_structure()
+        msg = PbEntireWorkflow()
+        msg.ParseFromString(data_store_mgr.get_serialised('x', get_msg))
+        assert len(calls) == 2
+        assert {
+            tproxy.state for tproxy in msg.task_proxies
+        } == {TASK_STATUS_FAILED}
@@ -133,6 +133,51 @@ def test_output(checker):
     assert result == expect
 
 
+@pytest.mark.parametrize('task, cycle, selector, expect', [
+    pytest.param(
+        None,
+        None,
+        'custom_output',
+        [('output', '10000101T0000Z'), ('output', '10010101T0000Z')],
+        id='custom-output',
+    ),
+    pytest.param(
+        'bad',
+        None,
+        'failed',
+        [('bad', '10000101T0000Z')],
+        id='failed',
+    ),
+    pytest.param(
+        'ba*',
+        '1000*',
+        'finished',
+        [('bad', '10000101T0000Z')],
+        id='finished-glob',
+    ),
+    pytest.param(
+        'BAD',
+        None,
+        'finished',
+        [],
+        id='case-sensitive',
+    ),
+    pytest.param(
+        None,
+        None,
+        'message',
+        [],
+        id='message-is-not-a-trigger',
+    ),
+])
+def test_trigger(checker, task, cycle, selector, expect):
+    """Filter by task output trigger"""
+    result = checker.workflow_state_query(
+        task=task, cycle=cycle, selector=selector, is_trigger=True
+    )
+    assert [tuple(row[:2]) for row in result] == expect
+
+
 def test_flownum(checker):
     """Pass no args, get unfiltered output"""
     result = checker.workflow_state_query(flow_num=2)
@@ -155,16 +155,16 @@ async def test_flow_assignment(
 
         # By default inactive tasks get all active flows.
         do_command(['1/a'], flow=[])
-        assert schd.pool._get_task_by_id('1/a').flow_nums == {1, 2, 3}
+        assert schd.pool.get_task_by_id('1/a').flow_nums == {1, 2, 3}
 
         # Else assign requested flows.
         do_command(['1/b'], flow=[FLOW_NONE])
-        assert schd.pool._get_task_by_id('1/b').flow_nums == set()
+        assert schd.pool.get_task_by_id('1/b').flow_nums == set()
 
         do_command(['1/c'], flow=[FLOW_NEW])
-        assert schd.pool._get_task_by_id('1/c').flow_nums == {4}
+        assert schd.pool.get_task_by_id('1/c').flow_nums == {4}
 
         do_command(['1/d'], flow=[FLOW_ALL])
-        assert schd.pool._get_task_by_id('1/d').flow_nums == {1, 2, 3, 4}
+        assert schd.pool.get_task_by_id('1/d').flow_nums == {1, 2, 3, 4}
         do_command(['1/e'], flow=[7])
-        assert schd.pool._get_task_by_id('1/e').flow_nums == {7}
+        assert schd.pool.get_task_by_id('1/e').flow_nums == {7}
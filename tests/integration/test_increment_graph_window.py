@@ -408,3 +408,54 @@ async def test_cache_pruning(flow, scheduler, start):
         await complete_task(schd, 'f')
         increment_graph_window(schd, 'f')
         assert get_graph_walk_cache(schd) == []
+
+
+async def test_n_window_node_counts(flow, scheduler, start):
+    """It should reference count the n-window nodes of active tasks."""
+    id_ = flow({
+        'scheduler': {
+            'allow implicit tasks': 'True',
+        },
+        'scheduling': {
+            'graph': {
+                'R1': 'a => b1 & b2 => c => d'
+            }
+        },
+    })
+    schd = scheduler(id_)
+
+    def get_counts():
+        """Return the reference counts, checking they match the n-window."""
+        data_store_mgr = schd.data_store_mgr
+        counts = {}
+        for tp_id in data_store_mgr.all_task_pool:
+            for node_id in data_store_mgr.n_window_nodes[tp_id]:
+                counts[node_id] = counts.get(node_id, 0) + 1
+        assert data_store_mgr.n_window_node_counts == counts
+        assert data_store_mgr.all_n_window_nodes == set(counts)
+        return {
+            Tokens(node_id)['task']: count
+            for node_id, count in counts.items()
+        }
+
+    async with start(schd):
+        schd.pool.remove(schd.pool.get_tasks()[0])
+        schd.data_store_mgr.set_graph_window_extent(1)
+        await schd.update_data_structure()
+        assert get_counts() == {}
+
+        add_task(schd, 'b1')
+        increment_graph_window(schd, 'b1')
+        add_task(schd, 'b2')
+        increment_graph_window(schd, 'b2')
+        assert get_counts() == {'a': 2, 'b1': 1, 'b2': 1, 'c': 2}
+
+        await complete_task(schd, 'b1')
+        assert get_counts() == {'a': 1, 'b2': 1, 'c': 1}
+
+        # a drops out of the n-window once b1 & b2 have completed
+        add_task(schd, 'c')
+        increment_graph_window(schd, 'c')
+        await complete_task(schd, 'b2')
+        assert get_counts() == {'b1': 1, 'b2': 1, 'c': 1, 'd': 1}
+        assert set(await get_n_window(schd)) == {'b1', 'b2', 'c', 'd'}
@@ -77,8 +77,8 @@ async def test_basic(
     """Test removing a task from all flows."""
     schd: Scheduler = scheduler(example_workflow)
     async with start(schd):
-        a1 = schd.pool._get_task_by_id('1/a1')
-        a3 = schd.pool._get_task_by_id('1/a3')
+        a1 = schd.pool.get_task_by_id('1/a1')
+        a3 = schd.pool.get_task_by_id('1/a3')
         schd.pool.spawn_on_output(a1, TASK_OUTPUT_SUCCEEDED)
         schd.pool.spawn_on_output(a3, TASK_OUTPUT_SUCCEEDED)
         await schd.update_data_structure()
@@ -128,7 +128,7 @@ async def test_specific_flow(
         )
 
     async with start(schd):
-        a1 = schd.pool._get_task_by_id('1/a1')
+        a1 = schd.pool.get_task_by_id('1/a1')
         schd.pool.force_trigger_tasks(['1/a1'], ['1', '2'])
         schd.pool.spawn_on_output(a1, TASK_OUTPUT_SUCCEEDED)
         await schd.update_data_structure()
@@ -292,7 +292,7 @@ async def test_logging_flow_nums(
         # But if a valid flow is included, it will be removed from that flow:
         await run_cmd(remove_tasks(schd, ['1/a1'], ['2', '3']))
         assert log_filter(logging.INFO, "Removed task(s): 1/a1 (flows=2)")
-        assert schd.pool._get_task_by_id('1/a1').flow_nums == {1}
+        assert schd.pool.get_task_by_id('1/a1').flow_nums == {1}
 
 
 async def test_retrigger(flow, scheduler, run, reflog, complete):
@@ -358,11 +358,11 @@ async def test_prereqs(
             (False, {'1/a1': False, '1/a2': True, '1/b': False})
         ]
 
-        assert schd.pool._get_task_by_id('1/x')
+        assert schd.pool.get_task_by_id('1/x')
         await run_cmd(remove_tasks(schd, ['1/a2'], [FLOW_ALL]))
         # Should cause 1/x to be removed from the pool as it no longer has
         # any satisfied prerequisite tasks:
-        assert not schd.pool._get_task_by_id('1/x')
+        assert not schd.pool.get_task_by_id('1/x')
         assert log_filter(
             logging.INFO,
             regex=r"1/x.* removed .* prerequisite task\(s\) removed",
@@ -379,11 +379,11 @@ async def test_downstream_preparing(flow, scheduler, start):
         '''),
     )
     async with start(schd):
-        a = schd.pool._get_task_by_id('1/a')
+        a = schd.pool.get_task_by_id('1/a')
         schd.pool.spawn_on_output(a, TASK_OUTPUT_SUCCEEDED)
         assert schd.pool.get_task_ids() == {'1/a', '1/x', '1/y'}
 
-        schd.pool._get_task_by_id('1/y').state_reset('preparing')
+        schd.pool.get_task_by_id('1/y').state_reset('preparing')
         await run_cmd(remove_tasks(schd, ['1/a'], [FLOW_ALL]))
         assert schd.pool.get_task_ids() == {'1/y'}
 
@@ -401,9 +401,9 @@ async def test_downstream_other_flows(flow, scheduler, run, complete):
     async with run(schd):
         await complete(schd, '1/a')
         schd.pool.force_trigger_tasks(['1/c'], ['2'])
-        c = schd.pool._get_task_by_id('1/c')
+        c = schd.pool.get_task_by_id('1/c')
         schd.pool.spawn_on_output(c, TASK_OUTPUT_SUCCEEDED)
-        assert schd.pool._get_task_by_id('1/x').flow_nums == {1, 2}
+        assert schd.pool.get_task_by_id('1/x').flow_nums == {1, 2}
 
         await run_cmd(remove_tasks(schd, ['1/c'], ['2']))
         assert schd.pool.get_task_ids() == {'1/b', '1/x'}
@@ -411,7 +411,7 @@ async def test_downstream_other_flows(flow, scheduler, run, complete):
         # maintain flow continuity. However it is tricky at the moment because
         # other prerequisite tasks could exist in flow 2 (we don't know as
         # prereqs do not hold flow info other than in the DB).
-        assert schd.pool._get_task_by_id('1/x').flow_nums == {1, 2}
+        assert schd.pool.get_task_by_id('1/x').flow_nums == {1, 2}
 
 
 async def test_suicide(flow, scheduler, run, reflog, complete):
@@ -468,7 +468,7 @@ async def test_kill_running(flow, scheduler, run, complete, reflog):
     async with run(schd):
         reflog_triggers = reflog(schd)
         await complete(schd, '1/b')
-        a = schd.pool._get_task_by_id('1/a')
+        a = schd.pool.get_task_by_id('1/a')
         await run_cmd(remove_tasks(schd, ['1/a'], [FLOW_ALL]))
         assert a.state(TASK_STATUS_FAILED, is_held=True)
         await complete(schd)
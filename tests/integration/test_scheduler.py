@@ -20,6 +20,8 @@ from pathlib import Path
 import pytest
 import re
 from signal import SIGHUP, SIGINT, SIGTERM
+from threading import Timer
+from time import time
 from typing import Any, Callable
 
 from cylc.flow import commands
@@ -398,3 +400,33 @@ async def test_signal_escallation(one, start, signal, log_filter):
         # two signals should escalate this from NOW to NOW_NOW
         one._handle_signal(signal, None)
         assert one.stop_mode.name == 'REQUEST_NOW_NOW'
+
+
+async def test_wake_main_loop(one, start):
+    """The main loop sleep should be cut short when the loop is woken.
+
+    E.g. when a task message or command arrives via the network server thread.
+    """
+    async with start(one):
+        # the main loop should sleep for the full duration if not woken
+        start_time = time()
+        await one._main_loop_sleep(0.2)
+        assert time() - start_time >= 0.2
+
+        # wake the main loop from another thread
+        Timer(0.1, one.wake_main_loop).start()
+        start_time = time()
+        await one._main_loop_sleep(60)
+        assert time() - start_time < 60
+        assert not one.main_loop_wake.is_set()
+
+
+async def test_task_messages_wake_main_loop(one, start):
+    """Receiving task messages should wake the main loop."""
+    async with start(one):
+        one.main_loop_wake.clear()
+        one.server.resolvers.put_messages(
+            '1/one/01', '2000-01-01T00:00:00Z', [['INFO', 'hello']]
+        )
+        await asyncio.sleep(0)
+        assert one.main_loop_wake.is_set()
@@ -16,6 +16,7 @@
 """Tests involving the Cylc Subprocess Context Object
 """
 
+import asyncio
 from logging import DEBUG
 from textwrap import dedent
 
@@ -54,6 +55,8 @@ async def test_log_xtrigger_stdout(
 
         # while not schd.xtrigger_mgr._get_xtrigs(task):
         while schd.proc_pool.is_not_done():
+            # (yield to the event loop which watches the running command)
+            await asyncio.sleep(0.1)
             schd.proc_pool.process()
 
         # Assert that both stderr and out from the print statement
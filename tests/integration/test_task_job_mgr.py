@@ -17,15 +17,23 @@
 from contextlib import suppress
 import json
 import logging
+import os
+from time import sleep, time
 from typing import Any as Fixture
 from unittest.mock import Mock
 
+import pytest
+
 from cylc.flow import CYLC_LOG
 from cylc.flow.job_runner_mgr import JOB_FILES_REMOVED_MESSAGE
+from cylc.flow.run_modes import RunMode
 from cylc.flow.scheduler import Scheduler
+from cylc.flow.task_job_logs import get_task_job_job_log
 from cylc.flow.task_state import (
     TASK_STATUS_FAILED,
+    TASK_STATUS_PREPARING,
     TASK_STATUS_RUNNING,
+    TASK_STATUS_SUBMIT_FAILED,
 )
 
 
@@ -258,3 +266,189 @@ async def test_poll_job_deleted_log_folder(
     assert log_filter(
         logging.ERROR, f"job log directory {job_id} no longer exists"
     )
+
+
+@pytest.mark.parametrize('threads', [0, 2])
+async def test_submit_job_file_batches(
+    threads,
+    flow,
+    scheduler,
+    start,
+    mock_glbl_cfg,
+    monkeypatch,
+):
+    """Job files should be written in batches, each submitted when ready.
+
+    Tasks whose job files cannot be written should fail submission.
+    """
+    global_config = f'''
+        [scheduler]
+            job file writer threads = {threads}
+        [platforms]
+            [[localhost]]
+                max batch submit size = 2
+    '''
+    mock_glbl_cfg('cylc.flow.platforms.glbl_cfg', global_config)
+    mock_glbl_cfg('cylc.flow.task_job_mgr.glbl_cfg', global_config)
+
+    id_ = flow({
+        'scheduling': {'graph': {'R1': 'a1 & a2 & a3 & a4 & a5 & bad'}},
+        'runtime': {
+            'A': {'script': 'true'},
+            'a1, a2, a3, a4, a5': {'inherit': 'A'},
+            # job file syntax check fails:
+            'bad': {'script': 'if'},
+        },
+    })
+    schd: Scheduler = scheduler(id_, run_mode='live')
+    async with start(schd):
+        commands = []
+        monkeypatch.setattr(
+            schd.proc_pool,
+            'put_command',
+            lambda ctx, **kwargs: commands.append(ctx.cmd_kwargs),
+        )
+        itasks = schd.pool.get_tasks()
+        for itask in itasks:
+            itask.waiting_on_job_prep = True
+        done = schd.task_job_mgr.submit_task_jobs(itasks, RunMode.LIVE)
+        assert sorted(done, key=str) == sorted(itasks, key=str)
+
+        # the good tasks are submitted in batches of (up to) two
+        assert sorted(
+            len(kwargs['job_log_dirs']) for kwargs in commands
+        ) == [1, 2, 2]
+        assert sorted(
+            job_log_dir
+            for kwargs in commands
+            for job_log_dir in kwargs['job_log_dirs']
+        ) == [f'1/a{i}/01' for i in range(1, 6)]
+        for itask in itasks:
+            if itask.tdef.name == 'bad':
+                assert itask.state(TASK_STATUS_SUBMIT_FAILED)
+            else:
+                assert itask.state(TASK_STATUS_PREPARING)
+                assert os.path.exists(os.path.expandvars(
+                    get_task_job_job_log(
+                        schd.workflow, itask.point, itask.tdef.name, 1
+                    )
+                ))
+
+        summary = schd.main_loop_timings.summary()
+        assert {
+            'job_submit_prepare', 'job_submit_write_files', 'job_submit_queue'
+        } <= set(summary)
+
+
+@pytest.mark.parametrize('threads', [0, 2])
+async def test_submit_job_file_batches_started(
+    threads,
+    flow,
+    scheduler,
+    start,
+    mock_glbl_cfg,
+    monkeypatch,
+):
+    """Batches should be submitted while others are written in threads.
+
+    Otherwise, the commands should be left for the main loop to start.
+    """
+    global_config = f'''
+        [scheduler]
+            job file writer threads = {threads}
+        [platforms]
+            [[localhost]]
+                max batch submit size = 1
+    '''
+    mock_glbl_cfg('cylc.flow.platforms.glbl_cfg', global_config)
+    mock_glbl_cfg('cylc.flow.task_job_mgr.glbl_cfg', global_config)
+
+    id_ = flow({'scheduling': {'graph': {'R1': 'a1 & a2 & a3'}}})
+    schd: Scheduler = scheduler(id_, run_mode='live', paused_start=True)
+    async with start(schd):
+        jobs_submit = schd.task_job_mgr.JOBS_SUBMIT
+
+        def submitting():
+            return [
+                ctx.cmd_key for _, ctx, *_ in schd.proc_pool.runnings
+            ]
+
+        # whether a jobs-submit command was running while the last batch was
+        # written
+        running = []
+        write_job_files = schd.task_job_mgr._write_job_files
+
+        def _write_job_files(itasks, *args, **kwargs):
+            if threads and itasks[0].tdef.name == 'a3':
+                # (wait for the other batches to be submitted)
+                timeout = time() + 10
+                while not submitting() and time() < timeout:
+                    sleep(0.01)
+                running.append(jobs_submit in submitting())
+            return write_job_files(itasks, *args, **kwargs)
+
+        monkeypatch.setattr(
+            schd.task_job_mgr, '_write_job_files', _write_job_files
+        )
+        itasks = schd.pool.get_tasks()
+        for itask in itasks:
+            itask.waiting_on_job_prep = True
+        schd.task_job_mgr.submit_task_jobs(itasks, RunMode.LIVE)
+        if threads:
+            assert running == [True]
+        else:
+            assert submitting() == []
+        # (the last batch is left for the main loop)
+        assert schd.proc_pool.queuings
+
+
+async def test_poll_job_command_concurrency(
+    flow,
+    scheduler,
+    start,
+    mock_glbl_cfg,
+    monkeypatch,
+):
+    """Job polls should run in batches, with limited concurrency."""
+    global_config = '''
+        [platforms]
+            [[localhost]]
+                max concurrent job commands = 1
+    '''
+    mock_glbl_cfg('cylc.flow.platforms.glbl_cfg', global_config)
+
+    id_ = flow({
+        'scheduling': {'graph': {'R1': 'a1 & a2 & a3 & a4 & a5'}},
+    })
+    schd: Scheduler = scheduler(id_)
+    async with start(schd):
+        commands = []
+        monkeypatch.setattr(
+            schd.proc_pool,
+            'put_command',
+            lambda ctx, **kwargs: commands.append((ctx, kwargs)),
+        )
+        schd.task_job_mgr.job_cmd_batcher.batch_sizes[
+            (schd.task_job_mgr.JOBS_POLL, 'localhost')
+        ] = 2
+        itasks = schd.pool.get_tasks()
+        for itask in itasks:
+            itask.state_reset(TASK_STATUS_RUNNING)
+            itask.submit_num = 1
+        schd.task_job_mgr.poll_task_jobs(itasks)
+        # polling again only queues the jobs whose poll has already started
+        schd.task_job_mgr.poll_task_jobs(itasks)
+
+        batch_sizes = []
+        while commands:
+            # only one command runs at a time
+            assert len(commands) == 1
+            ctx, kwargs = commands.pop()
+            batch_sizes.append(len(ctx.cmd) - ctx.cmd.index('--') - 2)
+            ctx.ret_code = 0
+            ctx.out = ''
+            kwargs['callback'](ctx, *kwargs['callback_args'])
+        assert batch_sizes == [2, 2, 1, 2]
+        assert schd.task_job_mgr.job_cmd_batcher.running == {
+            (schd.task_job_mgr.JOBS_POLL, 'localhost'): 0
+        }
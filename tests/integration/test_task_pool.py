@@ -586,6 +586,56 @@ async def test_runahead_after_remove(
     assert int(task_pool.runahead_limit_point) == 5
 
 
+@pytest.mark.parametrize('runahead_limit', ['P3', 'P3Y'])
+async def test_runahead_incremental(
+    flow: Callable,
+    scheduler: Callable,
+    start: Callable,
+    runahead_limit: str,
+) -> None:
+    """The runahead limit should be advanced incrementally as cycles complete.
+
+    The result should match computing it from scratch, including for finite
+    sequences and when the base point moves backwards.
+    """
+    id_ = flow({
+        'scheduler': {
+            'allow implicit tasks': 'True',
+            'UTC mode': True,
+            'cycle point format': 'CCYY',
+        },
+        'scheduling': {
+            'initial cycle point': '2001',
+            'final cycle point': '2020',
+            'runahead limit': runahead_limit,
+            'graph': {
+                'P1Y': 'a',
+                'R3/P2Y': 'b',
+                'R/2010/P5Y': 'c',
+            },
+        },
+    })
+    schd: 'Scheduler' = scheduler(id_)
+    async with start(schd):
+        pool = schd.pool
+        for year in range(2001, 2016):
+            assert pool.get_min_point() == ISO8601Point(str(year))
+            limit_point = pool.runahead_limit_point
+            pool.compute_runahead(force=True)
+            assert pool.runahead_limit_point == limit_point
+            schd.remove_tasks([f'{year}/*'])
+        assert pool.get_min_point() == ISO8601Point('2016')
+        assert pool.runahead_limit_point == ISO8601Point('2019')
+
+        # Move the base point backwards.
+        pool.add_to_pool(pool.spawn_task('a', ISO8601Point('2003'), {1}))
+        assert pool.get_min_point() == ISO8601Point('2003')
+        assert pool.compute_runahead()
+        assert pool.runahead_limit_point == ISO8601Point('2006')
+        pool.compute_runahead(force=True)
+        assert pool.runahead_limit_point == ISO8601Point('2006')
+
+
 async def test_load_db_bad_platform(
     flow: Callable, scheduler: Callable, start: Callable, one_conf: Callable
 ):
@@ -601,6 +651,87 @@ async def test_load_db_bad_platform(
         assert result == 'culdee-fell-summit'
 
 
+async def test_restart_bulk_load(
+    flow: Callable,
+    scheduler: Callable,
+    start: Callable,
+    log_filter: Callable,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """On restart, prerequisites of all tasks should be loaded together.
+
+    The time taken by each phase of the restart should be logged.
+    """
+    id_ = flow({
+        'scheduler': {'allow implicit tasks': 'True'},
+        'scheduling': {
+            'cycling mode': 'integer',
+            'runahead limit': 'P2',
+            'graph': {'P1': 'a & x => b'},
+        },
+    })
+    schd: 'Scheduler' = scheduler(id_)
+    async with start(schd):
+        for itask in schd.pool.get_tasks():
+            schd.pool.task_events_mgr.process_message(
+                itask, logging.INFO, TASK_OUTPUT_SUCCEEDED
+            )
+        expected = list_tasks(schd)
+        limit_point = schd.pool.runahead_limit_point
+
+    def select_task_prerequisites(*args):
+        raise Exception('prerequisites should be loaded in bulk')
+
+    monkeypatch.setattr(
+        'cylc.flow.rundb.CylcWorkflowDAO.select_task_prerequisites',
+        select_task_prerequisites,
+    )
+    schd = scheduler(id_)
+    async with start(schd):
+        assert list_tasks(schd) == expected
+        assert schd.pool.runahead_limit_point == limit_point
+        for itask in schd.pool.get_tasks():
+            if itask.tdef.name == 'b':
+                assert itask.prereqs_are_satisfied()
+            assert itask.state.is_runahead == (itask.point > limit_point)
+        assert schd.pool._restart_prereqs is None
+        assert log_filter(contains='Restart load times:')
+
+
+async def test_restart_bulk_load_no_prereqs(
+    flow: Callable,
+    scheduler: Callable,
+    start: Callable,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """On restart, tasks with no prerequisites should not be queried
+    separately."""
+    id_ = flow({
+        'scheduler': {'allow implicit tasks': 'True'},
+        'scheduling': {'graph': {'R1': 'a'}},
+    })
+    schd: 'Scheduler' = scheduler(id_)
+    async with start(schd):
+        expected = list_tasks(schd)
+        schd.workflow_db_mgr.put_task_pool(schd.pool)
+        schd.workflow_db_mgr.process_queued_ops()
+        assert not schd.workflow_db_mgr.pri_dao.connect().execute(
+            'SELECT * FROM task_prerequisites'
+        ).fetchall()
+
+    def select_task_prerequisites(*args):
+        raise Exception('prerequisites should be loaded in bulk')
+
+    monkeypatch.setattr(
+        'cylc.flow.rundb.CylcWorkflowDAO.select_task_prerequisites',
+        select_task_prerequisites,
+    )
+    schd = scheduler(id_)
+    async with start(schd):
+        assert list_tasks(schd) == expected
+        assert schd.pool._restart_prereqs is None
+
+
 def list_tasks(schd):
     """Return a sorted list of task pool tasks.
 
@@ -1347,7 +1478,7 @@ async def test_set_prereqs(
         }
 
         # set an xtrigger (see also test_xtrigger_mgr, and test_data_store_mgr)
-        bar = schd.pool._get_task_by_id('20400101T0000Z/bar')
+        bar = schd.pool.get_task_by_id('20400101T0000Z/bar')
         assert bar.state.prerequisites_all_satisfied()
         assert not bar.state.xtriggers_all_satisfied()
         schd.pool.set_prereqs_and_outputs(
@@ -2464,3 +2595,50 @@ async def test_start_tasks(
                 "2050/baz",
             ])
         )
+
+
+async def test_task_pool_indexes(example_flow: 'Scheduler') -> None:
+    """The task pool indexes should be kept up to date with task state."""
+    pool = example_flow.pool
+
+    def check_indexes():
+        itasks = pool.get_tasks()
+        assert pool.get_task_ids() == {itask.identity for itask in itasks}
+        for itask in itasks:
+            assert pool.get_task_by_id(itask.identity) is itask
+        for status in (TASK_STATUS_WAITING, TASK_STATUS_RUNNING):
+            assert set(pool.get_tasks_by_status(status)) == {
+                itask for itask in itasks if itask.state(status)
+            }
+        assert set(pool.get_unqueued_waiting_tasks()) == {
+            itask
+            for itask in itasks
+            if itask.state(
+                TASK_STATUS_WAITING, is_queued=False, is_runahead=False
+            )
+        }
+
+    check_indexes()
+
+    # release tasks from runahead
+    pool.release_runahead_tasks()
+    assert pool.get_unqueued_waiting_tasks()
+    check_indexes()
+
+    # queue a task
+    foo = pool.get_task(IntegerPoint('1'), 'foo')
+    pool.queue_task(foo)
+    assert foo not in pool.get_unqueued_waiting_tasks()
+    check_indexes()
+
+    # change task status
+    foo.state_reset(TASK_STATUS_RUNNING)
+    assert pool.get_tasks_by_status(TASK_STATUS_RUNNING) == [foo]
+    check_indexes()
+
+    # remove a task
+    pool.remove(foo)
+    assert pool.get_task_by_id(foo.identity) is None
+    assert foo.state_listener is None
+    assert not pool.get_tasks_by_status(TASK_STATUS_RUNNING)
+    check_indexes()
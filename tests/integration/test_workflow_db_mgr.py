@@ -178,3 +178,108 @@ async def test_record_only_non_clock_triggers(
     assert db_select(schd, False, 'xtriggers', 'signature') == [
         ('xrandom(100)',),
         ('xrandom(100, _=Not a real wall clock trigger)',)]
+
+
+async def test_background_database_writes(
+    one_conf, flow, scheduler, start, db_select, mock_glbl_cfg
+):
+    """Test the workflow databases can be written by background threads."""
+    mock_glbl_cfg(
+        'cylc.flow.workflow_db_mgr.glbl_cfg',
+        '''
+            [scheduler]
+                background database writes = True
+        ''',
+    )
+    schd: 'Scheduler' = scheduler(flow(one_conf), paused_start=True)
+    async with start(schd):
+        db_mgr = schd.workflow_db_mgr
+        assert db_mgr.pri_dao.writer is not None
+        assert db_mgr.pub_dao.writer is not None
+        schd.resume_workflow()
+        schd.process_workflow_db_queue()
+        # reads see the items handed to the writer
+        w_params = dict(db_mgr.pri_dao.select_workflow_params())
+        assert w_params['is_paused'] == '0'
+        assert ('is_paused', '0') in db_select(
+            schd, False, 'workflow_params', 'key', 'value', key='is_paused'
+        )
+        # the public database can be recovered from the private database
+        db_mgr.pub_dao.n_tries = db_mgr.pub_dao.MAX_TRIES
+        db_mgr.recover_pub_from_pri()
+
+    for db_file in (db_mgr.pri_path, db_mgr.pub_path):
+        with sqlite3.connect(db_file) as conn:
+            assert list(conn.execute('PRAGMA journal_mode')) == [('delete',)]
+            assert ('is_paused', '0') in conn.execute(
+                'SELECT key, value FROM workflow_params'
+            )
+
+
+async def test_background_database_writes_submit(
+    flow, scheduler, start, mock_glbl_cfg
+):
+    """Jobs should be written to the private DB before they are submitted."""
+    mock_glbl_cfg(
+        'cylc.flow.workflow_db_mgr.glbl_cfg',
+        '''
+            [scheduler]
+                background database writes = True
+        ''',
+    )
+    id_ = flow({'scheduling': {'graph': {'R1': 'foo'}}})
+    schd: 'Scheduler' = scheduler(id_, run_mode='live', paused_start=True)
+    async with start(schd):
+        itasks = schd.pool.get_tasks()
+        for itask in itasks:
+            itask.waiting_on_job_prep = True
+        schd.submit_task_jobs(itasks)
+        # the jobs-submit command is queued but has not been started
+        assert schd.proc_pool.queuings
+        with sqlite3.connect(schd.workflow_db_mgr.pri_path) as conn:
+            assert list(conn.execute(
+                'SELECT cycle, name, submit_num FROM task_jobs'
+            )) == [('1', 'foo', 1)]
+
+
+async def test_put_task_pool_changes_only(
+    flow, scheduler, start, db_select
+):
+    """put_task_pool should only rewrite rows which have changed."""
+    id_ = flow({
+        'scheduling': {'graph': {'R1': 'a & b'}},
+    })
+    schd: 'Scheduler' = scheduler(id_, paused_start=True)
+    async with start(schd):
+        db_mgr = schd.workflow_db_mgr
+        pool_table = db_mgr.TABLE_TASK_POOL
+        db_mgr.put_task_pool(schd.pool)
+        schd.process_workflow_db_queue()
+
+        # nothing has changed => nothing to write
+        db_mgr.put_task_pool(schd.pool)
+        assert db_mgr.db_deletes_map[pool_table] == []
+        assert db_mgr.db_inserts_map[pool_table] == []
+
+        # one task has changed => one row to rewrite
+        a, b = sorted(schd.pool.get_tasks(), key=lambda t: t.tdef.name)
+        a.state_reset(is_held=True)
+        db_mgr.put_task_pool(schd.pool)
+        assert db_mgr.db_deletes_map[pool_table] == []
+        assert [
+            row['name'] for row in db_mgr.db_inserts_map[pool_table]
+        ] == ['a']
+        schd.process_workflow_db_queue()
+        assert sorted(
+            db_select(schd, False, pool_table, 'name', 'is_held')
+        ) == [('a', 1), ('b', 0)]
+
+        # one task has been removed => one row to delete
+        schd.pool.remove(b)
+        db_mgr.put_task_pool(schd.pool)
+        assert db_mgr.db_deletes_map[pool_table] == [
+            {'cycle': '1', 'name': 'b', 'flow_nums': '[1]'}
+        ]
+        assert db_mgr.db_inserts_map[pool_table] == []
+        schd.process_workflow_db_queue()
+        assert db_select(schd, False, pool_table, 'name') == [('a',)]
@@ -190,11 +190,11 @@ async def test_xtriggers_restart(flow, start, scheduler, db_select):
         assert len(schd.proc_pool.queuings) + len(schd.proc_pool.runnings) == 1
 
         # x0 should not be satisfied
-        bar = schd.pool._get_task_by_id('1/bar')
+        bar = schd.pool.get_task_by_id('1/bar')
         assert not bar.state.xtriggers["x0"]
 
         # x100 should now be satisfied in the task pool and the datastore
-        foo = schd.pool._get_task_by_id('1/foo')
+        foo = schd.pool.get_task_by_id('1/foo')
         assert foo.state.xtriggers["x100"]
 
         await schd.update_data_structure()
@@ -261,11 +261,11 @@ async def test_set_xtrig_prereq_restart(flow, start, scheduler, db_select):
         assert len(schd.proc_pool.queuings) + len(schd.proc_pool.runnings) == 1
 
         # "@x0 => bar" should not be satisfied
-        bar = schd.pool._get_task_by_id('1/bar')
+        bar = schd.pool.get_task_by_id('1/bar')
         assert not bar.state.xtriggers["x0"]
 
         # but "x0 => foo" should be, in the task pool and the datastore
-        foo = schd.pool._get_task_by_id('1/foo')
+        foo = schd.pool.get_task_by_id('1/foo')
         assert foo.state.xtriggers["x0"]
 
         await schd.update_data_structure()
@@ -403,11 +403,11 @@ async def test_set_xtrig_prereq_reload(flow, start, scheduler, db_select):
         assert len(schd.proc_pool.queuings) + len(schd.proc_pool.runnings) == 1
 
         # "@x0 => bar" should not be satisfied
-        bar = schd.pool._get_task_by_id('1/bar')
+        bar = schd.pool.get_task_by_id('1/bar')
         assert not bar.state.xtriggers["x0"]
 
         # but "x0 => foo" should be, in the task pool and the datastore
-        foo = schd.pool._get_task_by_id('1/foo')
+        foo = schd.pool.get_task_by_id('1/foo')
         assert foo.state.xtriggers["x0"]
 
         await schd.update_data_structure()
@@ -19,11 +19,16 @@ from datetime import datetime
 import pytest
 from pytest import param
 
+from metomi.isodatetime.data import CALENDAR
+
+from cylc.flow.cycling import cmp
 from cylc.flow.cycling.iso8601 import (
     ISO8601Interval,
     ISO8601Point,
     ISO8601Sequence,
     ingest_time,
+    interval_parse,
+    point_parse,
 )
 from cylc.flow.cycling.loader import ISO8601_CYCLING_TYPE
 
@@ -949,3 +954,60 @@ def test_validate_fails_comma_sep_offset_list(
     set_cycling_type(ISO8601_CYCLING_TYPE, "Z")
     with pytest.raises(Exception, match=errortext):
         ingest_time(_input)
+
+
+@pytest.mark.parametrize('calendar', [
+    'gregorian', '360day', '365day', '366day'
+])
+@pytest.mark.parametrize('time_zone, dump_format', [
+    param('Z', None, id='default'),
+    param('+0530', None, id='time-zone'),
+    param(None, 'CCYY-MM-DDThh:mm-05', id='extended'),
+    param('Z', 'CCYYMMDDThh', id='hours'),
+    param(None, 'CCYYMMDDThhmmss+01', id='seconds'),
+    param(None, 'CCYY-DDDThhZ', id='unsupported'),
+])
+@pytest.mark.parametrize('interval', [
+    'PT1H', '-PT6H', 'P1D', 'P1W', '-P3DT1H', 'PT30M', 'PT90S', 'P1M', 'P1Y'
+])
+def test_point_arithmetic(
+    calendar, time_zone, dump_format, interval, set_cycling_type
+):
+    """Point arithmetic & comparison should match isodatetime.
+
+    (Points are represented as seconds since the epoch where possible.)
+    """
+    CALENDAR.set_mode(calendar)
+    try:
+        set_cycling_type(ISO8601_CYCLING_TYPE, time_zone, dump_format)
+        points = [
+            ISO8601Point(value).standardise()
+            for value in (
+                '20200101T0000Z',
+                '20240228T2300Z',
+                '19991228T1230Z',
+                '00020301T0000Z',
+            )
+        ]
+        for point in points:
+            for result, expected in (
+                (point + ISO8601Interval(interval), point_parse(point.value)
+                 + interval_parse(interval)),
+                (point - ISO8601Interval(interval), point_parse(point.value)
+                 - interval_parse(interval)),
+            ):
+                assert str(result) == str(expected)
+                # arithmetic results compare the same as parsed points
+                assert result == ISO8601Point(str(expected))
+                assert result._cmp(point) == cmp(
+                    point_parse(str(expected)), point_parse(point.value)
+                )
+            for other in points:
+                assert point._cmp(other) == cmp(
+                    point_parse(point.value), point_parse(other.value)
+                )
+                assert str(point - other) == str(
+                    point_parse(point.value) - point_parse(other.value)
+                )
+    finally:
+        CALENDAR.set_mode()
@@ -0,0 +1,169 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from contextlib import suppress
+
+import pytest
+
+from cylc.flow.exceptions import ClientTimeout, RequestError, WorkflowStopped
+from cylc.flow.network.message_relay import MessageRelay
+from cylc.flow.task_message import send_to_relay
+
+
+class MockClient:
+    """Records requests, raises the errors given for a command."""
+
+    def __init__(self, errors=None):
+        self.requests = []
+        self.errors = errors or {}
+
+    async def async_request(self, command, args):
+        self.requests.append((command, args))
+        if command in self.errors:
+            raise self.errors[command]
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Mock the clients of the message relay, {workflow: client}."""
+    clients = {}
+
+    def get_client(workflow, timeout=None):
+        return clients.setdefault(workflow, MockClient())
+
+    monkeypatch.setattr(
+        'cylc.flow.network.message_relay.get_client', get_client
+    )
+    return clients
+
+
+def put_jobs(relay, workflow, num):
+    for i in range(num):
+        relay.put(workflow, f'1/t{i}/01', 'now', [['INFO', 'started']])
+
+
+async def test_relay(tmp_path, clients):
+    """It relays messages received on its socket in batches per workflow."""
+    socket_path = str(tmp_path / 'relay.sock')
+    # (long enough that the messages are not sent before the flush below)
+    relay = MessageRelay(socket_path, interval=60)
+    task = asyncio.ensure_future(relay.run())
+    loop = asyncio.get_event_loop()
+    for _ in range(50):
+        if (tmp_path / 'relay.sock').exists():
+            break
+        await asyncio.sleep(0.05)
+
+    for workflow, job_id in (
+        ('a', '1/x/01'), ('a', '1/y/01'), ('b', '1/z/01')
+    ):
+        assert await loop.run_in_executor(
+            None,
+            send_to_relay,
+            socket_path,
+            workflow,
+            job_id,
+            [['INFO', 'started']],
+            'now',
+        )
+    await relay.flush()
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    assert clients['a'].requests == [(
+        'put_messages',
+        {'messages': [
+            ['1/x/01', 'now', [['INFO', 'started']]],
+            ['1/y/01', 'now', [['INFO', 'started']]],
+        ]},
+    )]
+    assert clients['b'].requests == [(
+        'put_messages',
+        {'messages': [['1/z/01', 'now', [['INFO', 'started']]]]},
+    )]
+    # the socket is removed when the relay stops
+    assert not (tmp_path / 'relay.sock').exists()
+
+
+def test_send_to_relay_unavailable(tmp_path):
+    """It returns False if there is no relay to send messages to."""
+    assert not send_to_relay(
+        str(tmp_path / 'relay.sock'), 'a', '1/x/01', [['INFO', 'hi']], 'now'
+    )
+
+
+async def test_max_batch_size(clients):
+    """It splits queued messages into batches of the maximum size."""
+    relay = MessageRelay('relay.sock', max_batch_size=2)
+    put_jobs(relay, 'a', 5)
+    await relay.flush()
+    assert [
+        len(args['messages']) for _, args in clients['a'].requests
+    ] == [2, 2, 1]
+    assert not relay.queues
+
+
+async def test_old_scheduler(clients):
+    """It sends one message mutation per job to schedulers which cannot
+    receive batches."""
+    clients['a'] = MockClient({
+        'put_messages': RequestError("No method by the name 'put_messages'")
+    })
+    relay = MessageRelay('relay.sock')
+    put_jobs(relay, 'a', 2)
+    await relay.flush()
+    assert [command for command, _ in clients['a'].requests] == [
+        'put_messages', 'graphql', 'graphql'
+    ]
+    assert [
+        args['variables']['taskJob']
+        for command, args in clients['a'].requests
+        if command == 'graphql'
+    ] == ['1/t0/01', '1/t1/01']
+
+
+async def test_retry(clients):
+    """It retries failed batches, then drops them."""
+    clients['a'] = MockClient({'put_messages': ClientTimeout('timeout')})
+    relay = MessageRelay('relay.sock', max_attempts=2)
+    put_jobs(relay, 'a', 2)
+    await relay.flush()
+    # queued for retry
+    assert len(relay.queues['a']) == 2
+    assert relay.attempts == {'a': 1}
+    # (a new client is used for the retry)
+    assert 'a' not in relay.clients
+    clients['a'] = MockClient({'put_messages': ClientTimeout('timeout')})
+
+    # new messages are queued behind the failed ones
+    relay.put('a', '1/t2/01', 'now', [['INFO', 'started']])
+    await relay.flush()
+    # dropped
+    assert clients['a'].requests[0][1]['messages'][-1][0] == '1/t2/01'
+    assert not relay.queues
+    assert not relay.attempts
+
+
+async def test_workflow_stopped(clients):
+    """It drops the messages of stopped workflows."""
+    clients['a'] = MockClient({'put_messages': WorkflowStopped('a')})
+    relay = MessageRelay('relay.sock')
+    put_jobs(relay, 'a', 2)
+    await relay.flush()
+    assert not relay.queues
+    assert not relay.attempts
@@ -14,7 +14,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from cylc.flow.dbstatecheck import check_polling_config
+import errno
+import os
+import sqlite3
+from threading import Thread
+from time import sleep, time
+
+from cylc.flow.dbstatecheck import CylcWorkflowDBCache, check_polling_config
 from cylc.flow.exceptions import InputError
 
 import pytest
@@ -42,3 +48,158 @@ def test_check_polling_config():
     # valid query use cases
     check_polling_config(None, False, True)
     check_polling_config(None, False, False)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / 'db')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('CREATE TABLE x(y)')
+    return db_path
+
+
+def test_db_cache(tmp_path, db_path):
+    """It should cache query results until the DB changes."""
+    cache = CylcWorkflowDBCache(str(tmp_path / 'cache'))
+    queries = []
+
+    def query():
+        queries.append(1)
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute('SELECT count(*) FROM x').fetchone()[0]
+
+    assert cache.get(db_path, ['a'], query) == 0
+    assert cache.get(db_path, ['a'], query) == 0
+    assert len(queries) == 1
+
+    # other queries are cached separately
+    assert cache.get(db_path, ['b'], query) == 0
+    assert len(queries) == 2
+
+    # writing to the DB invalidates the cache
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('INSERT INTO x VALUES(1)')
+    assert cache.get(db_path, ['a'], query) == 1
+    assert cache.get(db_path, ['a'], query) == 1
+    assert len(queries) == 3
+
+    # (as does replacing it)
+    os.replace(db_path, f'{db_path}.old')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('CREATE TABLE x(y)')
+    assert cache.get(db_path, ['a'], query) == 0
+    assert len(queries) == 4
+
+    # no caching if the DB does not exist
+    os.unlink(db_path)
+    cache.get(db_path, ['a'], lambda: queries.append(1))
+    cache.get(db_path, ['a'], lambda: queries.append(1))
+    assert len(queries) == 6
+    # (and the invalidated entry is removed)
+    assert len([
+        path for path in (tmp_path / 'cache').iterdir()
+        if path.suffix != '.lock' and path.name != cache.PRUNED_FILE
+    ]) == 1
+
+
+def test_db_cache_prune(tmp_path, db_path):
+    """It should remove entries which have not been written for a while."""
+    cache_dir = tmp_path / 'cache'
+    cache = CylcWorkflowDBCache(str(cache_dir))
+    cache.get(db_path, ['a'], lambda: 1)
+    cache.get(db_path, ['b'], lambda: 2)
+    # (the cache was pruned on first use)
+    assert (cache_dir / cache.PRUNED_FILE).exists()
+    entry_a, entry_b = sorted(
+        (
+            path for path in cache_dir.iterdir()
+            if path.suffix != '.lock' and path.name != cache.PRUNED_FILE
+        ),
+        key=lambda path: path.read_text(),
+    )
+    orphan_lock = cache_dir / f'{"0" * 64}.lock'
+    tmp_file = cache_dir / f'{cache.TMP_PREFIX}abc'
+    # (not a cache file)
+    other_file = cache_dir / 'important.txt'
+    old = time() - cache.MAX_AGE - 1
+    for path in (orphan_lock, tmp_file, other_file):
+        path.touch()
+    for path in (entry_a, orphan_lock, tmp_file, other_file):
+        os.utime(path, (old, old))
+
+    cache.prune()
+    assert sorted(path.name for path in cache_dir.iterdir()) == sorted([
+        cache.PRUNED_FILE, entry_b.name, f'{entry_b.name}.lock',
+        other_file.name,
+    ])
+
+    # a pruned entry is queried again
+    assert cache.get(db_path, ['a'], lambda: 3) == 3
+
+
+def test_db_cache_concurrent(tmp_path, db_path):
+    """Concurrent identical queries should only query the DB once."""
+    queries = []
+    results = []
+
+    def query():
+        queries.append(1)
+        sleep(0.2)
+        return 42
+
+    def get():
+        cache = CylcWorkflowDBCache(str(tmp_path / 'cache'))
+        results.append(cache.get(db_path, ['a'], query))
+
+    threads = [Thread(target=get) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [42] * 5
+    assert len(queries) == 1
+
+
+def test_db_cache_untrusted(tmp_path, db_path):
+    """It should not use a cache directory others can write to."""
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir(mode=0o777)
+    cache_dir.chmod(0o777)
+    cache = CylcWorkflowDBCache(str(cache_dir))
+    queries = []
+    cache.get(db_path, ['a'], lambda: queries.append(1))
+    cache.get(db_path, ['a'], lambda: queries.append(1))
+    assert len(queries) == 2
+    assert not list(cache_dir.iterdir())
+
+
+def test_db_cache_symlink(tmp_path, db_path):
+    """It should not use a cache directory which is a symlink.
+
+    (Someone else could make it point to one of the user's directories.)
+    """
+    target = tmp_path / 'target'
+    target.mkdir(mode=0o700)
+    old_file = target / f'{"0" * 64}.lock'
+    old_file.touch()
+    old = time() - CylcWorkflowDBCache.MAX_AGE - 1
+    os.utime(old_file, (old, old))
+    cache_dir = tmp_path / 'cache'
+    cache_dir.symlink_to(target)
+    cache = CylcWorkflowDBCache(str(cache_dir))
+    queries = []
+    cache.get(db_path, ['a'], lambda: queries.append(1))
+    cache.get(db_path, ['a'], lambda: queries.append(1))
+    assert len(queries) == 2
+    assert list(target.iterdir()) == [old_file]
+
+
+def test_db_cache_no_locks(tmp_path, db_path, monkeypatch):
+    """It should query the DB directly if files cannot be locked."""
+    def flock(*args):
+        raise OSError(errno.ENOLCK, 'No locks available')
+
+    monkeypatch.setattr('cylc.flow.dbstatecheck.fcntl.flock', flock)
+    cache = CylcWorkflowDBCache(str(tmp_path / 'cache'))
+    assert cache.get(db_path, ['a'], lambda: 1) == 1
+    assert cache.get(db_path, ['a'], lambda: 2) == 2
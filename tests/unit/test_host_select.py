@@ -20,6 +20,7 @@ NOTE: these are functional tests, for unit tests see the docstrings in
       the host_select module.
 
 """
+import errno
 import logging
 import socket
 
@@ -28,7 +29,9 @@ import pytest
 from cylc.flow import CYLC_LOG
 from cylc.flow.exceptions import HostSelectException
 from cylc.flow.host_select import (
+    _get_cached_metrics,
     _get_metrics,
+    _tuple_factory,
     select_host,
     select_workflow_host,
 )
@@ -218,3 +221,91 @@ def test_get_metrics_no_hosts_error(caplog):
     assert not host_stats
     # the return code should be recorded
     assert data == {'not-a-host': {'returncode': 255}}
+
+
+@pytest.fixture
+def mock_get_metrics(monkeypatch, tmp_path):
+    """Isolate the host metrics cache and count metric retrievals."""
+    monkeypatch.setattr(
+        'cylc.flow.host_select.METRICS_CACHE_PATH',
+        str(tmp_path / 'host-metrics.json'),
+    )
+    calls = []
+    memory = _tuple_factory('virtual_memory', ('available', 'total'))
+
+    def _get_metrics(hosts, metrics, data):
+        calls.append(hosts)
+        for host in hosts:
+            data[host]['returncode'] = 0
+        return (
+            {
+                host: {('cpu_count',): 4, ('virtual_memory',): memory(1, 2)}
+                for host in hosts
+            },
+            data,
+        )
+
+    monkeypatch.setattr('cylc.flow.host_select._get_metrics', _get_metrics)
+    return calls
+
+
+def test_get_cached_metrics(mock_get_metrics, tmp_path):
+    """It should reuse host metrics until they time out."""
+    metrics = [('cpu_count',), ('virtual_memory',)]
+
+    def get_metrics(hosts, timeout):
+        return _get_cached_metrics(
+            hosts, metrics, {host: {} for host in hosts}, timeout
+        )
+
+    stats, data = get_metrics(['a', 'b'], 60)
+    assert mock_get_metrics == [['a', 'b']]
+    assert data == {'a': {'returncode': 0}, 'b': {'returncode': 0}}
+    assert (tmp_path / 'host-metrics.json').exists()
+
+    # cached metrics are reused, other hosts are retrieved
+    cached_stats, data = get_metrics(['a', 'b', 'c'], 60)
+    assert mock_get_metrics[1:] == [['c']]
+    assert cached_stats == {**stats, 'c': stats['a']}
+    assert data['a'] == {'returncode': 0}
+    # (namedtuples survive the round trip)
+    assert cached_stats['a'][('virtual_memory',)].available == 1
+
+    # metrics which have timed out are retrieved again
+    get_metrics(['a'], 0)
+    assert mock_get_metrics[2:] == [['a']]
+
+    # as are metrics which weren't cached
+    _get_cached_metrics(['a'], [('cpu_percent',)], {'a': {}}, 60)
+    assert mock_get_metrics[3:] == [['a']]
+
+
+def test_select_host_metrics_cache(mock_get_metrics, tmp_path):
+    """It should only use the metrics cache if configured to."""
+    def select(timeout):
+        assert select_host(
+            ['localhost'],
+            ranking_string='cpu_count()',
+            metrics_cache_timeout=timeout,
+        )
+
+    # (not by default)
+    for timeout in (None, 0, 0):
+        select(timeout)
+    assert len(mock_get_metrics) == 3
+    assert not (tmp_path / 'host-metrics.json.lock').exists()
+
+    for timeout in (60, 60):
+        select(timeout)
+    assert len(mock_get_metrics) == 4
+
+
+def test_get_cached_metrics_no_locks(mock_get_metrics, monkeypatch):
+    """It should retrieve metrics itself if the cache cannot be locked."""
+    def flock(*args):
+        raise OSError(errno.ENOLCK, 'No locks available')
+
+    monkeypatch.setattr('cylc.flow.host_select.fcntl.flock', flock)
+    for _ in range(2):
+        _get_cached_metrics(['a'], [('cpu_count',)], {'a': {}}, 60)
+    assert mock_get_metrics == [['a'], ['a']]
@@ -25,6 +25,7 @@ from cylc.flow.id import (
     RELATIVE_ID,
     UNIVERSAL_ID,
     Tokens,
+    quick_parse_job_id,
     quick_relative_id,
 )
 
@@ -406,3 +407,20 @@ def test_task_property():
 ])
 def test_quick_relative_id(cycle, expected):
     assert quick_relative_id(cycle, 'foo') == expected
+
+
+@pytest.mark.parametrize('job_id', [
+    '1/foo/01',
+    '1/foo/1',
+    '20000101T0000Z/foo/02',
+    '1/foo',
+    '1/foo:running/01',
+    '1/foo/01:failed',
+])
+def test_quick_parse_job_id(job_id):
+    """It parses job IDs as Tokens would."""
+    tokens = Tokens(job_id, relative=True)
+    assert quick_parse_job_id(job_id) == (
+        tokens.duplicate(job=None).relative_id,
+        int(tokens['job']) if tokens['job'] else None,
+    )
@@ -0,0 +1,135 @@
+# THIS FILE IS PART OF THE CYLC WORKFLOW ENGINE.
+# Copyright (C) NIWA & British Crown (Met Office) & Contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+
+import pytest
+
+from cylc.flow.job_cmd_batcher import JobCommandBatcher
+
+
+PLATFORM = {'name': 'foo'}
+
+
+def itasks(num, submit_num=1):
+    return [
+        SimpleNamespace(identity=f'1/t{i}', submit_num=submit_num)
+        for i in range(num)
+    ]
+
+
+def noop(*_):
+    pass
+
+
+def test_batches():
+    """It splits tasks into batches of the current batch size."""
+    batcher = JobCommandBatcher()
+    assert batcher.put('jobs-poll', PLATFORM, itasks(250), noop, noop) == 3
+    batches = batcher.get('foo', 0)
+    assert [len(batch.itasks) for batch in batches] == [100, 100, 50]
+    assert all(batch.time_started is not None for batch in batches)
+    assert batcher.running == {('jobs-poll', 'foo'): 3}
+    assert not batcher.waiting
+
+
+def test_dedupe():
+    """It does not queue tasks which are already waiting."""
+    batcher = JobCommandBatcher()
+    batcher.put('jobs-poll', PLATFORM, itasks(5), noop, noop)
+    # already waiting
+    assert batcher.put('jobs-poll', PLATFORM, itasks(5), noop, noop) == 0
+    # different command or submit number
+    assert batcher.put('jobs-kill', PLATFORM, itasks(5), noop, noop) == 1
+    assert batcher.put('jobs-poll', PLATFORM, itasks(5, 2), noop, noop) == 1
+    # tasks can be queued again once their batch has started
+    batcher.get('foo', 0)
+    assert batcher.put('jobs-poll', PLATFORM, itasks(5), noop, noop) == 1
+
+
+def test_concurrency_limit():
+    """It only lets so many batches run at once on a platform."""
+    batcher = JobCommandBatcher()
+    batcher.batch_sizes[('jobs-poll', 'foo')] = 10
+    batcher.put('jobs-poll', PLATFORM, itasks(40), noop, noop)
+    running = batcher.get('foo', 2)
+    assert len(running) == 2
+    assert batcher.get('foo', 2) == []
+    assert batcher.get('bar', 2) == []
+
+    batcher.done(running[0])
+    # (done is idempotent)
+    batcher.done(running[0])
+    assert batcher.running == {('jobs-poll', 'foo'): 1}
+    assert len(batcher.get('foo', 2)) == 1
+    assert batcher.get('foo', 2) == []
+
+
+def test_kill_not_held_up_by_polls():
+    """It runs kills separately from polls, and starts them first."""
+    batcher = JobCommandBatcher()
+    batcher.batch_sizes[('jobs-poll', 'foo')] = 10
+    batcher.put('jobs-poll', PLATFORM, itasks(40), noop, noop)
+    assert len(batcher.get('foo', 2)) == 2
+    # the polls are at their limit, the kill can still start
+    batcher.put('jobs-kill', PLATFORM, itasks(5), noop, noop)
+    batcher.put('jobs-poll', PLATFORM, itasks(5, 2), noop, noop)
+    assert [batch.cmd_key for batch in batcher.get('foo', 2)] == [
+        'jobs-kill'
+    ]
+    # kills are started before polls
+    batcher = JobCommandBatcher()
+    batcher.put('jobs-poll', PLATFORM, itasks(5), noop, noop)
+    batcher.put('jobs-kill', PLATFORM, itasks(5), noop, noop)
+    assert [batch.cmd_key for batch in batcher.get('foo', 0)] == [
+        'jobs-kill', 'jobs-poll'
+    ]
+
+
+@pytest.mark.parametrize(
+    'num_tasks, duration, expected',
+    [
+        pytest.param(100, 60, 50, id='slow-halves'),
+        pytest.param(100, 1, 200, id='fast-full-doubles'),
+        pytest.param(50, 1, 100, id='fast-partial-unchanged'),
+        pytest.param(100, 20, 100, id='on-target-unchanged'),
+        pytest.param(100, None, 100, id='no-duration-unchanged'),
+    ]
+)
+def test_adapt_batch_size(num_tasks, duration, expected):
+    """It adapts the batch size to the command duration."""
+    batcher = JobCommandBatcher()
+    batcher.put('jobs-poll', PLATFORM, itasks(num_tasks), noop, noop)
+    batch, = batcher.get('foo', 0)
+    batcher.done(batch, duration)
+    assert batcher.get_batch_size('jobs-poll', 'foo') == expected
+    # other commands are unaffected
+    assert batcher.get_batch_size('jobs-kill', 'foo') == 100
+
+
+def test_batch_size_bounds():
+    """It keeps the batch size within bounds."""
+    batcher = JobCommandBatcher()
+    for duration, expected in (
+        (1000, JobCommandBatcher.MIN_BATCH_SIZE),
+        (0, JobCommandBatcher.MAX_BATCH_SIZE),
+    ):
+        for _ in range(10):
+            size = batcher.get_batch_size('jobs-poll', 'foo')
+            batcher.put('jobs-poll', PLATFORM, itasks(size), noop, noop)
+            for batch in batcher.get('foo', 0):
+                batcher.done(batch, duration)
+        assert batcher.get_batch_size('jobs-poll', 'foo') == expected
@@ -418,6 +418,16 @@ def test_write_task_environment():
         JobFileWriter()._write_task_environment(fake_file, job_conf)
         assert fake_file.getvalue() == expected
 
+    # with a message relay
+    job_conf['platform']['message relay'] = '/tmp/relay-$USER.sock'
+    with io.StringIO() as fake_file:
+        JobFileWriter()._write_task_environment(fake_file, job_conf)
+        assert fake_file.getvalue() == expected.replace(
+            'COMMS_METHOD=ssh\n',
+            'COMMS_METHOD=ssh\n'
+            '    export CYLC_MESSAGE_RELAY="/tmp/relay-$USER.sock"\n',
+        )
+
 
 def test_write_runtime_environment():
     """Test runtime environment is correctly written in jobscript"""
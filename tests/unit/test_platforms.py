@@ -21,6 +21,7 @@ from typing import Any, Dict, List, Optional, Type
 
 from cylc.flow.parsec.OrderedDict import OrderedDictWithDefaults
 from cylc.flow.platforms import (
+    get_default_platform,
     get_platform,
     get_platform_deprecated_settings,
     is_platform_definition_subshell,
@@ -627,3 +628,22 @@ def test_get_platform_from_OrderedDictWithDefaults(mock_glbl_cfg):
     ])
     result = get_platform(task_conf)['name']
     assert result == 'skarloey'
+
+
+def test_get_default_platform(mock_glbl_cfg):
+    """It returns the same localhost platform until the config changes."""
+    global_config = '''
+        [platforms]
+            [[localhost]]
+                job runner = at
+    '''
+    mock_glbl_cfg('cylc.flow.platforms.glbl_cfg', global_config)
+    platform = get_default_platform()
+    assert platform['name'] == 'localhost'
+    assert platform['job runner'] == 'at'
+    assert get_default_platform() is platform
+    assert get_platform() == platform
+    assert get_platform() is not platform
+
+    mock_glbl_cfg('cylc.flow.platforms.glbl_cfg', global_config)
+    assert get_default_platform() is not platform
@@ -15,14 +15,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from functools import partial
+from itertools import product
+import re
 from typing import Optional
 
 import pytest
 
 from cylc.flow.cycling.integer import IntegerPoint
 from cylc.flow.cycling.loader import ISO8601_CYCLING_TYPE, get_point
+from cylc.flow.exceptions import TriggerExpressionError
 from cylc.flow.id import Tokens, detokenise
-from cylc.flow.prerequisite import Prerequisite, SatisfiedState
+from cylc.flow.listify import listify
+from cylc.flow.prerequisite import (
+    ConditionalExpression,
+    Prerequisite,
+    SatisfiedState,
+)
 from cylc.flow.run_modes import RunMode
 
 
@@ -259,3 +267,60 @@ def test_satisfy_me__override_truthy(
 
     prereq.satisfy_me([Tokens('//1/a:x')], forced=forced, mode=mode)
     assert prereq[('1', 'a', 'x')] == existing
+
+
+@pytest.mark.parametrize('expr', [
+    'a | b & c',
+    'a & b | c',
+    '(a | b) & c',
+    'a & (b | c) & d',
+    '(a & b) | (c & (d | a))',
+])
+def test_conditional_expression(expr: str):
+    """Compiled expressions should have Python operator precedence."""
+    operands = 'abcd'
+    condition = ConditionalExpression.from_list(
+        listify(expr), operands.index
+    )
+    for values in product((True, False), repeat=len(operands)):
+        assert condition.evaluate(values) == eval(  # nosec
+            expr, dict(zip(operands, values))
+        )
+    assert condition.render(operands) == expr.replace(' ', '')
+
+
+@pytest.mark.parametrize('expr, error', [
+    ('1/a x | 1/z x', 'unknown trigger "1/z x"'),
+    ('1/a x | (1/b x', 'unmatched parentheses'),
+    ('1/a x | | 1/b x', 'unexpected operator "|"'),
+])
+def test_set_conditional_expr_error(expr: str, error: str):
+    """Invalid expressions should error when they are evaluated."""
+    prereq = Prerequisite(IntegerPoint('1'))
+    prereq[('1', 'a', 'x')] = False
+    prereq[('1', 'b', 'x')] = False
+    prereq.set_conditional_expr(expr)
+    with pytest.raises(TriggerExpressionError, match=re.escape(error)):
+        prereq.is_satisfied()
+
+
+def test_set_condition_shared():
+    """A compiled expression can be shared between prerequisites."""
+    condition = ConditionalExpression.from_list(
+        ['a', '|', 'b'], ['a', 'b'].index
+    )
+    prereqs = []
+    for point in (1, 2):
+        prereq = Prerequisite(IntegerPoint(str(point)))
+        prereq[(point, 'a', 'x')] = False
+        prereq[(point, 'b', 'x')] = False
+        prereq.set_condition(condition)
+        prereqs.append(prereq)
+    prereq_1, prereq_2 = prereqs
+    assert prereq_1.conditional_expression == '1/a x|1/b x'
+    assert prereq_2.conditional_expression == '2/a x|2/b x'
+    assert prereq_1.instantaneous_hash() != prereq_2.instantaneous_hash()
+
+    prereq_2.satisfy_me([Tokens('//2/b:x')])
+    assert not prereq_1.is_satisfied()
+    assert prereq_2.is_satisfied()
@@ -154,6 +154,41 @@ def test_table_creation(tmp_path: Path):
     assert CylcWorkflowDAO.TABLE_WORKFLOW_PARAMS in tables
 
 
+@pytest.mark.parametrize('table, where, index', [
+    pytest.param(
+        CylcWorkflowDAO.TABLE_TASK_STATES,
+        'cycle==?',
+        'task_states_cycle_status',
+        id='task_states-cycle',
+    ),
+    pytest.param(
+        CylcWorkflowDAO.TABLE_TASK_STATES,
+        'cycle==? AND status==?',
+        'task_states_cycle_status',
+        id='task_states-cycle-status',
+    ),
+    pytest.param(
+        CylcWorkflowDAO.TABLE_TASK_OUTPUTS,
+        'name==?',
+        'task_outputs_name',
+        id='task_outputs-name',
+    ),
+])
+def test_index_creation(tmp_path: Path, table, where, index):
+    """Test the secondary indexes are created and used."""
+    with CylcWorkflowDAO(tmp_path / 'db', create_tables=True) as dao:
+        plan = ' '.join(
+            str(row[-1])
+            for row in dao.connect().execute(
+                f'EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE {where}',
+                ['x'] * where.count('?')
+            )
+        )
+        assert index in plan
+        # creating the tables again is harmless
+        dao.create_tables()
+
+
 def test_context_manager_exit(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ):
@@ -237,3 +272,168 @@ def test_select_latest_flow_nums(
         conn.commit()
 
         assert dao.select_latest_flow_nums() == expected
+
+
+def test_writer(tmp_path: Path):
+    """Test writing queued items via the background writer thread."""
+    db_file = tmp_path / 'db'
+    dao = CylcWorkflowDAO(db_file, create_tables=True)
+    dao.close()
+    dao.start_writer(wal=True)
+    assert dao.writer is not None
+    try:
+        for flow_num in range(1, 6):
+            dao.add_insert_item(
+                CylcWorkflowDAO.TABLE_WORKFLOW_FLOWS,
+                [flow_num, 'time', f'flow {flow_num}'],
+            )
+            dao.execute_queued_items()
+        # the queues are handed over to the writer
+        table = dao.tables[CylcWorkflowDAO.TABLE_WORKFLOW_FLOWS]
+        assert not table.insert_queue
+        # reads wait for outstanding writes
+        assert dao.select_workflow_flows_max_flow_num() == 5
+        assert dao.backlog == 0
+        (mode,), = dao.connect().execute('PRAGMA journal_mode')
+        assert mode == 'wal'
+    finally:
+        dao.close()
+        dao.stop_writer()
+    assert dao.writer is None
+    # the database is left in the default journal mode
+    with CylcWorkflowDAO(db_file) as dao:
+        (mode,), = dao.connect().execute('PRAGMA journal_mode')
+        assert mode == 'delete'
+        assert dao.select_workflow_flows_max_flow_num() == 5
+
+
+def test_writer_coalesces_batches(tmp_path: Path, monkeypatch):
+    """Test batches which accumulate are written in one transaction."""
+    db_file = tmp_path / 'db'
+    dao = CylcWorkflowDAO(db_file, create_tables=True)
+    dao.close()
+    transactions: List[int] = []
+    execute_sql_queue = dao.execute_sql_queue
+
+    def _execute_sql_queue(sql_queue, connect=None):
+        transactions.append(len(sql_queue))
+        return execute_sql_queue(sql_queue, connect)
+
+    monkeypatch.setattr(dao, 'execute_sql_queue', _execute_sql_queue)
+    dao.start_writer()
+    assert dao.writer is not None
+    # hold the writer up while several batches are queued
+    with dao.writer._cond:
+        for flow_num in range(1, 4):
+            dao.add_insert_item(
+                CylcWorkflowDAO.TABLE_WORKFLOW_FLOWS,
+                [flow_num, 'time', f'flow {flow_num}'],
+            )
+            dao.execute_queued_items()
+        assert dao.backlog == 3
+    dao.flush()
+    assert transactions == [3]
+    assert dao.backlog == 0
+    dao.stop_writer()
+    assert dao.select_workflow_flows_max_flow_num() == 3
+    dao.close()
+
+
+def test_writer_error(tmp_path: Path, caplog):
+    """Test private database write errors are raised in the main thread."""
+    db_file = tmp_path / 'db'
+    dao = CylcWorkflowDAO(db_file)  # no tables => writes will fail
+    dao.start_writer()
+    dao.add_insert_item(CylcWorkflowDAO.TABLE_TASK_JOBS, ['pub'])
+    dao.execute_queued_items()
+    with pytest.raises(sqlite3.OperationalError):
+        dao.flush()
+    assert 'An error occurred when writing to the database' in caplog.text
+    with pytest.raises(sqlite3.OperationalError):
+        dao.stop_writer()
+
+
+def test_writer_public_retry(tmp_path: Path, caplog):
+    """Test failed public database writes are retried with the next batch.
+    """
+    db_file = tmp_path / 'db'
+    dao = CylcWorkflowDAO(db_file, is_public=True)
+    dao.start_writer()
+    dao.add_insert_item(
+        CylcWorkflowDAO.TABLE_WORKFLOW_FLOWS, [1, 'time', 'flow 1'])
+    dao.execute_queued_items()
+    dao.flush()
+    # the table does not exist yet
+    assert dao.n_tries == 1
+    assert dao.backlog == 1
+    assert 'write attempt (1) did not complete' in caplog.text
+
+    # create the tables by replacing the database file
+    tmp_db = tmp_path / 'tmp'
+    CylcWorkflowDAO(tmp_db, create_tables=True).close()
+    tmp_db.rename(db_file)
+
+    dao.add_insert_item(
+        CylcWorkflowDAO.TABLE_WORKFLOW_FLOWS, [2, 'time', 'flow 2'])
+    dao.execute_queued_items()
+    dao.flush()
+    assert dao.n_tries == 0
+    assert dao.backlog == 0
+    assert dao.select_workflow_flows_max_flow_num() == 2
+    dao.close()
+    dao.stop_writer()
+
+
+def test_coalesce_queued_items(tmp_path: Path):
+    """Test redundant queued items are coalesced.
+
+    Coalescing should not change the end result.
+    """
+    db_file = tmp_path / 'db'
+    with CylcWorkflowDAO(db_file, create_tables=True) as dao:
+        table = dao.tables[CylcWorkflowDAO.TABLE_TASK_STATES]
+        for _ in range(3):
+            dao.add_delete_item(CylcWorkflowDAO.TABLE_TASK_STATES, {})
+        for status in ('waiting', 'preparing'):
+            for name in ('a', 'b'):
+                # INSERT OR REPLACE with the same primary key
+                dao.add_insert_item(
+                    CylcWorkflowDAO.TABLE_TASK_STATES,
+                    {'name': name, 'cycle': '1', 'flow_nums': '[1]',
+                     'status': status},
+                )
+        for status in ('submitted', 'running', 'succeeded'):
+            # UPDATE of the same columns for the same row
+            dao.add_update_item(
+                CylcWorkflowDAO.TABLE_TASK_STATES,
+                ({'status': status}, {'name': 'a', 'cycle': '1'}),
+            )
+            # UPDATE which sets a WHERE column (can't be coalesced)
+            dao.add_update_item(
+                CylcWorkflowDAO.TABLE_TASK_STATES,
+                ({'status': status}, {'name': 'b', 'status': 'preparing'}),
+            )
+        assert [len(args) for args in table.delete_queues.values()] == [1]
+        assert len(table.insert_queue) == 2
+        assert [len(args) for args in table.update_queues.values()] == [1, 3]
+        dao.execute_queued_items()
+        assert not table.insert_queue
+        assert not table.insert_keys
+        assert sorted(dao.connect().execute(
+            'SELECT name, status FROM task_states'
+        )) == [('a', 'succeeded'), ('b', 'submitted')]
+
+
+def test_coalesce_null_primary_key():
+    """Test INSERTs with NULL primary key values are not coalesced.
+
+    (NULLs do not conflict in SQLite primary keys.)
+    """
+    dao = CylcWorkflowDAO(':memory:')
+    for _ in range(2):
+        dao.add_insert_item(
+            CylcWorkflowDAO.TABLE_TASK_PREREQUISITES,
+            {'name': 'a', 'cycle': '1', 'prereq_name': 'b'},
+        )
+    table = dao.tables[CylcWorkflowDAO.TABLE_TASK_PREREQUISITES]
+    assert len(table.insert_queue) == 2
@@ -101,7 +101,8 @@ def test_release_tasks_to_run__auto_restart():
         stop_mode=None,
         pool=Mock(
             spec=TaskPool,
-            get_tasks=lambda: [Mock(spec=TaskProxy)]
+            get_tasks=lambda: [Mock(spec=TaskProxy)],
+            get_tasks_by_status=lambda *_: [Mock(spec=TaskProxy)],
         ),
         workflow='parachutes',
         options=RunOptions(),
@@ -14,8 +14,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import json
+import sys
 from pathlib import Path
+from signal import SIGKILL
+from time import sleep, time
 from types import SimpleNamespace
+from unittest.mock import Mock
 from tempfile import (
     NamedTemporaryFile,
     SpooledTemporaryFile,
@@ -29,11 +35,13 @@ from cylc.flow import LOG
 from cylc.flow.id import Tokens
 from cylc.flow.cycling.iso8601 import ISO8601Point
 from cylc.flow.task_events_mgr import TaskJobLogsRetrieveContext
-from cylc.flow.subprocctx import SubProcContext
+from cylc.flow.subprocctx import SubFuncContext, SubProcContext
 from cylc.flow.subprocpool import (
+    FunctionWorkerPool,
     SubProcPool,
     _XTRIG_FUNC_CACHE,
     get_xtrig_func,
+    run_function_call,
 )
 from cylc.flow.task_outputs import (
     TASK_OUTPUT_SUBMITTED,
@@ -422,3 +430,218 @@ def test_rsync_255_fail(mock_ctx, expect, ctx_kwargs):
         {'ssh command': 'ssh', 'rsync command': 'rsync command'},
     )
     assert output == expect
+
+
+def test_run_function_call(tmp_path):
+    """It should run functions in-process, returning (ret_code, out, err)."""
+    python_dir = tmp_path / "lib" / "python"
+    python_dir.mkdir(parents=True)
+    (python_dir / "pinger.py").write_text(
+        'import asyncio'
+        '\ndef ping(x):'
+        '\n    print("pinging")'
+        '\n    return [True, {"x": x}]'
+        '\nasync def aping(x):'
+        '\n    await asyncio.sleep(0)'
+        '\n    return [True, {"x": x}]'
+        '\ndef pong():'
+        '\n    raise ValueError("pong")'
+    )
+    assert run_function_call(
+        'pinger', 'ping', [1], {}, str(tmp_path)
+    ) == (0, '[true, {"x": 1}]', 'pinging\n')
+
+    # async functions should be run to completion
+    assert run_function_call(
+        'pinger', 'aping', [], {'x': 2}, str(tmp_path)
+    ) == (0, '[true, {"x": 2}]', '')
+
+    # errors should be reported via the return code and stderr
+    ret_code, out, err = run_function_call(
+        'pinger', 'pong', [], {}, str(tmp_path)
+    )
+    assert ret_code == 1
+    assert out == ''
+    assert 'ValueError: pong' in err
+
+
+def _run_func_pool(pool, n_calls):
+    """Process the pool until n_calls calls have completed."""
+    done = []
+    start = time()
+    while len(done) < n_calls:
+        done.extend(pool.process())
+        assert time() - start < 60, 'function worker pool timed out'
+        sleep(0.01)
+    return done
+
+
+def test_function_worker_pool(tmp_path):
+    """It should run xtrigger functions in persistent workers."""
+    python_dir = tmp_path / "lib" / "python"
+    python_dir.mkdir(parents=True)
+    (python_dir / "count.py").write_text(
+        'import os'
+        '\nCALLS = []'
+        '\ndef count():'
+        '\n    CALLS.append(1)'
+        '\n    return [True, {"pid": os.getpid(), "calls": len(CALLS)}]'
+        '\ndef sleepy():'
+        '\n    import time; time.sleep(60)'
+    )
+    pool = FunctionWorkerPool(1, 30)
+    try:
+        callback = Mock()
+        for _ in range(3):
+            ctx = SubFuncContext('count', 'count', [], {})
+            ctx.update_command(str(tmp_path))
+            pool.put(ctx, callback, [])
+        done = _run_func_pool(pool, 3)
+        results = [json.loads(ctx.out)[1] for ctx, *_ in done]
+        # all calls should have run in the same worker, and the module should
+        # have remained imported between calls
+        assert len({result['pid'] for result in results}) == 1
+        assert [result['calls'] for result in results] == [1, 2, 3]
+        assert {ctx.ret_code for ctx, *_ in done} == {0}
+        assert not pool.is_not_done()
+
+        # recycled workers should re-import the module
+        pool.recycle()
+        ctx = SubFuncContext('count', 'count', [], {})
+        ctx.update_command(str(tmp_path))
+        pool.put(ctx, callback, [])
+        (ctx, *_), = _run_func_pool(pool, 1)
+        assert json.loads(ctx.out)[1]['calls'] == 1
+
+        # calls which time out should be killed
+        pool.timeout = 0.5
+        ctx = SubFuncContext('sleepy', 'sleepy', [], {}, mod_name='count')
+        ctx.update_command(str(tmp_path))
+        pool.put(ctx, callback, [])
+        (ctx, *_), = _run_func_pool(pool, 1)
+        assert ctx.ret_code == -SIGKILL
+        assert ctx.err == 'killed on timeout (0.5)'
+        assert not pool.workers
+    finally:
+        pool.terminate()
+
+
+def test_function_worker_pool_recycle():
+    """It should tell all idle workers to stop before waiting for any."""
+    pool = FunctionWorkerPool(3, 30)
+    calls = Mock()
+    workers = [Mock(item=None), Mock(item=None), Mock(item=['busy'])]
+    for name, worker in zip('abc', workers):
+        calls.attach_mock(worker, name)
+    pool.workers = list(workers)
+    pool.recycle()
+    assert [call[0] for call in calls.mock_calls] == [
+        'a.stop', 'b.stop', 'a.join', 'b.join'
+    ]
+    # busy workers are retired once their call completes
+    assert pool.workers == [workers[2]]
+    assert workers[2].retire is True
+
+
+async def _wait_for_exit(pool, timeout=10):
+    """Wait for the pool to notice that its running commands have exited."""
+    start = time()
+    while pool.runnings:
+        if time() > start + timeout:
+            raise Exception('Commands did not exit')
+        await asyncio.sleep(0.05)
+
+
+async def test_watched_command():
+    """Running commands are watched by the event loop rather than polled."""
+    pool = SubProcPool()
+    pool.on_exit = Mock()
+    pool._poll_proc_pipes = Mock()
+    done = []
+    ctx = SubProcContext('watched', [
+        sys.executable, '-c',
+        # more output than fits in a pipe buffer, multi-byte characters
+        # will be split between reads
+        'import sys; print("é" * 100000); print("oops", file=sys.stderr)'
+    ])
+    pool.put_command(ctx, callback=done.append)
+    pool.process()
+    assert pool.runnings[0][7] is not None
+
+    await _wait_for_exit(pool)
+    pool.on_exit.assert_called_once()
+    assert pool.is_not_done()
+    # callbacks are run by process
+    assert not done
+    pool.process()
+    assert done == [ctx]
+    assert not pool.is_not_done()
+    assert ctx.ret_code == 0
+    assert ctx.out == 'é' * 100000 + '\n'
+    assert ctx.err == 'oops\n'
+    assert not pool._poll_proc_pipes.called
+
+
+async def test_watched_command_timeout():
+    """Watched commands are killed when they exceed the timeout."""
+    pool = SubProcPool()
+    pool.proc_pool_timeout = 0.2
+    callback_255 = Mock()
+    done = []
+    ctx = SubProcContext('watched', ['sleep', '10'])
+    pool.put_command(
+        ctx, callback=done.append, callback_255=callback_255)
+    pool.process()
+    await _wait_for_exit(pool)
+    pool.process()
+    assert done == [ctx]
+    assert ctx.ret_code == -SIGKILL
+    assert 'killed on timeout (0.2)' in ctx.err
+    assert not callback_255.called
+
+
+def test_unwatched_command():
+    """Commands are polled when not run in an event loop."""
+    pool = SubProcPool()
+    done = []
+    ctx = SubProcContext('unwatched', ['echo', 'hello'])
+    pool.put_command(ctx, callback=done.append)
+    pool.process()
+    assert pool.runnings[0][7] is None
+    start = time()
+    while pool.is_not_done():
+        assert time() < start + 10
+        sleep(0.05)
+        pool.process()
+    assert done == [ctx]
+    assert ctx.out == 'hello\n'
+
+
+def test_start_queued():
+    """It starts queued commands of one kind without handling others."""
+    pool = SubProcPool()
+    done = []
+    ctxs = [
+        SubProcContext(cmd_key, ['true'])
+        for cmd_key in ('foo', 'bar', 'foo', 'baz')
+    ]
+    for ctx in ctxs:
+        pool.put_command(ctx, callback=done.append)
+    pool.start_queued('foo')
+    assert [ctx for _, ctx, *_ in pool.runnings] == [ctxs[0], ctxs[2]]
+    # the others keep their place in the queue
+    assert [ctx for ctx, *_ in pool.queuings] == [ctxs[1], ctxs[3]]
+    start = time()
+    while pool.runnings[0][0].poll() is None:
+        assert time() < start + 10
+        sleep(0.05)
+    # finished commands are left for process to handle
+    pool.start_queued('foo')
+    assert len(pool.runnings) == 2
+    assert not done
+    pool.process()
+    while pool.is_not_done():
+        assert time() < start + 10
+        sleep(0.05)
+        pool.process()
+    assert sorted(done, key=ctxs.index) == ctxs
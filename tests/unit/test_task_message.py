@@ -15,10 +15,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from socket import gaierror
+from unittest.mock import Mock
 
 import pytest
 
-from cylc.flow.task_message import send_messages
+from cylc.flow.task_message import CYLC_MESSAGE_RELAY, send_messages
 
 
 def test_send_messages_err(
@@ -36,3 +37,25 @@ def test_send_messages_err(
         'arasaka', '1/v/01', [['INFO', 'silverhand']], '2077-01-01T00:00:00Z'
     )
     assert f"gaierror: [Errno -2] {exc_msg}" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('relay_ok', [True, False])
+def test_send_messages_relay(monkeypatch: pytest.MonkeyPatch, relay_ok):
+    """It hands messages to the message relay, if there is one.
+
+    If the relay does not accept them it sends them directly.
+    """
+    monkeypatch.setenv(CYLC_MESSAGE_RELAY, '/path/to/relay.sock')
+    mock_send_to_relay = Mock(return_value=relay_ok)
+    mock_client = Mock()
+    monkeypatch.setattr(
+        'cylc.flow.task_message.send_to_relay', mock_send_to_relay
+    )
+    monkeypatch.setattr(
+        'cylc.flow.task_message.get_client', lambda *a, **k: mock_client
+    )
+    send_messages('myflow', '1/a/01', [['INFO', 'hi']], 'now')
+    mock_send_to_relay.assert_called_once_with(
+        '/path/to/relay.sock', 'myflow', '1/a/01', [['INFO', 'hi']], 'now'
+    )
+    assert mock_client.called is not relay_ok
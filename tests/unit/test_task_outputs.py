@@ -135,7 +135,7 @@ def test_completion_explicit():
     assert outputs.is_complete() is True
 
     # satisfy the (succeeded and x) pair
-    outputs._completed['y'] = False
+    del outputs._completed['y']
     outputs.set_message_complete('x')
     assert outputs.is_complete() is True
 
@@ -21,9 +21,16 @@ import pytest
 from pytest import param
 
 from cylc.flow.cycling import PointBase
+from cylc.flow.cycling.integer import IntegerPoint
 from cylc.flow.cycling.iso8601 import ISO8601Point
 from cylc.flow.flow_mgr import FlowNums
+from cylc.flow.id import Tokens
+from cylc.flow.task_outputs import (
+    FORCED_COMPLETION_MSG,
+    TASK_OUTPUT_SUCCEEDED,
+)
 from cylc.flow.task_proxy import TaskProxy
+from cylc.flow.taskdef import TaskDef
 
 
 @pytest.mark.parametrize(
@@ -128,3 +135,34 @@ def test_match_flows_copy():
     result = TaskProxy.match_flows(mock_itask, set())
     assert result == mock_itask.flow_nums
     assert result is not mock_itask.flow_nums
+
+
+def test_shared_task_data(set_cycling_type):
+    """Task proxies should share unchanging data with other instances.
+
+    But changes to one instance should not affect the others.
+    """
+    set_cycling_type()
+    tdef = TaskDef('a', rtcfg={}, start_point=None, initial_point=None)
+    tdef.add_output('x', 'x message')
+    itask1, itask2 = (
+        TaskProxy(Tokens('~user/workflow'), tdef, IntegerPoint(str(cycle)))
+        for cycle in (1, 2)
+    )
+
+    assert itask1.platform is itask2.platform
+    assert itask1.platform['name'] == 'localhost'
+
+    outputs1 = itask1.state.outputs
+    outputs2 = itask2.state.outputs
+    assert outputs1._message_to_trigger is outputs2._message_to_trigger
+    assert outputs1._message_to_compvar is outputs2._message_to_compvar
+    outputs1.set_message_complete('x message')
+    outputs1.set_message_complete(TASK_OUTPUT_SUCCEEDED, forced=True)
+    assert outputs1.get_completed_outputs() == {
+        'x': 'x message',
+        TASK_OUTPUT_SUCCEEDED: FORCED_COMPLETION_MSG,
+    }
+    assert outputs2.get_completed_outputs() == {}
+    assert outputs2.is_message_complete('x message') is False
+    assert outputs2.is_message_complete('y message') is None
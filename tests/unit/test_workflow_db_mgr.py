@@ -77,3 +77,69 @@ def test_remove_task_from_flows(
                 )
             }
             assert remaining_fnums == expected_remaining
+
+
+def test_task_history(tmp_path: Path, set_cycling_type):
+    """The task history index should match the private database."""
+    set_cycling_type()
+    db_mgr = WorkflowDatabaseManager(tmp_path)
+    schd_tokens = Tokens('~asterix/gaul')
+    tdef = TaskDef('a', rtcfg={}, start_point=None, initial_point=None)
+    history = db_mgr.task_history
+
+    def check(dao, cycle):
+        assert (
+            sorted(history.get_prev_instances('a', cycle))
+            == sorted(dao.select_prev_instances('a', cycle))
+        )
+        assert (
+            history.get_task_outputs('a', cycle)
+            == dao.select_task_outputs('a', cycle)
+        )
+
+    with db_mgr.get_pri_dao() as dao:
+        db_mgr.pri_dao = dao
+        db_mgr.pub_dao = Mock()
+        itask = TaskProxy(schd_tokens, tdef, IntegerPoint('1'), flow_nums={1})
+        db_mgr.put_insert_task_states(itask)
+        db_mgr.put_insert_task_outputs(itask)
+        db_mgr.process_queued_ops()
+
+        # load cycle 1 from the DB, cycle 2 is empty
+        check(dao, '1')
+        check(dao, '2')
+        assert set(history.states) == {'1', '2'}
+        dao.select_task_states_for_cycle = Mock()
+        dao.select_task_outputs_for_cycle = Mock()
+
+        # new rows and updates for loaded cycles are applied to the index
+        itask.submit_num = 1
+        itask.state.reset('running')
+        itask.state.outputs.set_message_complete('started')
+        db_mgr.put_update_task_state(itask)
+        db_mgr.put_update_task_outputs(itask)
+        itask2 = TaskProxy(schd_tokens, tdef, IntegerPoint('2'), flow_nums={2})
+        db_mgr.put_insert_task_states(itask2)
+        db_mgr.put_insert_task_outputs(itask2)
+        db_mgr.process_queued_ops()
+        check(dao, '1')
+        check(dao, '2')
+        assert history.get_prev_instances('a', '1') == [
+            (1, False, {1}, 'running')
+        ]
+        assert not dao.select_task_states_for_cycle.called
+        assert not dao.select_task_outputs_for_cycle.called
+
+        # raw SQL updates invalidate the index
+        db_mgr.remove_task_from_flows('1', 'a', {1})
+        db_mgr.process_queued_ops()
+        assert history.states == {}
+        del dao.select_task_states_for_cycle
+        del dao.select_task_outputs_for_cycle
+        check(dao, '1')
+        check(dao, '2')
+
+        # cycles behind the runahead base point are dropped
+        history.prune(IntegerPoint('2'))
+        assert set(history.states) == {'2'}
+        assert set(history.outputs) == {'2'}
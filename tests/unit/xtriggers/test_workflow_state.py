@@ -33,6 +33,14 @@ from cylc.flow.xtriggers.workflow_state import (
 from cylc.flow.xtriggers.suite_state import suite_state
 
 
+@pytest.fixture(autouse=True)
+def db_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep the xtrigger database cache out of the user's ~/.cylc."""
+    cache_dir = tmp_path / 'db-cache'
+    monkeypatch.setattr('cylc.flow.dbstatecheck.DB_CACHE_DIR', str(cache_dir))
+    return cache_dir
+
+
 def test_inferred_run(tmp_run_dir: 'Callable', capsys: pytest.CaptureFixture):
     """Test that the workflow_state xtrigger infers the run number.
 
@@ -150,6 +158,7 @@ def test_c7_db_back_compat(tmp_run_dir: 'Callable'):
 def test_c8_db_back_compat(
     tmp_run_dir: 'Callable',
     capsys: pytest.CaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
 ):
     """Test workflow_state xtrigger backwards compatibility with Cylc < 8.3.0
     database."""
@@ -218,6 +227,17 @@ def test_c8_db_back_compat(
     _, err = capsys.readouterr()
     assert output_fallback_msg in err
 
+    # Cached results are used without connecting to the DB
+    def no_connect(*args, **kwargs):
+        raise sqlite3.OperationalError('should not connect')
+
+    monkeypatch.setattr(
+        'cylc.flow.scripts.workflow_state.CylcWorkflowDBChecker.__init__',
+        no_connect,
+    )
+    satisfied, _ = workflow_state(gimli)
+    assert satisfied
+
 
 def test__workflow_state_backcompat(tmp_run_dir: 'Callable'):
     """Test the _workflow_state_backcompat & suite_state functions on a